@@ -7,10 +7,14 @@ Simple synqed agent with Anthropic AI.
 
 import asyncio
 import os
+import sys
 from pathlib import Path
-from anthropic import AsyncAnthropic
 import synqed
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment
 try:
     from dotenv import load_dotenv
@@ -31,7 +35,7 @@ async def alice_logic(context):
         print("❌ ANTHROPIC_API_KEY not set!")
         return None
     
-    anthropic_client = AsyncAnthropic(api_key=anthropic_key)
+    anthropic_client = llm_for(context).anthropic(api_key=anthropic_key)
     
     # Get conversation history
     history = context.get_conversation_history()
@@ -23,10 +23,14 @@ Total: 9+ unique agents across 4 workspaces
 
 import asyncio
 import os
+import sys
 from pathlib import Path
-from anthropic import AsyncAnthropic
 import synqed
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment
 try:
     from dotenv import load_dotenv
@@ -46,7 +50,7 @@ async def venue_coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="venue_coordinator")
     system_prompt = f"""
@@ -79,7 +83,7 @@ async def catering_manager_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="catering_manager")
     system_prompt = f"""
@@ -112,7 +116,7 @@ async def tech_setup_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="tech_setup")
     system_prompt = f"""
@@ -149,7 +153,7 @@ async def program_director_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="program_director")
     system_prompt = f"""
@@ -182,7 +186,7 @@ async def speaker_coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="speaker_coordinator")
     system_prompt = f"""
@@ -215,7 +219,7 @@ async def content_reviewer_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="content_reviewer")
     system_prompt = f"""
@@ -252,7 +256,7 @@ async def marketing_manager_logic(context: synqed.AgentLogicContext) -> dict:
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="marketing_manager")
     system_prompt = f"""
@@ -285,7 +289,7 @@ async def social_media_specialist_logic(context: synqed.AgentLogicContext) -> di
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="social_media_specialist")
     system_prompt = f"""
@@ -318,7 +322,7 @@ async def registration_coordinator_logic(context: synqed.AgentLogicContext) -> d
     if not latest or not latest.content:
         return None
     
-    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     protocol = synqed.get_interaction_protocol(exclude_agent="registration_coordinator")
     system_prompt = f"""
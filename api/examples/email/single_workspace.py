@@ -28,11 +28,15 @@ Setup:
 """
 import asyncio
 import os
+import sys
 import logging
 from pathlib import Path
-from anthropic import AsyncAnthropic
 import synqed
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment
 try:
     from dotenv import load_dotenv
@@ -70,7 +74,7 @@ async def create_agent_response(
         print("❌ ANTHROPIC_API_KEY not set!")
         return None
     
-    client = AsyncAnthropic(api_key=anthropic_key)
+    client = llm_for(context).anthropic(api_key=anthropic_key)
     
     # Get protocol (excludes current agent from team roster)
     protocol = synqed.get_interaction_protocol(exclude_agent=agent_name)
@@ -31,9 +31,14 @@ import synqed
 import asyncio
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment variables from .env file
 # Look for .env in the script directory, parent directories, or current working directory
 load_dotenv()  # Checks current directory and parents
@@ -44,8 +49,7 @@ async def agent_logic(context):
     user_message = context.get_user_input()
     
     # Define the agent's capabilities and what LLM it is
-    from openai import AsyncOpenAI
-    client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = llm_for(context).openai()
     
     response = await client.chat.completions.create(
         model="gpt-4o-mini",
@@ -15,12 +15,17 @@ Setup:
 """
 import asyncio
 import os
+import sys
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
 import synqed
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment variables
 load_dotenv()
 load_dotenv(dotenv_path=Path(__file__).parent / '.env')
@@ -49,9 +54,7 @@ async def writer_logic(context: synqed.AgentLogicContext) -> dict:
     Returns:
         dict with "send_to" and "content" keys OR just a string (will be auto-parsed)
     """
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a creative writer collaborating with an editor. "
@@ -103,9 +106,7 @@ async def editor_logic(context: synqed.AgentLogicContext) -> dict:
     Returns:
         dict with "send_to" and "content" keys OR just a string (will be auto-parsed)
     """
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are an editor collaborating with a writer. "
@@ -8,8 +8,20 @@ task with zero errors" (meyerson et al., arxiv:2511.09030).
 the demo showcases:
 - maximal agentic decomposition (mad): m=1 step per micro-agent.
 - first-to-ahead-by-k voting: error correction at each step.
-- red-flagging: discard long/malformed outputs.
+- red-flagging: discard long/malformed outputs (over-long ones unparsed),
+  with per-reason counts in the summary.
 - calibration: estimate p and k on a small sample before full run.
+- parallel voting: keep several samples in flight per step (--parallelism).
+- speculative pipelining: start voting on the next steps from the current
+  leader before the step is decided (--speculation-depth).
+- checkpointing: append-only progress log with resume after a crash.
+- compact actions: array-backed move log streamed to disk (--compact-actions).
+- response cache: replay runs and k-sweeps without new api calls (--cache).
+- streaming: cut off runaway or drifting samples mid-generation (--stream).
+- model pools: spread samples over several api keys, providers or models,
+  with weighted routing and rate-limit backoff (--backend).
+- concurrent calibration: stratified samples, confidence interval, early stop.
+- simulation: monte-carlo projection of cost/success over k (no llm calls).
 
 usage:
     # set api key
@@ -18,20 +30,59 @@ usage:
     # calibration only (estimate p, k, cost)
     python maker_hanoi_20_disks.py --calibrate --num-disks 10
     
+    # concurrent calibration over 20 strata of the solution, stopping once k is stable
+    python maker_hanoi_20_disks.py --calibrate --num-disks 20 \
+        --calibration-concurrency 16 --calibration-strata 20 --calibration-rps 10
+    
+    # sweep k for the 20-disk task with a known p (no api calls)
+    python maker_hanoi_20_disks.py --simulate --num-disks 20 --sim-p 0.995 --sim-k 2,3,4,5
+    
+    # calibrate, then sweep k and red-flag thresholds against the measured samples
+    python maker_hanoi_20_disks.py --simulate --num-disks 20 --calibration-concurrency 16 \
+        --calibration-strata 20 --sim-red-flag-thresholds 250,500,750
+    
     # run small task (10 disks = 1,023 steps)
     python maker_hanoi_20_disks.py --num-disks 10 --k 3
     
     # run full 20-disk task (1,048,575 steps)
     python maker_hanoi_20_disks.py --num-disks 20 --k 3
+    
+    # vote with up to 6 concurrent samples per step
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --parallelism 6
+
+    # also vote up to 2 steps ahead of the last decided move
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --parallelism 4 --speculation-depth 2
+    
+    # checkpoint every 1000 steps, then resume after a crash
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --checkpoint-dir runs/hanoi-20
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --resume runs/hanoi-20
+    
+    # keep moves in a compact array and write them as packed bytes
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --compact-actions \
+        --output hanoi-20.json --actions-format binary
+    
+    # cache completions; re-running with another k reuses every bought sample
+    python maker_hanoi_20_disks.py --num-disks 10 --k 3 --cache hanoi-10.sqlite
+    python maker_hanoi_20_disks.py --num-disks 10 --k 4 --cache hanoi-10.sqlite
+
+    # stream samples and stop paying for them as soon as they are red-flagged
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --parallelism 6 --stream
+
+    # pool two anthropic keys, voting with haiku 3:1 against sonnet
+    export ANTHROPIC_API_KEYS="sk-ant-a...,sk-ant-b..."
+    python maker_hanoi_20_disks.py --num-disks 20 --k 3 --parallelism 8 \
+        --backend anthropic:claude-3-5-haiku-latest:3:0.8:4 --backend anthropic:claude-sonnet-4-20250514:1
 """
 
 import os
+import re
 import sys
 import json
+import math
 import logging
 import argparse
 import random
-from typing import Any
+from typing import Any, Optional
 
 # add synqed to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../synqed-python/src"))
@@ -40,15 +91,33 @@ from synqed.mdap import (
     MdapExecutor,
     MdapConfig,
     ModelConfig,
-    RedFlagger,
     SynqedStepRunner,
     Voter,
     StepInput,
     StepOutput,
 )
-from synqed.mdap.execution import print_execution_summary
 from synqed.mdap.calibration import estimate_p_and_cost
 
+from mdap_calibration import estimate_p_and_cost_concurrent, stratified_sampler
+
+from mdap_simulation import SimulationParams, red_flag_profile, sweep
+from mdap_execution import (
+    ActionLog,
+    CheckpointingExecutor,
+    IntActionCodec,
+    PipelinedExecutor,
+    print_execution_summary,
+)
+from mdap_model_pool import ModelPool
+from mdap_red_flags import FastRedFlagger
+from mdap_step_runner import (
+    CachedStepRunner,
+    CachedStreamingStepRunner,
+    SqliteResponseCache,
+    StreamingStepRunner,
+)
+from mdap_voting import ParallelVoter
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -179,6 +248,10 @@ next_state = [[peg0_disks], [peg1_disks], [peg2_disks]]
     return prompt
 
 
+_MOVE_RE = re.compile(r"move\s*=\s*\[(\d+),\s*(\d+),\s*(\d+)\]", re.IGNORECASE)
+_NEXT_STATE_RE = re.compile(r"next_state\s*=\s*(\[.*\])", re.IGNORECASE | re.DOTALL)
+
+
 def parse_hanoi_response(raw_text: str) -> tuple[Any, Any]:
     """
     parse hanoi response into (action, next_state).
@@ -187,10 +260,8 @@ def parse_hanoi_response(raw_text: str) -> tuple[Any, Any]:
         move = [disk, from_peg, to_peg]
         next_state = [[...], [...], [...]]
     """
-    import re
-    
     # try to extract move
-    move_match = re.search(r"move\s*=\s*\[(\d+),\s*(\d+),\s*(\d+)\]", raw_text, re.IGNORECASE)
+    move_match = _MOVE_RE.search(raw_text)
     if not move_match:
         raise ValueError("move not found")
     
@@ -200,7 +271,7 @@ def parse_hanoi_response(raw_text: str) -> tuple[Any, Any]:
     action = [disk, from_peg, to_peg]
     
     # try to extract next_state
-    state_match = re.search(r"next_state\s*=\s*(\[.*\])", raw_text, re.IGNORECASE | re.DOTALL)
+    state_match = _NEXT_STATE_RE.search(raw_text)
     if not state_match:
         raise ValueError("next_state not found")
     
@@ -211,45 +282,77 @@ def parse_hanoi_response(raw_text: str) -> tuple[Any, Any]:
     return action, next_state
 
 
-def compute_hanoi_ground_truth(state: list[list[int]], num_disks: int) -> list[int]:
+# the required format opens with the move; a response that has not started it
+# after this many chars has drifted (used to abort streamed samples early)
+_MAX_PREAMBLE_CHARS = 400
+_MOVE_WORD_RE = re.compile(r"move", re.IGNORECASE)
+
+
+def hanoi_partial_check(text: str) -> Optional[str]:
+    """flag a (partial) response whose preamble is already too long."""
+    if len(text) > _MAX_PREAMBLE_CHARS and not _MOVE_WORD_RE.search(text, 0, _MAX_PREAMBLE_CHARS):
+        return "format_drift"
+    return None
+
+
+# shorter responses cannot have drifted yet: streaming skips the check for them
+hanoi_partial_check.safe_chars = _MAX_PREAMBLE_CHARS
+
+
+def hanoi_state_at_step(num_disks: int, step: int) -> list[list[int]]:
     """
-    compute the correct next move for hanoi given the strategy.
-    
-    this is used for calibration to determine p.
+    compute the state after `step` moves of the optimal solution (peg 0 -> peg 2).
+
+    runs in o(num_disks) instead of replaying the moves, so calibration can
+    sample states anywhere in a 2^20-step solution.
     """
-    # implement simple heuristic based on strategy
-    # (for calibration purposes; not optimal solver)
-    
-    # find which peg has disk 1
-    disk1_peg = None
-    for peg_idx, peg in enumerate(state):
-        if peg and peg[-1] == 1:
-            disk1_peg = peg_idx
-            break
-    
-    # move disk 1 clockwise: 0 -> 2 -> 1 -> 0
-    if disk1_peg is not None:
-        next_peg = (disk1_peg + 2) % 3
-        return [1, disk1_peg, next_peg]
-    
-    # otherwise, find the legal move not involving disk 1
-    # (simplified: just pick first legal move)
-    for from_peg_idx, from_peg in enumerate(state):
-        if not from_peg or from_peg[-1] == 1:
-            continue
-        
-        for to_peg_idx in range(3):
-            if to_peg_idx == from_peg_idx:
-                continue
-            
-            to_peg = state[to_peg_idx]
-            disk = from_peg[-1]
-            
-            if not to_peg or to_peg[-1] > disk:
-                return [disk, from_peg_idx, to_peg_idx]
-    
-    # no legal move found
-    return None
+    pegs = [[], [], []]
+    src, dst, aux = 0, 2, 1
+    for disk in range(num_disks, 0, -1):
+        half = 2 ** (disk - 1)
+        if step < half:
+            # disk has not moved yet; smaller disks are moving src -> aux
+            pegs[src].append(disk)
+            dst, aux = aux, dst
+        else:
+            # disk is on dst; smaller disks are moving aux -> dst
+            pegs[dst].append(disk)
+            step -= half
+            src, aux = aux, src
+    return pegs
+
+
+def build_hanoi_step_input(num_disks: int, step: int) -> StepInput:
+    """build the step input seen by the micro-agent at `step` of the optimal solution."""
+    state = hanoi_state_at_step(num_disks, step)
+    metadata = {}
+    if step > 0:
+        prev_state = hanoi_state_at_step(num_disks, step - 1)
+        for from_peg in range(3):
+            if len(prev_state[from_peg]) > len(state[from_peg]):
+                disk = prev_state[from_peg][-1]
+                to_peg = next(p for p in range(3) if state[p] and state[p][-1] == disk)
+                metadata["prev_move"] = [disk, from_peg, to_peg]
+    return StepInput(
+        step_index=step,
+        total_steps=2 ** num_disks - 1,
+        state=state,
+        metadata=metadata,
+    )
+
+
+def hanoi_move_at_step(num_disks: int, step: int) -> list[int]:
+    """
+    the move the optimal solution makes from the state after `step` moves.
+
+    this is the calibration ground truth for `build_hanoi_step_input(num_disks, step)`.
+    """
+    move = build_hanoi_step_input(num_disks, step + 1).metadata["prev_move"]
+    state = HanoiState.from_list(hanoi_state_at_step(num_disks, step))
+    state.move(*move)
+    if state.to_list() != hanoi_state_at_step(num_disks, step + 1):
+        raise RuntimeError(f"ground truth {move} at step {step} does not follow the optimal solution")
+    return move
 
 
 def hanoi_state_builder(state: list[list[int]]) -> dict:
@@ -281,6 +384,86 @@ def hanoi_validator(final_state: list[list[int]], actions: list[Any]) -> tuple[b
     return True, ""
 
 
+def build_red_flagger(args) -> FastRedFlagger:
+    """create the red-flagger; over-long outputs are rejected before parsing."""
+    return FastRedFlagger(
+        max_output_tokens=args.max_output_tokens,
+        required_fields=["action", "next_state"],
+        strict_format=True,
+        schema={"action": list, "next_state": list},
+        partial_validator=hanoi_partial_check if args.stream else None,
+    )
+
+
+def build_step_runner(args, **kwargs) -> Any:
+    """
+    create the step runner, backed by a response cache if --cache is set.
+
+    with --backend specs, returns a `ModelPool` with one runner per backend
+    and api key, all sharing the cache.
+    """
+    cache = SqliteResponseCache(args.cache) if args.cache else None
+    if not args.backend:
+        return _build_single_runner(args, cache, **kwargs)
+
+    base_config = kwargs.pop("model_config")
+    configs = []
+    for provider, model, weight, keys, prices in map(parse_backend, args.backend):
+        if prices is None and (provider, model) == (base_config.provider, base_config.model):
+            prices = (base_config.cost_per_input_token, base_config.cost_per_output_token)
+        elif prices is None:
+            # unknown: reported as such instead of at another model's prices
+            prices = (math.nan, math.nan)
+        for key in keys:
+            # a backend's weight is split evenly over its keys
+            update = {
+                "provider": provider,
+                "model": model,
+                "api_key": key,
+                "cost_per_input_token": prices[0],
+                "cost_per_output_token": prices[1],
+            }
+            configs.append((base_config.model_copy(update=update), weight / len(keys)))
+    return ModelPool.from_configs(
+        configs,
+        runner_factory=lambda model_config: _build_single_runner(args, cache, model_config=model_config, **kwargs),
+    )
+
+
+def _build_single_runner(args, cache: Optional[SqliteResponseCache], **kwargs) -> SynqedStepRunner:
+    if cache is not None:
+        runner_cls = CachedStreamingStepRunner if args.stream else CachedStepRunner
+        return runner_cls(cache=cache, **kwargs)
+    if args.stream:
+        return StreamingStepRunner(**kwargs)
+    return SynqedStepRunner(**kwargs)
+
+
+def parse_backend(spec: str) -> tuple[str, str, float, list[str], Optional[tuple[float, float]]]:
+    """
+    parse a "provider:model[:weight[:input_price:output_price]]" backend spec.
+
+    prices are in $ per 1M tokens and returned per token; without them a
+    backend is priced like --provider/--model if it is that model, and its
+    cost is unknown otherwise. api keys come from <PROVIDER>_API_KEYS
+    (comma-separated, one backend per key) or <PROVIDER>_API_KEY.
+    """
+    parts = spec.split(":")
+    if len(parts) not in (2, 3, 5) or parts[0] not in ("anthropic", "openai"):
+        raise argparse.ArgumentTypeError(
+            f"backend must be provider:model[:weight[:input_price:output_price]], got {spec!r}"
+        )
+    provider, model = parts[0], parts[1]
+    weight = float(parts[2]) if len(parts) >= 3 else 1.0
+    prices = (float(parts[3]) / 1e6, float(parts[4]) / 1e6) if len(parts) == 5 else None
+
+    env = provider.upper()
+    keys = [k.strip() for k in os.getenv(f"{env}_API_KEYS", "").split(",") if k.strip()]
+    if not keys:
+        keys = [os.getenv(f"{env}_API_KEY")]
+    return provider, model, weight, keys, prices
+
+
 # ============================================================================
 # calibration
 # ============================================================================
@@ -313,52 +496,70 @@ def run_calibration(args):
     )
     
     # setup red-flagger
-    red_flagger = RedFlagger(
-        max_output_tokens=args.max_output_tokens,
-        required_fields=["action", "next_state"],
-        strict_format=True,
-    )
+    red_flagger = build_red_flagger(args)
     
     # setup step runner
     system_prompt = generate_hanoi_strategy(args.num_disks)
-    step_runner = SynqedStepRunner(
+    step_runner = build_step_runner(
+        args,
         model_config=model_config,
         red_flagger=red_flagger,
         prompt_builder=build_hanoi_prompt,
-        response_parser=parse_hanoi_response,
+        response_parser=red_flagger.guard(parse_hanoi_response),
         system_prompt=system_prompt,
+        use_async=args.calibration_concurrency > 1,
     )
+    if isinstance(step_runner, ModelPool):
+        # samples are spread over the backends: price them at their weighted prices
+        model_config = step_runner.model_config
     
     # task sampler: generate random steps
-    def task_sampler(idx: int) -> StepInput:
-        # generate a random valid hanoi state
-        num_disks = args.num_disks
-        # simplified: just use a random step index
-        step_idx = random.randint(0, 2 ** num_disks - 2)
-        
-        # generate state (simplified: start from initial)
-        state = HanoiState(num_disks)
-        return StepInput(
-            step_index=step_idx,
-            total_steps=2 ** num_disks - 1,
-            state=state.to_list(),
-            metadata={},
+    total_steps = 2 ** args.num_disks - 1
+    
+    def random_step_sampler(idx: int) -> StepInput:
+        # a uniformly random step of the optimal solution, with the state reached there
+        return build_hanoi_step_input(args.num_disks, random.randrange(total_steps))
+    
+    if args.calibration_strata > 0:
+        task_sampler = stratified_sampler(
+            lambda step: build_hanoi_step_input(args.num_disks, step),
+            total_steps=total_steps,
+            num_strata=args.calibration_strata,
         )
+    else:
+        task_sampler = random_step_sampler
     
-    # ground truth function
+    # ground truth function: the optimal solution's next move, keyed by step
     def ground_truth_fn(step_input: StepInput) -> Any:
-        return compute_hanoi_ground_truth(step_input.state, args.num_disks)
+        return hanoi_move_at_step(args.num_disks, step_input.step_index)
     
     # run calibration
-    report = estimate_p_and_cost(
-        model_config=model_config,
-        task_sampler=task_sampler,
-        ground_truth_fn=ground_truth_fn,
-        step_runner=step_runner,
-        num_samples=args.calibration_samples,
-        target_success_prob=args.target_success_prob,
-        total_steps=2 ** args.num_disks - 1,
-    )
+    try:
+        if args.calibration_concurrency > 1:
+            report = estimate_p_and_cost_concurrent(
+                model_config=model_config,
+                task_sampler=task_sampler,
+                ground_truth_fn=ground_truth_fn,
+                step_runner=step_runner,
+                num_samples=args.calibration_samples,
+                target_success_prob=args.target_success_prob,
+                total_steps=total_steps,
+                concurrency=args.calibration_concurrency,
+                max_requests_per_second=args.calibration_rps,
+            )
+        else:
+            report = estimate_p_and_cost(
+                model_config=model_config,
+                task_sampler=task_sampler,
+                ground_truth_fn=ground_truth_fn,
+                step_runner=step_runner,
+                num_samples=args.calibration_samples,
+                target_success_prob=args.target_success_prob,
+                total_steps=total_steps,
+            )
+    finally:
+        if getattr(step_runner, "cache", None) is not None:
+            step_runner.cache.close()
     
     # print report
     print(f"\n{'='*60}")
@@ -367,12 +568,73 @@ def run_calibration(args):
     print(f"Model: {report.model_name}")
     print(f"Samples: {report.num_samples}")
     print(f"Per-step success rate p: {report.p_estimate:.4f} ± {report.p_std:.4f}")
+    if hasattr(report, "p_ci_low"):
+        print(f"{report.confidence:.0%} interval for p: [{report.p_ci_low:.4f}, {report.p_ci_high:.4f}]")
+        if report.stopped_early:
+            print(f"Stopped early: k recommendation stable across the interval")
     print(f"Avg input tokens: {report.avg_input_tokens:.1f}")
     print(f"Avg output tokens: {report.avg_output_tokens:.1f}")
-    print(f"Cost per sample: ${report.cost_per_sample:.6f}")
+    if math.isnan(report.cost_per_sample):
+        print("Cost per sample: unknown (set backend prices)")
+    else:
+        print(f"Cost per sample: ${report.cost_per_sample:.6f}")
     print(f"Recommended k: {report.k_min}")
-    print(f"Projected total cost: ${report.projected_cost:.2f}")
+    if not math.isnan(report.projected_cost):
+        print(f"Projected total cost: ${report.projected_cost:.2f}")
     print(f"Projected total samples: {report.projected_samples:,}")
+    reasons = ", ".join(f"{r}={n}" for r, n in red_flagger.stats.reasons.most_common())
+    print(f"Red-flagged: {red_flagger.stats.flagged} ({red_flagger.stats.flag_rate:.2%}){f' [{reasons}]' if reasons else ''}")
+    if getattr(step_runner, "cache", None) is not None:
+        print(f"Response cache: {step_runner.cache.stats.hits} hits, {step_runner.cache.stats.misses} misses")
+    print(f"{'='*60}\n")
+    if isinstance(step_runner, ModelPool):
+        step_runner.print_metrics()
+    
+    return report
+
+
+# ============================================================================
+# simulation
+# ============================================================================
+
+def run_simulation(args):
+    """project samples, cost and success probability for a sweep over k."""
+    total_steps = 2 ** args.num_disks - 1
+    voting = {
+        "max_votes": args.max_votes,
+        "max_samples": args.max_samples,
+        "first_to_k": args.first_to_k,
+    }
+    
+    profile = None
+    if args.sim_p is not None:
+        # known per-sample accuracy: no calibration, no api calls
+        params = SimulationParams(
+            p_valid=args.sim_p,
+            red_flag_rate=args.sim_red_flag_rate or 0.0,
+            cost_per_sample=args.sim_cost_per_sample,
+            **voting,
+        )
+    else:
+        report = run_calibration(args)
+        params = SimulationParams.from_calibration(report, red_flag_rate=args.sim_red_flag_rate, **voting)
+        samples = getattr(report, "samples", None)
+        if args.sim_red_flag_thresholds and samples:
+            profile = red_flag_profile(samples, args.sim_red_flag_thresholds)
+    
+    logger.info(f"simulating {total_steps:,} steps for k in {args.sim_k}...")
+    results = sweep(params, total_steps, ks=args.sim_k, red_flag_profile=profile)
+    
+    print(f"\n{'='*60}")
+    print(f"Simulation ({total_steps:,} steps, p_valid={params.p_valid:.4f}, red-flag rate={params.red_flag_rate:.2%})")
+    print(f"{'='*60}")
+    for result in results:
+        threshold = f"  max_tokens={result.red_flag_threshold}" if result.red_flag_threshold is not None else ""
+        print(
+            f"k={result.params.k}{threshold}  samples/step={result.avg_samples_per_step:.2f}  "
+            f"cost={'unknown' if math.isnan(result.projected_cost) else f'${result.projected_cost:,.2f}'}  "
+            f"P(success)={result.success_probability:.4f} (>= {result.success_probability_lower:.4f})"
+        )
     print(f"{'='*60}\n")
 
 
@@ -405,58 +667,100 @@ def run_full_task(args):
     )
     
     # setup red-flagger
-    red_flagger = RedFlagger(
-        max_output_tokens=args.max_output_tokens,
-        required_fields=["action", "next_state"],
-        strict_format=True,
-    )
+    red_flagger = build_red_flagger(args)
     
-    # setup step runner
+    # setup step runner (speculation needs the async parallel voter)
+    use_parallel_voter = args.parallelism > 1 or args.speculation_depth > 0
     system_prompt = generate_hanoi_strategy(num_disks)
-    step_runner = SynqedStepRunner(
+    step_runner = build_step_runner(
+        args,
         model_config=model_config,
         red_flagger=red_flagger,
         prompt_builder=build_hanoi_prompt,
-        response_parser=parse_hanoi_response,
+        response_parser=red_flagger.guard(parse_hanoi_response),
         system_prompt=system_prompt,
+        use_async=use_parallel_voter,
     )
     
     # setup voter
-    voter = Voter(
-        step_runner=step_runner,
-        red_flagger=red_flagger,
-        k=args.k,
-        max_votes=args.max_votes,
-        max_samples=args.max_samples,
-        first_to_k=args.first_to_k,
-    )
+    if use_parallel_voter:
+        voter = ParallelVoter(
+            step_runner=step_runner,
+            red_flagger=red_flagger,
+            k=args.k,
+            max_votes=args.max_votes,
+            max_samples=args.max_samples,
+            first_to_k=args.first_to_k,
+            parallelism=args.parallelism,
+        )
+    else:
+        voter = Voter(
+            step_runner=step_runner,
+            red_flagger=red_flagger,
+            k=args.k,
+            max_votes=args.max_votes,
+            max_samples=args.max_samples,
+            first_to_k=args.first_to_k,
+        )
     
     # setup executor
     mdap_config = MdapConfig(
         k=args.k,
         max_votes_per_step=args.max_votes,
         red_flag_max_output_tokens=args.max_output_tokens,
+        parallelism=args.parallelism,
     )
     
-    executor = MdapExecutor(
-        mdap_config=mdap_config,
-        voter=voter,
-        state_builder=hanoi_state_builder,
-        validator=hanoi_validator,
-    )
+    if args.checkpoint_dir or args.resume or args.compact_actions or args.speculation_depth:
+        executor_kwargs = dict(
+            mdap_config=mdap_config,
+            voter=voter,
+            state_builder=hanoi_state_builder,
+            validator=hanoi_validator,
+            checkpoint_dir=args.checkpoint_dir,
+            checkpoint_every=args.checkpoint_every,
+            # [disk, from_peg, to_peg] fits in 3 signed bytes per move
+            action_codec=IntActionCodec(width=3, typecode="b"),
+            compact_actions=args.compact_actions,
+            keep_step_outputs=not args.compact_actions,
+        )
+        if args.speculation_depth:
+            executor = PipelinedExecutor(
+                speculation_depth=args.speculation_depth,
+                speculation_margin=args.speculation_margin,
+                **executor_kwargs,
+            )
+        else:
+            executor = CheckpointingExecutor(**executor_kwargs)
+        run_kwargs = {"resume_from": args.resume}
+    else:
+        executor = MdapExecutor(
+            mdap_config=mdap_config,
+            voter=voter,
+            state_builder=hanoi_state_builder,
+            validator=hanoi_validator,
+        )
+        run_kwargs = {}
     
     # initial state
     initial_state = HanoiState(num_disks).to_list()
     
     # run task
-    result = executor.run_task(
-        initial_state=initial_state,
-        num_steps=total_steps,
-        verbose=True,
-    )
+    try:
+        result = executor.run_task(
+            initial_state=initial_state,
+            num_steps=total_steps,
+            verbose=True,
+            **run_kwargs,
+        )
+    finally:
+        if isinstance(voter, ParallelVoter):
+            voter.close()
+        if getattr(step_runner, "cache", None) is not None:
+            step_runner.cache.close()
     
     # print summary
-    print_execution_summary(result)
+    print_execution_summary(result, step_runner=step_runner)
     
     # save results
     if args.output:
@@ -465,11 +769,32 @@ def run_full_task(args):
             "total_steps": total_steps,
             "k": args.k,
             "success": result.success,
-            "actions": result.actions,
             "total_samples": result.total_samples,
             "total_valid_samples": result.total_valid_samples,
             "total_red_flagged": result.total_red_flagged,
         }
+        
+        # stream actions to a side file instead of building one huge json list
+        actions = result.actions
+        if args.actions_format == "json":
+            output_data["actions"] = actions.tolist() if isinstance(actions, ActionLog) else actions
+        else:
+            if not isinstance(actions, ActionLog):
+                actions = ActionLog(width=3, typecode="b")
+                for action in result.actions:
+                    actions.append(action)
+            if args.actions_format == "binary":
+                actions_path = f"{args.output}.actions.bin"
+                with open(actions_path, "wb") as f:
+                    actions.write_binary(f)
+                output_data["actions_encoding"] = {"width": 3, "typecode": "b"}
+            else:
+                actions_path = f"{args.output}.actions.ndjson"
+                with open(actions_path, "w") as f:
+                    actions.write_ndjson(f)
+            output_data["actions_file"] = actions_path
+            output_data["num_actions"] = len(actions)
+        
         with open(args.output, "w") as f:
             json.dump(output_data, f, indent=2)
         logger.info(f"results saved to {args.output}")
@@ -479,6 +804,11 @@ def run_full_task(args):
 # main
 # ============================================================================
 
+def int_list(value: str) -> list[int]:
+    """parse a comma-separated list of ints."""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="towers of hanoi with maker/mdap (uses anthropic claude by default)"
@@ -490,22 +820,62 @@ def main():
     parser.add_argument("--max-samples", type=int, default=100, help="max samples per step")
     parser.add_argument("--max-output-tokens", type=int, default=750, help="max output tokens")
     parser.add_argument("--first-to-k", action="store_true", help="use first-to-k instead of first-to-ahead-by-k")
+    parser.add_argument("--parallelism", type=int, default=1, help="max concurrent samples per step (1 = sequential voting)")
+    parser.add_argument("--speculation-depth", type=int, default=0,
+                        help="vote on up to N steps ahead of the last decided one (0 = off)")
+    parser.add_argument("--speculation-margin", type=int, default=1,
+                        help="speculate once the leader is within N votes of winning")
     
     parser.add_argument("--calibrate", action="store_true", help="run calibration only")
     parser.add_argument("--calibration-samples", type=int, default=1000, help="calibration samples")
     parser.add_argument("--target-success-prob", type=float, default=0.95, help="target success probability")
+    parser.add_argument("--calibration-concurrency", type=int, default=1, help="concurrent calibration samples")
+    parser.add_argument("--calibration-rps", type=float, help="max calibration requests per second")
+    parser.add_argument("--calibration-strata", type=int, default=0,
+                        help="sample states from N strata of the solution (0 = uniformly random steps)")
+    
+    parser.add_argument("--simulate", action="store_true", help="project cost/success with a monte-carlo sweep")
+    parser.add_argument("--sim-p", type=float, help="per-sample accuracy to simulate (skips calibration)")
+    parser.add_argument("--sim-red-flag-rate", type=float, help="red-flag rate to simulate")
+    parser.add_argument("--sim-cost-per-sample", type=float, default=0.0, help="cost per sample with --sim-p")
+    parser.add_argument("--sim-k", type=int_list, default=[1, 2, 3, 4, 5, 6], help="comma-separated k values")
+    parser.add_argument("--sim-red-flag-thresholds", type=int_list,
+                        help="comma-separated max output lengths to sweep (needs calibration samples)")
     
     parser.add_argument("--output", type=str, help="output file for results")
+    parser.add_argument("--cache", type=str, help="sqlite file caching llm completions across runs")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream completions and abort samples as soon as they are red-flagged")
+    parser.add_argument("--actions-format", type=str, default="json", choices=["json", "ndjson", "binary"],
+                        help="how --output stores moves (ndjson/binary write a side file)")
+    parser.add_argument("--compact-actions", action="store_true",
+                        help="keep moves in an array-backed log instead of python lists")
+    parser.add_argument("--checkpoint-dir", type=str, help="directory for periodic checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="steps between checkpoints")
+    parser.add_argument("--resume", type=str, help="checkpoint directory to resume from")
     
     # provider selection
     parser.add_argument("--provider", type=str, default="anthropic", choices=["anthropic", "openai"], 
                         help="llm provider (default: anthropic)")
     parser.add_argument("--model", type=str, help="model name (overrides default for provider)")
+    parser.add_argument("--backend", type=str, action="append",
+                        help="provider:model[:weight[:input_price:output_price]], prices in $ per 1M "
+                             "tokens; repeat to pool keys/providers/models "
+                             "(keys from <PROVIDER>_API_KEYS, comma-separated)")
     
     args = parser.parse_args()
     
+    if args.simulate and args.sim_p is not None:
+        run_simulation(args)
+        return
+    
     # check api key
-    if args.provider == "anthropic":
+    if args.backend:
+        for provider, _, _, keys, _ in map(parse_backend, args.backend):
+            if not all(keys):
+                print(f"❌ {provider.upper()}_API_KEYS / {provider.upper()}_API_KEY not set!")
+                sys.exit(1)
+    elif args.provider == "anthropic":
         if not os.getenv("ANTHROPIC_API_KEY"):
             print("❌ ANTHROPIC_API_KEY not set!")
             print("   export ANTHROPIC_API_KEY='sk-ant-...'")
@@ -516,7 +886,9 @@ def main():
             print("   export OPENAI_API_KEY='sk-...'")
             sys.exit(1)
     
-    if args.calibrate:
+    if args.simulate:
+        run_simulation(args)
+    elif args.calibrate:
         run_calibration(args)
     else:
         run_full_task(args)
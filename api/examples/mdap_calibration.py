@@ -0,0 +1,399 @@
+"""
+concurrent, stratified calibration for the maker/mdap demos.
+
+`synqed.mdap.calibration.estimate_p_and_cost` evaluates its samples one after
+another. `estimate_p_and_cost_concurrent` computes the same report while:
+- running up to `concurrency` samples at once under an optional request-rate
+  limit.
+- streaming a wilson confidence interval for p as results arrive.
+- stopping early once k_min is the same at both ends of the interval, i.e.
+  more samples would not change the recommendation.
+
+`stratified_sampler` wraps a per-step-index input builder so calibration
+samples are spread evenly across the task instead of all starting from the
+initial state.
+
+usage:
+    report = estimate_p_and_cost_concurrent(
+        model_config=model_config,
+        task_sampler=stratified_sampler(build_input, total_steps, num_strata=20),
+        ground_truth_fn=ground_truth_fn,
+        step_runner=step_runner,
+        num_samples=1000,
+        concurrency=16,
+        max_requests_per_second=10,
+    )
+    print(report.p_ci_low, report.p_ci_high, report.stopped_early)
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import asyncio
+import logging
+from statistics import NormalDist
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional, Callable
+
+from synqed.mdap import (
+    CalibrationReport,
+    ModelConfig,
+    StepInput,
+    choose_k_for_target_success,
+    compute_expected_cost,
+)
+from synqed.mdap.calibration import _compare_actions, compute_expected_samples
+
+from mdap_step_runner import RateLimiter, sample_async
+
+logger = logging.getLogger(__name__)
+
+# k reported by choose_k_for_target_success when p <= 0.5
+_K_INFEASIBLE = 1000
+
+
+@dataclass
+class CalibrationProgress:
+    """
+    running calibration estimate, emitted as samples stream in.
+
+    attributes:
+        num_samples: samples evaluated so far.
+        correct: samples whose action matched the ground truth.
+        p_estimate: correct / num_samples.
+        p_ci_low: lower bound of the wilson interval for p.
+        p_ci_high: upper bound of the wilson interval for p.
+        k_min: recommended k at p_estimate.
+        k_at_ci_low: recommended k at the pessimistic end of the interval.
+        k_at_ci_high: recommended k at the optimistic end of the interval.
+    """
+    num_samples: int
+    correct: int
+    p_estimate: float
+    p_ci_low: float
+    p_ci_high: float
+    k_min: int
+    k_at_ci_low: int
+    k_at_ci_high: int
+
+    @property
+    def k_stable(self) -> bool:
+        """whether the whole confidence interval recommends the same k."""
+        return self.k_at_ci_low == self.k_at_ci_high
+
+    def __repr__(self) -> str:
+        return (
+            f"CalibrationProgress(n={self.num_samples}, p={self.p_estimate:.4f} "
+            f"[{self.p_ci_low:.4f}, {self.p_ci_high:.4f}], "
+            f"k={self.k_min} [{self.k_at_ci_high}, {self.k_at_ci_low}])"
+        )
+
+
+@dataclass
+class CalibrationSample:
+    """
+    outcome of a single calibration sample.
+
+    attributes:
+        tokens_output: output tokens generated.
+        valid: whether the sample passed red-flagging.
+        format_ok: whether the only red flag (if any) was output length, i.e.
+            the sample would be valid under a looser length threshold.
+        correct: whether the parsed action matched the ground truth.
+    """
+    tokens_output: int
+    valid: bool
+    format_ok: bool
+    correct: bool
+
+
+@dataclass(repr=False)
+class StreamingCalibrationReport(CalibrationReport):
+    """
+    calibration report with confidence interval and early-stop information.
+
+    attributes:
+        p_ci_low: lower bound of the wilson interval for p.
+        p_ci_high: upper bound of the wilson interval for p.
+        confidence: confidence level of the interval.
+        stopped_early: whether calibration stopped before num_samples.
+        k_stable: whether both interval ends recommend k_min.
+        samples: per-sample outcomes (used by mdap_simulation to sweep
+            red-flag thresholds).
+    """
+    p_ci_low: float = 0.0
+    p_ci_high: float = 0.0
+    confidence: float = 0.95
+    stopped_early: bool = False
+    k_stable: bool = False
+    samples: list[CalibrationSample] = field(default_factory=list)
+
+
+def wilson_interval(successes: int, n: int, confidence: float = 0.95) -> tuple[float, float]:
+    """
+    wilson score interval for a binomial proportion.
+
+    behaves well near p=1, where the normal approximation used for p_std
+    collapses to zero width.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def stratified_sampler(
+    build_step_input: Callable[[int], StepInput],
+    total_steps: int,
+    num_strata: int = 10,
+    seed: Optional[int] = None,
+) -> Callable[[int], StepInput]:
+    """
+    build a task sampler that spreads samples evenly across step indices.
+
+    the step range is split into `num_strata` equal bins; sample i is drawn
+    uniformly from bin i % num_strata, so every part of the task is covered
+    after any `num_strata` consecutive samples.
+
+    args:
+        build_step_input: function that builds the step input for a given step index.
+        total_steps: total number of steps in the task.
+        num_strata: number of equal-width bins over [0, total_steps).
+        seed: optional seed for reproducible step selection.
+
+    returns:
+        task sampler compatible with `estimate_p_and_cost`.
+    """
+    num_strata = max(1, min(num_strata, total_steps))
+    rng = random.Random(seed)
+
+    def task_sampler(idx: int) -> StepInput:
+        stratum = idx % num_strata
+        low = stratum * total_steps // num_strata
+        high = (stratum + 1) * total_steps // num_strata
+        return build_step_input(rng.randrange(low, high))
+
+    return task_sampler
+
+
+def estimate_p_and_cost_concurrent(
+    model_config: ModelConfig,
+    task_sampler: Callable[[int], StepInput],
+    ground_truth_fn: Callable[[StepInput], Any],
+    step_runner: Any,
+    num_samples: int = 1000,
+    target_success_prob: float = 0.95,
+    total_steps: int = 1_000_000,
+    concurrency: int = 8,
+    max_requests_per_second: Optional[float] = None,
+    confidence: float = 0.95,
+    min_samples: int = 100,
+    early_stop: bool = True,
+    report_every: int = 50,
+    on_progress: Optional[Callable[[CalibrationProgress], None]] = None,
+) -> StreamingCalibrationReport:
+    """
+    estimate p and projected cost with concurrent sampling (sync entry point).
+
+    same estimates as `estimate_p_and_cost` (red-flagged samples count as
+    incorrect), plus a confidence interval and an early-stop rule.
+
+    args:
+        model_config: model configuration with cost parameters.
+        task_sampler: function that generates a step input given an index.
+        ground_truth_fn: function that returns the correct action for a step input.
+        step_runner: step runner to sample outputs.
+        num_samples: maximum number of steps to sample.
+        target_success_prob: target probability of full task success.
+        total_steps: total number of steps in the full task.
+        concurrency: maximum number of samples in flight.
+        max_requests_per_second: optional cap on request starts per second.
+        confidence: confidence level for the interval on p.
+        min_samples: never stop early before this many samples.
+        early_stop: stop once k_min is the same across the whole interval.
+        report_every: emit progress every this many samples.
+        on_progress: optional callback receiving calibrationprogress.
+
+    returns:
+        streamingcalibrationreport.
+    """
+    return asyncio.run(estimate_p_and_cost_concurrent_async(
+        model_config=model_config,
+        task_sampler=task_sampler,
+        ground_truth_fn=ground_truth_fn,
+        step_runner=step_runner,
+        num_samples=num_samples,
+        target_success_prob=target_success_prob,
+        total_steps=total_steps,
+        concurrency=concurrency,
+        max_requests_per_second=max_requests_per_second,
+        confidence=confidence,
+        min_samples=min_samples,
+        early_stop=early_stop,
+        report_every=report_every,
+        on_progress=on_progress,
+    ))
+
+
+async def estimate_p_and_cost_concurrent_async(
+    model_config: ModelConfig,
+    task_sampler: Callable[[int], StepInput],
+    ground_truth_fn: Callable[[StepInput], Any],
+    step_runner: Any,
+    num_samples: int = 1000,
+    target_success_prob: float = 0.95,
+    total_steps: int = 1_000_000,
+    concurrency: int = 8,
+    max_requests_per_second: Optional[float] = None,
+    confidence: float = 0.95,
+    min_samples: int = 100,
+    early_stop: bool = True,
+    report_every: int = 50,
+    on_progress: Optional[Callable[[CalibrationProgress], None]] = None,
+) -> StreamingCalibrationReport:
+    """async version of `estimate_p_and_cost_concurrent`."""
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+
+    logger.info(
+        f"calibrating {model_config.model} on up to {num_samples} samples "
+        f"(concurrency={concurrency}, target_p={target_success_prob}, total_steps={total_steps})"
+    )
+
+    limiter = RateLimiter(max_requests_per_second) if max_requests_per_second else None
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mdap-calibrate")
+
+    async def evaluate(idx: int) -> tuple[CalibrationSample, int]:
+        step_input = task_sampler(idx)
+        if limiter is not None:
+            await limiter.acquire()
+        output = await sample_async(step_runner, step_input, executor)
+        sample = CalibrationSample(
+            tokens_output=output.tokens_output,
+            valid=output.valid,
+            format_ok=output.action is not None and all(
+                flag.startswith("too_long") for flag in output.red_flags
+            ),
+            correct=output.action is not None and _compare_actions(output.action, ground_truth_fn(step_input)),
+        )
+        return sample, output.tokens_input
+
+    def k_for(p: float) -> int:
+        # choose_k_for_target_success warns on every call with p <= 0.5
+        if p <= 0.5:
+            return _K_INFEASIBLE
+        if p >= 1.0:
+            return 1
+        return choose_k_for_target_success(p=p, s=total_steps, target_success_prob=target_success_prob, m=1)
+
+    def progress() -> CalibrationProgress:
+        p = correct_count / evaluated
+        ci_low, ci_high = wilson_interval(correct_count, evaluated, confidence)
+        return CalibrationProgress(
+            num_samples=evaluated,
+            correct=correct_count,
+            p_estimate=p,
+            p_ci_low=ci_low,
+            p_ci_high=ci_high,
+            k_min=k_for(p),
+            k_at_ci_low=k_for(ci_low),
+            k_at_ci_high=k_for(ci_high),
+        )
+
+    samples: list[CalibrationSample] = []
+    correct_count = 0
+    evaluated = 0
+    total_input_tokens = 0
+    total_output_tokens = 0
+    next_index = 0
+    stopped_early = False
+    pending: set[asyncio.Future] = set()
+
+    try:
+        while True:
+            while not stopped_early and next_index < num_samples and len(pending) < concurrency:
+                pending.add(asyncio.ensure_future(evaluate(next_index)))
+                next_index += 1
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                sample, tokens_input = task.result()
+                samples.append(sample)
+                evaluated += 1
+
+                # only valid samples count, as in estimate_p_and_cost
+                if sample.valid:
+                    correct_count += int(sample.correct)
+                    total_input_tokens += tokens_input
+                    total_output_tokens += sample.tokens_output
+
+                if evaluated % report_every == 0:
+                    current = progress()
+                    logger.info(f"calibration progress: {current}")
+                    if on_progress is not None:
+                        on_progress(current)
+
+                if early_stop and not stopped_early and min_samples <= evaluated < num_samples:
+                    current = progress()
+                    if current.k_stable and current.k_min != _K_INFEASIBLE:
+                        logger.info(f"k recommendation stable after {evaluated} samples: {current}")
+                        stopped_early = True
+
+            if stopped_early:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if evaluated == 0:
+        raise RuntimeError("calibration produced no samples")
+
+    final = progress()
+    p_estimate = final.p_estimate
+    p_std = math.sqrt(p_estimate * (1 - p_estimate) / evaluated)
+
+    avg_input_tokens = total_input_tokens / evaluated
+    avg_output_tokens = total_output_tokens / evaluated
+    cost_per_sample = (
+        avg_input_tokens * model_config.cost_per_input_token +
+        avg_output_tokens * model_config.cost_per_output_token
+    )
+
+    k_min = final.k_min
+    report = StreamingCalibrationReport(
+        model_name=model_config.model,
+        num_samples=evaluated,
+        p_estimate=p_estimate,
+        p_std=p_std,
+        avg_input_tokens=avg_input_tokens,
+        avg_output_tokens=avg_output_tokens,
+        cost_per_sample=cost_per_sample,
+        k_min=k_min,
+        projected_cost=compute_expected_cost(p=p_estimate, k=k_min, s=total_steps, c=cost_per_sample, m=1),
+        projected_samples=compute_expected_samples(p=p_estimate, k=k_min, s=total_steps, m=1),
+        p_ci_low=final.p_ci_low,
+        p_ci_high=final.p_ci_high,
+        confidence=confidence,
+        stopped_early=stopped_early,
+        k_stable=final.k_stable,
+        samples=samples,
+    )
+
+    logger.info(f"calibration complete: {report}")
+    return report
+
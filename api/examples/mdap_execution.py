@@ -0,0 +1,872 @@
+"""
+execution helpers for the maker/mdap demos.
+
+extends `synqed.mdap.execution` with:
+- compact action storage: `ActionLog` keeps fixed-width int actions in a flat
+  `array` instead of one python list per step (~3 bytes vs ~150 per hanoi move).
+- checkpointing: `CheckpointingExecutor` appends every committed step to a
+  compact on-disk log and periodically snapshots the loop state, so a crashed
+  million-step run can restart with `run_task(..., resume_from=path)`.
+- speculative pipelining: `PipelinedExecutor` starts voting on the next steps
+  from the current leader's next_state before a step is decided, keeping the
+  model endpoint busy across step boundaries.
+- reporting for the demo-side voting extensions (see mdap_voting.py).
+
+checkpoint layout (one directory per run):
+- actions.bin: append-only encoded actions (see `IntActionCodec`).
+- votes.bin: append-only fixed-size voting counters, one record per step.
+- checkpoint.json: last committed snapshot (state, totals, file offsets).
+  anything appended after the offsets in the snapshot is discarded on resume.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import asyncio
+import struct
+import logging
+from array import array
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Callable, TextIO
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from synqed.mdap import MdapConfig, StepInput, StepOutput, Voter, VotingResult, VotingStats
+from synqed.mdap.execution import ExecutionResult, MdapExecutor
+from synqed.mdap.execution import print_execution_summary as _print_base_summary
+
+from mdap_voting import ParallelVotingStats
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# action storage and encoding
+# ============================================================================
+
+class ActionLog(Sequence):
+    """
+    array-backed sequence of fixed-width int actions.
+
+    behaves like a read-only list of `[int, ...]` actions (indexing, slicing,
+    iteration, len), so validators such as `hanoi_validator` work unchanged,
+    but stores all values in one flat `array` of the given typecode.
+
+    usage:
+        actions = ActionLog(width=3, typecode="b")
+        actions.append([1, 0, 2])
+        actions[-1]  # [1, 0, 2]
+
+        with open("actions.bin", "wb") as f:
+            actions.write_binary(f)
+    """
+
+    __slots__ = ("width", "typecode", "_values")
+
+    def __init__(self, width: int, typecode: str = "i", values: Optional[array] = None):
+        if values is not None and values.typecode != typecode:
+            raise ValueError(f"expected array of typecode {typecode!r}, got {values.typecode!r}")
+        self.width = width
+        self.typecode = typecode
+        self._values = values if values is not None else array(typecode)
+
+    def append(self, action: Any) -> None:
+        """append a single action."""
+        if len(action) != self.width:
+            raise ValueError(f"expected action of width {self.width}, got {action!r}")
+        self._values.extend(action)
+
+    def __len__(self) -> int:
+        return len(self._values) // self.width
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("action index out of range")
+        start = index * self.width
+        return self._values[start:start + self.width].tolist()
+
+    def __iter__(self) -> Iterator[list[int]]:
+        values = self._values
+        width = self.width
+        for start in range(0, len(values), width):
+            yield values[start:start + width].tolist()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ActionLog):
+            return self.width == other.width and self._values == other._values
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == list(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    @property
+    def nbytes(self) -> int:
+        """memory used by the stored values."""
+        return len(self._values) * self._values.itemsize
+
+    def tolist(self) -> list[list[int]]:
+        """materialize as a plain list of lists (e.g. for json.dump)."""
+        return list(self)
+
+    def write_binary(self, f: BinaryIO) -> None:
+        """write all actions as packed native-endian values (same layout as `IntActionCodec`)."""
+        self._values.tofile(f)
+
+    def write_ndjson(self, f: TextIO) -> None:
+        """stream all actions as newline-delimited json, one action per line."""
+        for action in self:
+            f.write(json.dumps(action, separators=(",", ":")))
+            f.write("\n")
+
+    @classmethod
+    def from_bytes(cls, data: bytes, width: int, typecode: str = "i") -> "ActionLog":
+        """build a log from packed values written by `write_binary`."""
+        values = array(typecode)
+        values.frombytes(data)
+        if len(values) % width:
+            raise ValueError(f"buffer holds {len(values)} values, not a multiple of width {width}")
+        return cls(width=width, typecode=typecode, values=values)
+
+    def __repr__(self) -> str:
+        return f"ActionLog(len={len(self)}, width={self.width}, typecode={self.typecode!r})"
+
+
+class IntActionCodec:
+    """
+    fixed-width binary encoding for actions that are short int sequences.
+
+    each action is stored as `width` values of the given array typecode, e.g.
+    hanoi's [disk, from_peg, to_peg] fits in 3 bytes with typecode "b".
+    """
+
+    def __init__(self, width: int, typecode: str = "i"):
+        self.width = width
+        self.typecode = typecode
+
+    def encode(self, action: Any) -> bytes:
+        """encode a single action."""
+        if len(action) != self.width:
+            raise ValueError(f"expected action of width {self.width}, got {action!r}")
+        return array(self.typecode, action).tobytes()
+
+    def decode_all(self, data: bytes) -> ActionLog:
+        """decode a buffer of concatenated actions."""
+        return ActionLog.from_bytes(data, width=self.width, typecode=self.typecode)
+
+    def new_log(self) -> ActionLog:
+        """create an empty compact action store matching this encoding."""
+        return ActionLog(width=self.width, typecode=self.typecode)
+
+    def describe(self) -> dict[str, Any]:
+        return {"type": "int", "width": self.width, "typecode": self.typecode}
+
+
+class JsonActionCodec:
+    """newline-delimited json encoding for arbitrary json-serializable actions."""
+
+    def encode(self, action: Any) -> bytes:
+        return (json.dumps(action, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def decode_all(self, data: bytes) -> list[Any]:
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def describe(self) -> dict[str, Any]:
+        return {"type": "json"}
+
+
+# ============================================================================
+# checkpoint files
+# ============================================================================
+
+ACTIONS_FILE = "actions.bin"
+VOTES_FILE = "votes.bin"
+SNAPSHOT_FILE = "checkpoint.json"
+
+# step_index, total_samples, valid_samples, red_flagged_samples,
+# winner_votes, runnerup_votes, rounds_to_decide
+_VOTE_RECORD = struct.Struct("<7I")
+
+
+@dataclass
+class CheckpointData:
+    """
+    contents of a checkpoint directory, truncated to the last snapshot.
+
+    attributes:
+        steps_completed: number of steps committed in the snapshot.
+        num_steps: total number of steps of the task.
+        initial_state: initial task state.
+        state: task state after `steps_completed` steps.
+        actions: committed actions, in step order.
+        voting_stats: per-step voting counters (vote_counts is not persisted).
+        total_samples: total llm calls so far (including red-flagged).
+        total_valid_samples: total valid llm calls so far.
+        total_red_flagged: total red-flagged samples so far.
+    """
+    steps_completed: int
+    num_steps: int
+    initial_state: Any
+    state: Any
+    actions: list[Any] = field(default_factory=list)
+    voting_stats: list[VotingStats] = field(default_factory=list)
+    total_samples: int = 0
+    total_valid_samples: int = 0
+    total_red_flagged: int = 0
+    actions_offset: int = 0
+    votes_offset: int = 0
+
+
+def load_checkpoint(
+    directory: str | Path,
+    action_codec: Optional[Any] = None,
+) -> CheckpointData:
+    """
+    load a checkpoint directory written by `CheckpointWriter`.
+
+    args:
+        directory: checkpoint directory.
+        action_codec: codec used to write actions (default: json lines).
+
+    returns:
+        checkpointdata truncated to the last committed snapshot.
+    """
+    directory = Path(directory)
+    action_codec = action_codec or JsonActionCodec()
+
+    with open(directory / SNAPSHOT_FILE, "r") as f:
+        snapshot = json.load(f)
+
+    if snapshot.get("codec") != action_codec.describe():
+        raise ValueError(
+            f"checkpoint was written with action codec {snapshot.get('codec')}, "
+            f"got {action_codec.describe()}"
+        )
+
+    with open(directory / ACTIONS_FILE, "rb") as f:
+        actions = action_codec.decode_all(f.read(snapshot["actions_offset"]))
+
+    voting_stats = []
+    with open(directory / VOTES_FILE, "rb") as f:
+        data = f.read(snapshot["votes_offset"])
+    for (step_index, total, valid, red_flagged, winner, runnerup, rounds) in _VOTE_RECORD.iter_unpack(data):
+        voting_stats.append(VotingStats(
+            step_index=step_index,
+            total_samples=total,
+            valid_samples=valid,
+            red_flagged_samples=red_flagged,
+            winner_votes=winner,
+            runnerup_votes=runnerup,
+            rounds_to_decide=rounds,
+        ))
+
+    steps_completed = snapshot["steps_completed"]
+    if len(actions) != steps_completed or len(voting_stats) != steps_completed:
+        raise ValueError(
+            f"corrupt checkpoint in {directory}: snapshot has {steps_completed} steps, "
+            f"log has {len(actions)} actions and {len(voting_stats)} vote records"
+        )
+
+    return CheckpointData(
+        steps_completed=steps_completed,
+        num_steps=snapshot["num_steps"],
+        initial_state=snapshot["initial_state"],
+        state=snapshot["state"],
+        actions=actions,
+        voting_stats=voting_stats,
+        total_samples=snapshot["total_samples"],
+        total_valid_samples=snapshot["total_valid_samples"],
+        total_red_flagged=snapshot["total_red_flagged"],
+        actions_offset=snapshot["actions_offset"],
+        votes_offset=snapshot["votes_offset"],
+    )
+
+
+class CheckpointWriter:
+    """
+    append-only checkpoint writer.
+
+    `append` only writes into buffered files; `commit` flushes, fsyncs both
+    logs and atomically replaces the snapshot. calling `commit` every few
+    hundred steps keeps the step loop free of per-step syscalls.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        action_codec: Optional[Any] = None,
+        resume: Optional[CheckpointData] = None,
+    ):
+        """
+        open a checkpoint directory for appending.
+
+        args:
+            directory: checkpoint directory (created if missing).
+            action_codec: codec used to encode actions (default: json lines).
+            resume: loaded checkpoint to continue; the logs are truncated to
+                its offsets. if none, any existing checkpoint is overwritten.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.action_codec = action_codec or JsonActionCodec()
+
+        actions_path = self.directory / ACTIONS_FILE
+        votes_path = self.directory / VOTES_FILE
+
+        if resume is not None:
+            # drop records appended after the last committed snapshot
+            os.truncate(actions_path, resume.actions_offset)
+            os.truncate(votes_path, resume.votes_offset)
+            self._actions = open(actions_path, "ab")
+            self._votes = open(votes_path, "ab")
+        else:
+            self._actions = open(actions_path, "wb")
+            self._votes = open(votes_path, "wb")
+
+    def append(self, action: Any, stats: VotingStats) -> None:
+        """append one committed step (buffered, not yet durable)."""
+        self._actions.write(self.action_codec.encode(action))
+        self._votes.write(_VOTE_RECORD.pack(
+            stats.step_index,
+            stats.total_samples,
+            stats.valid_samples,
+            stats.red_flagged_samples,
+            stats.winner_votes,
+            stats.runnerup_votes,
+            stats.rounds_to_decide,
+        ))
+
+    def commit(
+        self,
+        steps_completed: int,
+        num_steps: int,
+        initial_state: Any,
+        state: Any,
+        total_samples: int,
+        total_valid_samples: int,
+        total_red_flagged: int,
+    ) -> None:
+        """make everything appended so far durable and write a new snapshot."""
+        for f in (self._actions, self._votes):
+            f.flush()
+            os.fsync(f.fileno())
+
+        snapshot = {
+            "version": 1,
+            "steps_completed": steps_completed,
+            "num_steps": num_steps,
+            "initial_state": initial_state,
+            "state": state,
+            "total_samples": total_samples,
+            "total_valid_samples": total_valid_samples,
+            "total_red_flagged": total_red_flagged,
+            "actions_offset": self._actions.tell(),
+            "votes_offset": self._votes.tell(),
+            "codec": self.action_codec.describe(),
+        }
+
+        tmp_path = self.directory / (SNAPSHOT_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.directory / SNAPSHOT_FILE)
+
+    def close(self) -> None:
+        self._actions.close()
+        self._votes.close()
+
+
+# ============================================================================
+# checkpointing executor
+# ============================================================================
+
+class CheckpointingExecutor(MdapExecutor):
+    """
+    mdap executor that checkpoints progress and can resume mid-run.
+
+    usage:
+        executor = CheckpointingExecutor(
+            mdap_config=mdap_config,
+            voter=voter,
+            checkpoint_dir="runs/hanoi-20",
+            checkpoint_every=1000,
+            action_codec=IntActionCodec(width=3, typecode="b"),
+        )
+
+        # fresh run
+        result = executor.run_task(initial_state=..., num_steps=1_048_575)
+
+        # after a crash: continue from the last snapshot
+        result = executor.run_task(
+            initial_state=...,
+            num_steps=1_048_575,
+            resume_from="runs/hanoi-20",
+        )
+
+    task state must be json-serializable. step_outputs only covers the steps
+    executed in the current process (raw llm text is not checkpointed).
+    """
+
+    def __init__(
+        self,
+        mdap_config: MdapConfig,
+        voter: Voter,
+        state_builder: Optional[Callable[[Any], dict]] = None,
+        validator: Optional[Callable[[Any, list[Any]], tuple[bool, str]]] = None,
+        checkpoint_dir: Optional[str | Path] = None,
+        checkpoint_every: int = 1000,
+        action_codec: Optional[Any] = None,
+        compact_actions: bool = False,
+        keep_step_outputs: bool = True,
+    ):
+        """
+        initialize checkpointing executor.
+
+        args:
+            mdap_config: mdap configuration (k, thresholds, etc.).
+            voter: voter for first-to-ahead-by-k voting.
+            state_builder: optional function to build metadata dict from current state.
+            validator: optional function to validate final result (state, actions) -> (is_valid, message).
+            checkpoint_dir: directory for checkpoint files (none disables checkpointing).
+            checkpoint_every: number of steps between durable snapshots.
+            action_codec: action encoding for the log (default: json lines).
+            compact_actions: store result.actions in an `ActionLog` built by
+                `action_codec.new_log()` (requires an `IntActionCodec`).
+            keep_step_outputs: whether to keep every winning stepoutput (with
+                its raw llm text) in result.step_outputs.
+        """
+        super().__init__(
+            mdap_config=mdap_config,
+            voter=voter,
+            state_builder=state_builder,
+            validator=validator,
+        )
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every must be >= 1, got {checkpoint_every}")
+
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.checkpoint_every = checkpoint_every
+        self.action_codec = action_codec or JsonActionCodec()
+        self.keep_step_outputs = keep_step_outputs
+
+        if compact_actions and not hasattr(self.action_codec, "new_log"):
+            raise ValueError("compact_actions requires an IntActionCodec")
+        self.compact_actions = compact_actions
+
+    def run_task(
+        self,
+        initial_state: Any,
+        num_steps: int,
+        verbose: bool = True,
+        resume_from: Optional[str | Path] = None,
+    ) -> ExecutionResult:
+        """
+        run the full task, checkpointing every `checkpoint_every` steps.
+
+        args:
+            initial_state: initial task state (ignored when resuming).
+            num_steps: total number of steps to execute.
+            verbose: whether to log progress.
+            resume_from: checkpoint directory to continue from. checkpoints
+                keep being written to that directory.
+
+        returns:
+            executionresult covering all steps, including resumed ones.
+        """
+        actions: Sequence[Any] = self.action_codec.new_log() if self.compact_actions else []
+        step_outputs: list[StepOutput] = []
+        voting_stats: list[VotingStats] = []
+        current_state = initial_state
+        start_step = 0
+
+        total_samples = 0
+        total_valid_samples = 0
+        total_red_flagged = 0
+
+        resume = None
+        checkpoint_dir = self.checkpoint_dir
+        if resume_from is not None:
+            resume = load_checkpoint(resume_from, self.action_codec)
+            if resume.num_steps != num_steps:
+                raise ValueError(
+                    f"checkpoint is for {resume.num_steps} steps, got num_steps={num_steps}"
+                )
+            checkpoint_dir = Path(resume_from)
+
+            initial_state = resume.initial_state
+            current_state = resume.state
+            start_step = resume.steps_completed
+            actions = resume.actions if self.compact_actions else list(resume.actions)
+            voting_stats = resume.voting_stats
+            total_samples = resume.total_samples
+            total_valid_samples = resume.total_valid_samples
+            total_red_flagged = resume.total_red_flagged
+
+            logger.info(f"resuming mdap execution from step {start_step}/{num_steps} ({resume_from})")
+        else:
+            logger.info(f"starting mdap execution: {num_steps} steps, k={self.mdap_config.k}")
+
+        writer = None
+        if checkpoint_dir is not None:
+            writer = CheckpointWriter(checkpoint_dir, self.action_codec, resume=resume)
+
+        def checkpoint(steps_completed: int) -> None:
+            if writer is not None:
+                writer.commit(
+                    steps_completed=steps_completed,
+                    num_steps=num_steps,
+                    initial_state=initial_state,
+                    state=current_state,
+                    total_samples=total_samples,
+                    total_valid_samples=total_valid_samples,
+                    total_red_flagged=total_red_flagged,
+                )
+
+        def result(success: bool = True, error_message: str = "") -> ExecutionResult:
+            return ExecutionResult(
+                initial_state=initial_state,
+                final_state=current_state,
+                actions=actions,
+                step_outputs=step_outputs,
+                voting_stats=voting_stats,
+                total_samples=total_samples,
+                total_valid_samples=total_valid_samples,
+                total_red_flagged=total_red_flagged,
+                success=success,
+                error_message=error_message,
+            )
+
+        voting_results = self._voting_results(current_state, start_step, num_steps)
+        try:
+            for step_idx in range(start_step, num_steps):
+                try:
+                    voting_result = next(voting_results)
+                except Exception as e:
+                    logger.error(f"voting failed at step {step_idx}: {e}")
+                    return result(success=False, error_message=str(e))
+
+                winner = voting_result.winner
+                stats = voting_result.stats
+
+                current_state = winner.next_state
+                actions.append(winner.action)
+                if self.keep_step_outputs:
+                    step_outputs.append(winner)
+                voting_stats.append(stats)
+
+                total_samples += stats.total_samples
+                total_valid_samples += stats.valid_samples
+                total_red_flagged += stats.red_flagged_samples
+
+                if writer is not None:
+                    writer.append(winner.action, stats)
+                    if (step_idx + 1) % self.checkpoint_every == 0:
+                        checkpoint(step_idx + 1)
+
+                if verbose and (step_idx + 1) % 1000 == 0:
+                    logger.info(
+                        f"step {step_idx + 1}/{num_steps}: "
+                        f"samples={stats.total_samples}, valid={stats.valid_samples}, "
+                        f"winner_votes={stats.winner_votes}"
+                    )
+        finally:
+            voting_results.close()
+            # persist whatever was committed, including on failure/interrupt
+            if writer is not None:
+                checkpoint(len(actions))
+                writer.close()
+
+        if self.validator:
+            is_valid, error_msg = self.validator(current_state, actions)
+            if not is_valid:
+                logger.error(f"validation failed: {error_msg}")
+                return result(success=False, error_message=error_msg)
+
+        logger.info(
+            f"mdap execution complete: {num_steps} steps, "
+            f"{total_samples} total samples, {total_valid_samples} valid"
+        )
+
+        return result()
+
+    def _step_input(self, step_idx: int, num_steps: int, state: Any) -> StepInput:
+        return StepInput(
+            step_index=step_idx,
+            total_steps=num_steps,
+            state=state,
+            metadata=self.state_builder(state),
+        )
+
+    def _voting_results(self, state: Any, start_step: int, num_steps: int) -> Iterator[VotingResult]:
+        """
+        yield the decided vote of every step from `start_step` on, in order.
+
+        each step starts from the winner of the previous one. subclasses may
+        override this to decide steps differently (see `PipelinedExecutor`).
+        """
+        for step_idx in range(start_step, num_steps):
+            voting_result = self.voter.vote_until_decided(self._step_input(step_idx, num_steps, state))
+            state = voting_result.winner.next_state
+            yield voting_result
+
+
+# ============================================================================
+# pipelined executor
+# ============================================================================
+
+@dataclass(eq=False)
+class _SpeculativeVote:
+    """a vote in flight, plus the speculative vote chained after it."""
+    step_input: StepInput
+    stats: Any  # ParallelVotingStats
+    task: Optional[asyncio.Task] = None
+    parent_key: Optional[str] = None
+    leader_key: Optional[str] = None
+    leader_output: Optional[StepOutput] = None
+    votes_needed: int = 0
+    child: Optional["_SpeculativeVote"] = None
+    discarded: bool = False
+
+    @property
+    def launched_samples(self) -> int:
+        return self.stats.total_samples + self.stats.cancelled_samples
+
+
+class PipelinedExecutor(CheckpointingExecutor):
+    """
+    checkpointing executor that votes on upcoming steps speculatively.
+
+    while step i is being voted on, as soon as its leading candidate is
+    within `speculation_margin` votes of winning, voting on step i+1 starts
+    from that candidate's next_state. the chain repeats up to
+    `speculation_depth` steps ahead of the last committed step. if a leader
+    changes, or a step is decided for a different candidate, everything
+    speculated from it is cancelled and the step is voted on again from
+    the real winner.
+
+    committed results are identical to sequential execution: a speculative
+    vote is only kept when it was started from the state that actually won.
+    the cost is the samples bought for discarded speculation, reported per
+    step in `ParallelVotingStats.speculation_wasted_samples`.
+
+    requires a voter with `vote_until_decided_async` (i.e. `ParallelVoter`).
+
+    usage:
+        voter = ParallelVoter(step_runner=step_runner, red_flagger=red_flagger, k=3, parallelism=4)
+        executor = PipelinedExecutor(
+            mdap_config=mdap_config,
+            voter=voter,
+            speculation_depth=2,
+        )
+        result = executor.run_task(initial_state=..., num_steps=1_048_575)
+    """
+
+    def __init__(
+        self,
+        mdap_config: MdapConfig,
+        voter: Voter,
+        state_builder: Optional[Callable[[Any], dict]] = None,
+        validator: Optional[Callable[[Any, list[Any]], tuple[bool, str]]] = None,
+        speculation_depth: int = 1,
+        speculation_margin: int = 1,
+        **kwargs,
+    ):
+        """
+        initialize pipelined executor.
+
+        args:
+            mdap_config: mdap configuration (k, thresholds, etc.).
+            voter: parallel voter for first-to-ahead-by-k voting.
+            state_builder: optional function to build metadata dict from current state.
+            validator: optional function to validate final result (state, actions) -> (is_valid, message).
+            speculation_depth: maximum number of steps voted on ahead of the
+                last committed step (0 disables speculation).
+            speculation_margin: speculate once the leader needs at most this
+                many more valid votes to win (1 = it wins on its next vote).
+            **kwargs: forwarded to `CheckpointingExecutor`.
+        """
+        super().__init__(
+            mdap_config=mdap_config,
+            voter=voter,
+            state_builder=state_builder,
+            validator=validator,
+            **kwargs,
+        )
+        if speculation_depth < 0:
+            raise ValueError(f"speculation_depth must be >= 0, got {speculation_depth}")
+        if speculation_margin < 1:
+            raise ValueError(f"speculation_margin must be >= 1, got {speculation_margin}")
+        if speculation_depth and not hasattr(voter, "vote_until_decided_async"):
+            raise ValueError("speculative execution requires a voter with vote_until_decided_async (ParallelVoter)")
+
+        self.speculation_depth = speculation_depth
+        self.speculation_margin = speculation_margin
+
+    def _voting_results(self, state: Any, start_step: int, num_steps: int) -> Iterator[VotingResult]:
+        if not self.speculation_depth:
+            yield from super()._voting_results(state, start_step, num_steps)
+            return
+
+        discarded: list[_SpeculativeVote] = []
+        head: Optional[_SpeculativeVote] = None
+
+        def start(step_idx: int, step_state: Any, parent_key: Optional[str] = None) -> _SpeculativeVote:
+            vote = _SpeculativeVote(
+                step_input=self._step_input(step_idx, num_steps, step_state),
+                stats=ParallelVotingStats(step_index=step_idx, speculative=parent_key is not None),
+                parent_key=parent_key,
+            )
+            vote.task = asyncio.ensure_future(
+                self.voter.vote_until_decided_async(
+                    vote.step_input,
+                    stats=vote.stats,
+                    on_vote=lambda key, output, needed: on_leader(vote, key, output, needed),
+                )
+            )
+            vote.task.add_done_callback(lambda task: on_decided(vote))
+            return vote
+
+        def discard(vote: Optional[_SpeculativeVote]) -> None:
+            while vote is not None:
+                vote.task.cancel()
+                vote.discarded = True
+                discarded.append(vote)
+                vote = vote.child
+
+        def depth(vote: _SpeculativeVote) -> Optional[int]:
+            d, node = 0, head
+            while node is not None and node is not vote:
+                d, node = d + 1, node.child
+            return d if node is not None else None
+
+        def maybe_speculate(vote: _SpeculativeVote) -> None:
+            if (
+                vote.child is None
+                and vote.leader_key is not None
+                and vote.votes_needed <= self.speculation_margin
+                and vote.step_input.step_index + 1 < num_steps
+            ):
+                d = depth(vote)
+                if d is not None and d < self.speculation_depth:
+                    vote.child = start(
+                        vote.step_input.step_index + 1,
+                        vote.leader_output.next_state,
+                        parent_key=vote.leader_key,
+                    )
+
+        def on_leader(vote: _SpeculativeVote, key: str, output: StepOutput, needed: int) -> None:
+            if vote.discarded:
+                return
+            vote.leader_key, vote.leader_output, vote.votes_needed = key, output, needed
+            if vote.child is not None and vote.child.parent_key != key:
+                discard(vote.child)
+                vote.child = None
+            maybe_speculate(vote)
+
+        def on_decided(vote: _SpeculativeVote) -> None:
+            if not vote.task.cancelled() and vote.task.exception() is None:
+                winner = vote.task.result().winner
+                on_leader(vote, self.voter.normalize_fn(winner), winner, 0)
+
+        async def decide() -> VotingResult:
+            nonlocal head
+            if head is None:
+                head = start(start_step, state)
+            voting_result = await head.task
+
+            child, head.child = head.child, None
+            if child is not None and child.parent_key != self.voter.normalize_fn(voting_result.winner):
+                discard(child)
+                child = None
+
+            # charge speculation discarded so far to the step being committed
+            if discarded:
+                await asyncio.gather(*(v.task for v in discarded), return_exceptions=True)
+                voting_result.stats.speculation_wasted_samples += sum(v.launched_samples for v in discarded)
+                discarded.clear()
+
+            next_step = head.step_input.step_index + 1
+            if child is not None:
+                # the chain moved one step closer; its deepest vote may now speculate
+                head = child
+                node = head
+                while node.child is not None:
+                    node = node.child
+                maybe_speculate(node)
+            elif next_step < num_steps:
+                head = start(next_step, voting_result.winner.next_state)
+            return voting_result
+
+        async def shutdown() -> None:
+            discard(head)
+            await asyncio.gather(*(v.task for v in discarded), return_exceptions=True)
+
+        try:
+            for _ in range(start_step, num_steps):
+                yield self.voter.run_until_complete(decide())
+        finally:
+            if head is not None:
+                self.voter.run_until_complete(shutdown())
+
+
+# ============================================================================
+# reporting
+# ============================================================================
+
+def print_execution_summary(result: ExecutionResult, step_runner: Any = None) -> None:
+    """
+    print a human-readable summary of an execution result.
+
+    wraps the synqed summary and appends parallel-voting statistics
+    (wasted samples, peak concurrency, speculation) when the voter recorded
+    them, red flags by reason when `step_runner` uses a `FastRedFlagger`,
+    aborted streams for a `StreamingStepRunner`, per-backend metrics for a
+    `ModelPool`, and response-cache hit/miss counts when `step_runner` has a
+    cache.
+    """
+    _print_base_summary(result)
+
+    voting_stats: list[Any] = result.voting_stats
+    if any(hasattr(vs, "wasted_samples") for vs in voting_stats):
+        wasted = sum(getattr(vs, "wasted_samples", 0) for vs in voting_stats)
+        cancelled = sum(getattr(vs, "cancelled_samples", 0) for vs in voting_stats)
+        launched = result.total_samples + cancelled
+        peak = max(getattr(vs, "max_in_flight", 1) for vs in voting_stats)
+        print(f"\nParallel voting:")
+        print(f"  Wasted samples: {wasted} ({wasted / launched * 100 if launched else 0:.2f}% of launched)")
+        print(f"  Peak in flight: {peak}")
+
+        speculative = sum(getattr(vs, "speculative", False) for vs in voting_stats)
+        if speculative:
+            spec_wasted = sum(getattr(vs, "speculation_wasted_samples", 0) for vs in voting_stats)
+            print(f"  Steps started speculatively: {speculative} ({speculative / len(voting_stats) * 100:.2f}%)")
+            print(f"  Discarded speculative samples: {spec_wasted}")
+
+    red_flag_stats = getattr(getattr(step_runner, "red_flagger", None), "stats", None)
+    if red_flag_stats is not None and red_flag_stats.reasons:
+        print(f"\nRed flags by reason:")
+        for reason, count in red_flag_stats.reasons.most_common():
+            print(f"  {reason}: {count} ({count / red_flag_stats.evaluated * 100:.2f}% of evaluated)")
+
+    stream_stats = getattr(step_runner, "stream_stats", None)
+    if stream_stats is not None:
+        streamed = stream_stats.completed + stream_stats.aborted
+        print(f"\nStreaming:")
+        print(f"  Aborted samples: {stream_stats.aborted} ({stream_stats.aborted / streamed * 100 if streamed else 0:.2f}% of streamed)")
+        print(f"  Output tokens before abort (est.): {stream_stats.aborted_output_tokens}")
+
+    print_pool_metrics = getattr(step_runner, "print_metrics", None)
+    if print_pool_metrics is not None:
+        print_pool_metrics()
+
+    cache = getattr(step_runner, "cache", None)
+    if cache is not None:
+        stats = cache.stats
+        print(f"\nResponse cache:")
+        print(f"  Hits: {stats.hits} ({stats.hit_rate * 100:.2f}%)")
+        print(f"  Misses (llm calls): {stats.misses}")
@@ -0,0 +1,393 @@
+"""
+multi-key, multi-provider model pools for the maker/mdap demos.
+
+a `SynqedStepRunner` binds one `ModelConfig`, i.e. one api key and one model,
+so a large run is capped by a single rate limit. `ModelPool` is a step runner
+that spreads samples over several backends (keys, providers or models):
+- weighted routing: each sample goes to a backend drawn by weight.
+- 429-aware backoff: a rate-limited backend is rested (honouring
+  retry-after) and the sample is retried on another backend.
+- per-backend metrics: requests, errors, rate limits, tokens, cost and
+  throughput. a backend's cost comes from its model config's token prices;
+  set them to nan when unknown, and the cost is shown as "-".
+
+backends may use different models, so one vote can mix cheap and strong
+models: candidates are compared on their parsed (action, next_state), not on
+which model produced them.
+
+usage:
+    pool = ModelPool.from_configs(
+        [
+            (ModelConfig(provider="anthropic", model="claude-3-5-haiku-latest", api_key=key_a), 3.0),
+            (ModelConfig(provider="anthropic", model="claude-3-5-haiku-latest", api_key=key_b), 3.0),
+            (ModelConfig(provider="anthropic", model="claude-sonnet-4-20250514", api_key=key_a), 1.0),
+        ],
+        runner_factory=lambda model_config: SynqedStepRunner(
+            model_config=model_config,
+            red_flagger=red_flagger,
+            prompt_builder=build_hanoi_prompt,
+            response_parser=parse_hanoi_response,
+            system_prompt=system_prompt,
+            use_async=True,
+        ),
+    )
+    voter = ParallelVoter(step_runner=pool, red_flagger=red_flagger, k=3)
+    ...
+    pool.print_metrics()
+"""
+
+from __future__ import annotations
+
+import math
+import time
+import random
+import asyncio
+import inspect
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from synqed.mdap import ModelConfig, StepInput, StepOutput
+
+from mdap_step_runner import StreamStats, sample_async
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackendMetrics:
+    """
+    counters for one pool backend.
+
+    attributes:
+        requests: samples routed to the backend (including retried ones).
+        completed: samples that returned a completion (valid or red-flagged).
+        errors: failed llm calls, including rate-limited ones.
+        rate_limited: calls rejected with http 429.
+        tokens_input: input tokens of completed samples.
+        tokens_output: output tokens of completed samples.
+        latency_seconds: summed latency of completed samples.
+        first_request_at: monotonic time of the first request.
+        last_completed_at: monotonic time of the last completion.
+    """
+    requests: int = 0
+    completed: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    tokens_input: int = 0
+    tokens_output: int = 0
+    latency_seconds: float = 0.0
+    first_request_at: Optional[float] = None
+    last_completed_at: Optional[float] = None
+
+    @property
+    def avg_latency(self) -> float:
+        return self.latency_seconds / self.completed if self.completed else 0.0
+
+    @property
+    def samples_per_second(self) -> float:
+        """completed samples per second of wall time since the first request."""
+        if self.first_request_at is None or self.last_completed_at is None:
+            return 0.0
+        elapsed = self.last_completed_at - self.first_request_at
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+
+class PoolBackend:
+    """
+    one model + key behind a pool, with its step runner and backoff state.
+
+    attributes:
+        name: label used in logs and metrics.
+        step_runner: runner that samples from this backend.
+        weight: routing weight relative to the other backends.
+        metrics: per-backend counters.
+    """
+
+    def __init__(
+        self,
+        step_runner: Any,
+        weight: float = 1.0,
+        name: Optional[str] = None,
+        max_backoff: float = 60.0,
+    ):
+        """
+        initialize pool backend.
+
+        args:
+            step_runner: step runner bound to this backend's model config.
+            weight: routing weight (> 0).
+            name: label for metrics (default: provider/model#n).
+            max_backoff: upper bound on a rate-limit rest, in seconds.
+        """
+        if weight <= 0:
+            raise ValueError(f"weight must be > 0, got {weight}")
+        self.step_runner = step_runner
+        self.weight = weight
+        self.name = name or f"{step_runner.model_config.provider}/{step_runner.model_config.model}"
+        self.max_backoff = max_backoff
+        self.metrics = BackendMetrics()
+
+        self._lock = threading.Lock()
+        self._consecutive_429 = 0
+        self.available_at = 0.0
+
+        # watch the llm client for rate-limit errors the runner would swallow
+        step_runner.client = _ClientProxy(step_runner.client, self._on_client_error)
+
+    @property
+    def model_config(self) -> ModelConfig:
+        return self.step_runner.model_config
+
+    def cost(self) -> float:
+        """dollar cost of the tokens used so far (nan if the prices are unknown)."""
+        return (
+            self.metrics.tokens_input * self.model_config.cost_per_input_token
+            + self.metrics.tokens_output * self.model_config.cost_per_output_token
+        )
+
+    def record_request(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self.metrics.requests += 1
+            if self.metrics.first_request_at is None:
+                self.metrics.first_request_at = now
+        return now
+
+    def record_output(self, output: StepOutput, started: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if "llm_error" in output.red_flags:
+                self.metrics.errors += 1
+                return
+            self._consecutive_429 = 0
+            self.metrics.completed += 1
+            self.metrics.tokens_input += output.tokens_input
+            self.metrics.tokens_output += output.tokens_output
+            self.metrics.latency_seconds += now - started
+            self.metrics.last_completed_at = now
+
+    def _on_client_error(self, e: Exception) -> None:
+        if _status_code(e) != 429:
+            return
+        with self._lock:
+            self.metrics.rate_limited += 1
+            self._consecutive_429 += 1
+            delay = _retry_after(e)
+            if delay is None:
+                # exponential backoff with jitter: 1s, 2s, 4s, ...
+                delay = min(self.max_backoff, 2.0 ** (self._consecutive_429 - 1)) * random.uniform(0.5, 1.0)
+            self.available_at = max(self.available_at, time.monotonic() + min(delay, self.max_backoff))
+        logger.warning(f"{self.name}: rate limited, resting {delay:.1f}s")
+
+    def __repr__(self) -> str:
+        return f"PoolBackend({self.name}, weight={self.weight})"
+
+
+class ModelPool:
+    """
+    step runner that routes each sample to one of several backends.
+
+    usable anywhere a step runner is: `Voter`/`ParallelVoter`, calibration
+    and the executors. failed llm calls (rate limits, timeouts, ...) are
+    retried on another backend up to `max_attempts` times, so a single
+    throttled key does not turn into red-flagged votes.
+    """
+
+    def __init__(self, backends: Iterable[PoolBackend], max_attempts: int = 3, seed: Optional[int] = None):
+        """
+        initialize model pool.
+
+        args:
+            backends: pool backends.
+            max_attempts: llm calls tried per sample before returning the error.
+            seed: optional seed for routing.
+        """
+        self.backends = list(backends)
+        if not self.backends:
+            raise ValueError("model pool needs at least one backend")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be >= 1, got {max_attempts}")
+
+        self.max_attempts = max_attempts
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        names = [b.name for b in self.backends]
+        for backend in self.backends:
+            if names.count(backend.name) > 1:
+                backend.name = f"{backend.name}#{self.backends.index(backend)}"
+
+        primary = max(self.backends, key=lambda b: b.weight)
+        self.red_flagger = primary.step_runner.red_flagger
+        self.use_async = all(getattr(b.step_runner, "use_async", False) for b in self.backends)
+
+    @classmethod
+    def from_configs(
+        cls,
+        configs: Iterable[tuple[ModelConfig, float]],
+        runner_factory: Callable[[ModelConfig], Any],
+        **kwargs,
+    ) -> "ModelPool":
+        """
+        build a pool from (model config, weight) pairs.
+
+        args:
+            configs: one (model_config, weight) per backend.
+            runner_factory: builds a step runner for a model config.
+            **kwargs: forwarded to `ModelPool`.
+        """
+        return cls([PoolBackend(runner_factory(config), weight) for config, weight in configs], **kwargs)
+
+    @property
+    def model_config(self) -> ModelConfig:
+        """
+        model config of the highest-weight backend, with the backends' token
+        prices averaged by weight (used for cost estimates; nan if a
+        backend's price is unknown).
+        """
+        total = sum(b.weight for b in self.backends)
+        prices = {
+            name: sum(b.weight * getattr(b.model_config, name) for b in self.backends) / total
+            for name in ("cost_per_input_token", "cost_per_output_token")
+        }
+        return max(self.backends, key=lambda b: b.weight).model_config.model_copy(update=prices)
+
+    @property
+    def cache(self) -> Any:
+        """shared response cache of the backends, if any."""
+        return getattr(self.backends[0].step_runner, "cache", None)
+
+    @property
+    def stream_stats(self) -> Optional[StreamStats]:
+        """stream counters summed over streaming backends, if any."""
+        stats = [getattr(b.step_runner, "stream_stats", None) for b in self.backends]
+        stats = [s for s in stats if s is not None]
+        if not stats:
+            return None
+        return StreamStats(
+            completed=sum(s.completed for s in stats),
+            aborted=sum(s.aborted for s in stats),
+            aborted_output_tokens=sum(s.aborted_output_tokens for s in stats),
+        )
+
+    def sample_once(self, step_input: StepInput) -> StepOutput:
+        """draw a single sample from a routed backend (sync)."""
+        output = None
+        for _ in range(self.max_attempts):
+            backend, wait = self._choose()
+            if wait > 0:
+                time.sleep(wait)
+            started = backend.record_request()
+            output = backend.step_runner.sample_once(step_input)
+            backend.record_output(output, started)
+            if "llm_error" not in output.red_flags:
+                break
+        return output
+
+    async def sample_once_async(self, step_input: StepInput) -> StepOutput:
+        """draw a single sample from a routed backend (async)."""
+        output = None
+        for _ in range(self.max_attempts):
+            backend, wait = self._choose()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            started = backend.record_request()
+            output = await sample_async(backend.step_runner, step_input)
+            backend.record_output(output, started)
+            if "llm_error" not in output.red_flags:
+                break
+        return output
+
+    def print_metrics(self) -> None:
+        """print a per-backend throughput table."""
+        print(f"\nModel pool:")
+        print(f"  {'backend':<40} {'weight':>6} {'done':>7} {'err':>5} {'429':>5} {'lat(s)':>7} {'samp/s':>7} {'cost($)':>9}")
+        for b in self.backends:
+            m = b.metrics
+            print(
+                f"  {b.name:<40} {b.weight:>6.2f} {m.completed:>7} {m.errors:>5} {m.rate_limited:>5} "
+                f"{m.avg_latency:>7.2f} {m.samples_per_second:>7.2f} {_format_cost(b.cost()):>9}"
+            )
+
+    def _choose(self) -> tuple[PoolBackend, float]:
+        """
+        pick a backend by weight among those not resting after a 429.
+
+        returns (backend, seconds to wait); the wait is only non-zero when
+        every backend is resting, in which case the first to recover is used.
+        """
+        now = time.monotonic()
+        ready = [b for b in self.backends if b.available_at <= now]
+        if not ready:
+            backend = min(self.backends, key=lambda b: b.available_at)
+            return backend, backend.available_at - now
+        with self._rng_lock:
+            backend = self._rng.choices(ready, weights=[b.weight for b in ready])[0]
+        return backend, 0.0
+
+    def __repr__(self) -> str:
+        return f"ModelPool({self.backends})"
+
+
+# ============================================================================
+# rate-limit detection
+# ============================================================================
+
+class _ClientProxy:
+    """
+    wraps an llm sdk client and reports exceptions raised by `create` calls.
+
+    the step runner catches llm errors and returns them as red-flagged
+    outputs, so the pool watches the client to tell rate limits apart.
+    """
+
+    def __init__(self, target: Any, on_error: Callable[[Exception], None]):
+        self._target = target
+        self._on_error = on_error
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if name != "create":
+            return _ClientProxy(attr, self._on_error)
+
+        on_error = self._on_error
+
+        def create(*args, **kwargs):
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                on_error(e)
+                raise
+            if not inspect.isawaitable(result):
+                return result
+
+            async def awaited():
+                try:
+                    return await result
+                except Exception as e:
+                    on_error(e)
+                    raise
+
+            return awaited()
+
+        return create
+
+
+def _status_code(e: Exception) -> Optional[int]:
+    return getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_cost(cost: float) -> str:
+    return "-" if math.isnan(cost) else f"{cost:.4f}"
@@ -0,0 +1,293 @@
+"""
+fast-path red-flagging for the maker/mdap demos.
+
+`synqed.mdap.RedFlagger` runs on every sample of a million-step run. it keeps
+the output pattern as a string, reloads the tiktoken encoding on every call
+when counting real tokens, and only sees an output after it has been fully
+parsed. `FastRedFlagger` is a drop-in replacement that:
+- accepts precompiled patterns and a declarative field schema.
+- checks length first with a cheap estimator and stops at the first red flag
+  (an output only needs one reason to be discarded).
+- can guard the response parser so over-long outputs are never parsed.
+- can judge partial outputs, so a streaming step runner can abort a sample
+  mid-generation (see `StreamingStepRunner`).
+- keeps per-reason counters for reporting.
+
+usage:
+    red_flagger = FastRedFlagger(
+        max_output_tokens=750,
+        required_fields=["action", "next_state"],
+        schema={"action": list, "next_state": list},
+        output_pattern=re.compile(r"next_state\\s*="),
+    )
+    step_runner = SynqedStepRunner(
+        ...,
+        red_flagger=red_flagger,
+        response_parser=red_flagger.guard(parse_hanoi_response),
+    )
+    ...
+    print(red_flagger.stats)
+"""
+
+from __future__ import annotations
+
+import re
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from synqed.mdap import RedFlagger
+
+logger = logging.getLogger(__name__)
+
+# a field spec is a type (isinstance check) or a predicate on the value
+FieldSpec = Union[type, tuple, Callable[[Any], bool]]
+
+
+class OutputTooLong(ValueError):
+    """raised by a guarded parser instead of parsing an over-long output."""
+
+
+@dataclass
+class RedFlagStats:
+    """
+    per-reason red-flag counters.
+
+    attributes:
+        evaluated: outputs evaluated.
+        flagged: outputs red-flagged.
+        reasons: red flags by reason (arguments stripped, e.g. "too_long").
+    """
+    evaluated: int = 0
+    flagged: int = 0
+    reasons: Counter = field(default_factory=Counter)
+
+    @property
+    def flag_rate(self) -> float:
+        return self.flagged / self.evaluated if self.evaluated else 0.0
+
+    def __repr__(self) -> str:
+        reasons = ", ".join(f"{reason}={count}" for reason, count in self.reasons.most_common())
+        return (
+            f"RedFlagStats(evaluated={self.evaluated}, flagged={self.flagged}, "
+            f"flag_rate={self.flag_rate:.2%}, reasons={{{reasons}}})"
+        )
+
+
+class FastRedFlagger(RedFlagger):
+    """
+    red-flagger with precompiled checks, an early length gate and counters.
+
+    checks run cheapest first (length and partial validator, then required
+    fields and schema, then the pattern, then the custom validator) and stop
+    at the first failure.
+    the reasons it reports use the same names as `RedFlagger`.
+    """
+
+    def __init__(
+        self,
+        max_output_tokens: int = 750,
+        strict_format: bool = True,
+        required_fields: Optional[list[str]] = None,
+        output_pattern: Optional[str | re.Pattern] = None,
+        custom_validator: Optional[callable] = None,
+        use_token_count: bool = False,
+        schema: Optional[dict[str, FieldSpec]] = None,
+        token_estimator: Optional[Callable[[str], int]] = None,
+        partial_validator: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        """
+        initialize fast red-flagger.
+
+        args:
+            max_output_tokens: max allowed output length (see token_estimator).
+            strict_format: whether to strictly enforce format.
+            required_fields: list of required field names in parsed output.
+            output_pattern: regex (string or compiled) the raw text must match.
+            custom_validator: optional custom validation function(raw_text, parsed) -> (bool, list[str]).
+            use_token_count: count real tokens with tiktoken (encoding loaded once).
+            schema: optional field -> type or predicate checks on the parsed
+                output, e.g. {"action": list, "next_state": lambda s: len(s) == 3}.
+            token_estimator: optional function(text) -> token count. defaults to
+                chars / 4, or tiktoken when use_token_count is set.
+            partial_validator: optional function(text) -> red flag or none,
+                for outputs that are already malformed before they end. it
+                must flag every continuation of a text it flags, and is also
+                applied to complete outputs so streamed and non-streamed
+                samples get the same verdicts. called on every streamed
+                delta past its `safe_chars` attribute (the longest text it
+                can never flag; default -1, every delta), so it must be
+                cheap.
+        """
+        super().__init__(
+            max_output_tokens=max_output_tokens,
+            strict_format=strict_format,
+            required_fields=required_fields,
+            output_pattern=output_pattern,
+            custom_validator=custom_validator,
+            use_token_count=use_token_count,
+        )
+        self._pattern = re.compile(output_pattern) if isinstance(output_pattern, str) else output_pattern
+        self.schema = dict(schema or {})
+        self._schema_checks = [
+            (name, self._compile_spec(spec)) for name, spec in self.schema.items()
+        ]
+        self._required = tuple(self.required_fields)
+        self._estimate = token_estimator or self._default_estimator()
+        self._max_safe_chars = self._safe_length(token_estimator)
+        self.partial_validator = partial_validator
+
+        self.stats = RedFlagStats()
+        self._stats_lock = threading.Lock()
+
+    def evaluate(
+        self,
+        raw_text: str,
+        parsed_output: Optional[dict[str, Any]],
+        step_input: Any = None,
+    ) -> tuple[bool, list[str]]:
+        """
+        evaluate whether an output is valid or should be red-flagged.
+
+        args:
+            raw_text: raw llm response text.
+            parsed_output: parsed output dict (or None if parsing failed).
+            step_input: optional step input for context-specific validation.
+
+        returns:
+            (is_valid, red_flag_reasons). at most one reason is reported.
+        """
+        reason = self.too_long(raw_text)
+        if reason is None and self.partial_validator is not None:
+            reason = self.partial_validator(raw_text)
+        if reason is None:
+            reason = self._check(raw_text, parsed_output)
+        self._record(reason)
+        if reason is None:
+            return True, []
+        return False, [reason]
+
+    def too_long(self, raw_text: str) -> Optional[str]:
+        """return the length red flag for `raw_text`, or none if it is short enough."""
+        if len(raw_text) <= self._max_safe_chars:
+            return None
+        length = self._estimate(raw_text)
+        if length > self.max_output_tokens:
+            return f"too_long({length}>{self.max_output_tokens})"
+        return None
+
+    def check_partial(self, partial_text: str) -> Optional[str]:
+        """
+        return a red flag if a partial output can already be discarded.
+
+        a flagged partial output is final (the sample is aborted), so it is
+        counted in `stats` like an evaluated one.
+        """
+        reason = self.too_long(partial_text)
+        if reason is None and self.partial_validator is not None:
+            reason = self.partial_validator(partial_text)
+        if reason is not None:
+            self._record(reason)
+        return reason
+
+    @property
+    def partial_safe_chars(self) -> int:
+        """
+        longest partial output (in chars) that `check_partial` can never flag:
+        the shorter of the length gate's and the partial validator's
+        `safe_chars`, or -1 if every partial output must be checked.
+
+        lets a streaming caller skip building the partial text on each delta.
+        """
+        if self.partial_validator is None:
+            return self._max_safe_chars
+        return min(self._max_safe_chars, getattr(self.partial_validator, "safe_chars", -1))
+
+    def guard(self, parser: Callable[[str], Any]) -> Callable[[str], Any]:
+        """
+        wrap a response parser so over-long outputs are rejected unparsed.
+
+        the step runner treats the raised error as a parse failure, and
+        `evaluate` then reports the output as too long.
+        """
+        def guarded(raw_text: str) -> Any:
+            reason = self.too_long(raw_text)
+            if reason is not None:
+                raise OutputTooLong(reason)
+            return parser(raw_text)
+
+        guarded.__name__ = getattr(parser, "__name__", "guarded_parser")
+        return guarded
+
+    def reset_stats(self) -> None:
+        """clear the per-reason counters."""
+        with self._stats_lock:
+            self.stats = RedFlagStats()
+
+    def _check(self, raw_text: str, parsed_output: Optional[dict[str, Any]]) -> Optional[str]:
+        if self.strict_format:
+            if parsed_output is None:
+                return "parse_failed"
+            for name in self._required:
+                if name not in parsed_output:
+                    return f"missing_field({name})"
+            for name, check in self._schema_checks:
+                if name not in parsed_output:
+                    return f"missing_field({name})"
+                if not check(parsed_output[name]):
+                    return f"bad_field({name})"
+
+        if self._pattern is not None and self._pattern.search(raw_text) is None:
+            return "pattern_mismatch"
+
+        if self.custom_validator:
+            try:
+                is_valid, custom_reasons = self.custom_validator(raw_text, parsed_output)
+                if not is_valid:
+                    return custom_reasons[0] if custom_reasons else "custom_validator"
+            except Exception as e:
+                logger.warning(f"custom validator error: {e}")
+                return f"custom_validator_error({str(e)})"
+
+        return None
+
+    def _record(self, reason: Optional[str]) -> None:
+        with self._stats_lock:
+            self.stats.evaluated += 1
+            if reason is not None:
+                self.stats.flagged += 1
+                self.stats.reasons[reason.split("(", 1)[0]] += 1
+
+    def _default_estimator(self) -> Callable[[str], int]:
+        if self.use_token_count:
+            try:
+                import tiktoken
+                encode = tiktoken.get_encoding("cl100k_base").encode  # gpt-4 encoding
+                return lambda text: len(encode(text))
+            except ImportError:
+                logger.warning("tiktoken not installed; falling back to char count / 4")
+                self.use_token_count = False
+        return lambda text: len(text) // 4  # rough estimate: 4 chars per token
+
+    def _safe_length(self, token_estimator: Optional[Callable[[str], int]]) -> int:
+        """
+        longest text (in chars) that can never exceed the token limit.
+
+        texts up to this length skip the estimator entirely.
+        """
+        if token_estimator is not None:
+            return -1
+        if self.use_token_count:
+            # byte-level bpe: at most one token per utf-8 byte, <= 4 bytes per char
+            return self.max_output_tokens // 4
+        return 4 * self.max_output_tokens + 3
+
+    @staticmethod
+    def _compile_spec(spec: FieldSpec) -> Callable[[Any], bool]:
+        if isinstance(spec, (type, tuple)):
+            return lambda value: isinstance(value, spec)
+        if callable(spec):
+            return spec
+        raise TypeError(f"schema spec must be a type or a predicate, got {spec!r}")
@@ -0,0 +1,350 @@
+"""
+llm-free monte-carlo projection of mdap cost and success.
+
+before paying for a million-step run, sweep k, max_votes and red-flag
+thresholds against the per-step error distribution measured by calibration.
+the simulator reproduces `synqed.mdap.Voter` semantics (first-to-k and
+first-to-ahead-by-k, max_votes / max_samples caps, fallback to the most-voted
+candidate) and `RedFlagger` discards, vectorized with numpy over chunks of
+steps, so millions of steps take seconds.
+
+sample model (per llm call, independent):
+- red-flagged with probability `red_flag_rate`.
+- otherwise correct with probability `p_valid`.
+- otherwise a wrong answer, spread uniformly over `wrong_candidates` distinct
+  wrong candidates. the default of 1 (all errors agree) is the worst case.
+
+usage:
+    params = SimulationParams.from_calibration(report, red_flag_rate=0.02)
+    for result in sweep(params, ks=[2, 3, 4, 5], num_steps=1_048_575):
+        print(result)
+"""
+
+from __future__ import annotations
+
+import math
+import time
+import logging
+from statistics import NormalDist
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for simulation
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SimulationParams:
+    """
+    per-sample outcome distribution and voting configuration.
+
+    attributes:
+        p_valid: probability that a non-red-flagged sample is correct.
+        red_flag_rate: probability that a sample is red-flagged.
+        cost_per_sample: dollars per llm call.
+        k: vote margin threshold.
+        max_votes: maximum number of valid votes per step.
+        max_samples: maximum total samples per step.
+        first_to_k: use first-to-k instead of first-to-ahead-by-k.
+        wrong_candidates: number of distinct wrong answers errors spread over.
+    """
+    p_valid: float
+    red_flag_rate: float = 0.0
+    cost_per_sample: float = 0.0
+    k: int = 3
+    max_votes: int = 20
+    max_samples: int = 100
+    first_to_k: bool = False
+    wrong_candidates: int = 1
+
+    @classmethod
+    def from_calibration(cls, report: Any, red_flag_rate: Optional[float] = None, **kwargs) -> "SimulationParams":
+        """
+        build params from a `CalibrationReport`.
+
+        the report's p_estimate counts red-flagged samples as incorrect, so
+        p_valid = p_estimate / (1 - red_flag_rate). if the report carries
+        per-sample outcomes (`StreamingCalibrationReport.samples`) the
+        red-flag rate is measured from them unless given explicitly.
+        """
+        samples = getattr(report, "samples", None)
+        if red_flag_rate is None:
+            if samples:
+                red_flag_rate = sum(1 for s in samples if not s.valid) / len(samples)
+            else:
+                red_flag_rate = 0.0
+
+        p_valid = report.p_estimate / (1 - red_flag_rate) if red_flag_rate < 1 else 0.0
+        return cls(
+            p_valid=min(1.0, p_valid),
+            red_flag_rate=red_flag_rate,
+            cost_per_sample=report.cost_per_sample,
+            **kwargs,
+        )
+
+
+@dataclass
+class SimulationResult:
+    """
+    projected outcome of running `num_steps` steps with the given params.
+
+    attributes:
+        params: simulated parameters.
+        num_steps: projected number of steps.
+        simulated_steps: number of steps actually simulated.
+        avg_samples_per_step: mean llm calls per step (including red-flagged).
+        projected_samples: avg_samples_per_step * num_steps.
+        projected_cost: projected_samples * cost_per_sample.
+        step_error_rate: fraction of simulated steps decided wrongly.
+        step_error_upper: 95% upper bound on the per-step error rate.
+        success_probability: (1 - step_error_rate) ^ num_steps.
+        success_probability_lower: (1 - step_error_upper) ^ num_steps.
+        non_converged_rate: fraction of steps that hit max_votes/max_samples.
+        elapsed_seconds: wall-clock time of the simulation.
+        red_flag_threshold: output-length threshold the params came from (sweeps only).
+    """
+    params: SimulationParams
+    num_steps: int
+    simulated_steps: int
+    avg_samples_per_step: float
+    projected_samples: int
+    projected_cost: float
+    step_error_rate: float
+    step_error_upper: float
+    success_probability: float
+    success_probability_lower: float
+    non_converged_rate: float
+    elapsed_seconds: float
+    red_flag_threshold: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"SimulationResult(k={self.params.k}, max_votes={self.params.max_votes}, "
+            f"samples/step={self.avg_samples_per_step:.2f}, cost=${self.projected_cost:.2f}, "
+            f"p_success={self.success_probability:.4f} (>= {self.success_probability_lower:.4f}))"
+        )
+
+
+def simulate(
+    params: SimulationParams,
+    num_steps: int,
+    simulated_steps: Optional[int] = None,
+    chunk_size: int = 20_000,
+    seed: Optional[int] = None,
+) -> SimulationResult:
+    """
+    monte-carlo simulation of voting over many steps.
+
+    args:
+        params: sample distribution and voting configuration.
+        num_steps: number of steps to project for.
+        simulated_steps: number of steps to simulate (default: num_steps).
+            smaller values trade precision of the error rate for speed.
+        chunk_size: steps simulated per vectorized batch (bounds memory).
+        seed: optional random seed.
+
+    returns:
+        simulationresult with projected samples, cost and success probability.
+    """
+    if np is None:
+        raise ImportError("numpy package required: pip install numpy")
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    simulated_steps = simulated_steps or num_steps
+
+    total_samples = 0
+    errors = 0
+    non_converged = 0
+
+    remaining = simulated_steps
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        samples, wrong, undecided = _simulate_chunk(params, n, rng)
+        total_samples += int(samples.sum())
+        errors += int(wrong.sum())
+        non_converged += int(undecided.sum())
+        remaining -= n
+
+    step_error_rate = errors / simulated_steps
+    step_error_upper = _binomial_upper_bound(errors, simulated_steps)
+    avg_samples = total_samples / simulated_steps
+    projected_samples = int(round(avg_samples * num_steps))
+
+    return SimulationResult(
+        params=params,
+        num_steps=num_steps,
+        simulated_steps=simulated_steps,
+        avg_samples_per_step=avg_samples,
+        projected_samples=projected_samples,
+        projected_cost=projected_samples * params.cost_per_sample,
+        step_error_rate=step_error_rate,
+        step_error_upper=step_error_upper,
+        success_probability=(1 - step_error_rate) ** num_steps,
+        success_probability_lower=(1 - step_error_upper) ** num_steps,
+        non_converged_rate=non_converged / simulated_steps,
+        elapsed_seconds=time.perf_counter() - start,
+    )
+
+
+def sweep(
+    params: SimulationParams,
+    num_steps: int,
+    ks: Iterable[int] = (1, 2, 3, 4, 5, 6),
+    max_votes: Optional[Iterable[int]] = None,
+    red_flag_profile: Optional[dict[int, tuple[float, float]]] = None,
+    **simulate_kwargs,
+) -> list[SimulationResult]:
+    """
+    simulate every combination of k, max_votes and red-flag threshold.
+
+    args:
+        params: base parameters (p_valid / red_flag_rate used if no profile).
+        num_steps: number of steps to project for.
+        ks: vote margins to try.
+        max_votes: max-votes caps to try (default: params.max_votes).
+        red_flag_profile: optional {threshold: (red_flag_rate, p_valid)} as
+            produced by `red_flag_profile`.
+        **simulate_kwargs: forwarded to `simulate`.
+
+    returns:
+        results sorted by projected cost (cheapest first).
+    """
+    max_votes = list(max_votes) if max_votes is not None else [params.max_votes]
+    profiles = red_flag_profile or {None: (params.red_flag_rate, params.p_valid)}
+
+    results = []
+    for threshold, (red_flag_rate, p_valid) in profiles.items():
+        for k in ks:
+            for votes in max_votes:
+                run_params = replace(params, k=k, max_votes=votes, red_flag_rate=red_flag_rate, p_valid=p_valid)
+                result = simulate(run_params, num_steps, **simulate_kwargs)
+                result.red_flag_threshold = threshold
+                logger.info(f"simulated threshold={threshold}: {result}")
+                results.append(result)
+
+    results.sort(key=lambda r: r.projected_cost)
+    return results
+
+
+def red_flag_profile(samples: list[Any], thresholds: Iterable[int]) -> dict[int, tuple[float, float]]:
+    """
+    derive (red_flag_rate, p_valid) per output-length threshold from calibration samples.
+
+    args:
+        samples: per-sample outcomes with `tokens_output`, `format_ok` and
+            `correct` attributes (see `StreamingCalibrationReport.samples`).
+        thresholds: candidate max output lengths.
+
+    returns:
+        {threshold: (red_flag_rate, p_valid)}.
+    """
+    if not samples:
+        raise ValueError("red_flag_profile needs calibration samples")
+
+    profile = {}
+    for threshold in thresholds:
+        kept = [s for s in samples if s.format_ok and s.tokens_output <= threshold]
+        red_flag_rate = 1 - len(kept) / len(samples)
+        p_valid = sum(1 for s in kept if s.correct) / len(kept) if kept else 0.0
+        profile[threshold] = (red_flag_rate, p_valid)
+    return profile
+
+
+# ============================================================================
+# vectorized core
+# ============================================================================
+
+def _simulate_chunk(params: SimulationParams, n: int, rng: Any) -> tuple[Any, Any, Any]:
+    """
+    simulate n independent steps.
+
+    samples are drawn in column blocks; only steps that are still undecided
+    after a block draw the next one, so the usual few-samples-per-step case
+    never materializes all max_samples columns.
+
+    returns:
+        (samples used per step, step decided wrongly, step hit a cap undecided).
+    """
+    m = params.max_samples
+    w = params.wrong_candidates
+    block = max(8, 2 * params.k)
+    p_correct = params.red_flag_rate + (1 - params.red_flag_rate) * params.p_valid
+
+    samples_used = np.full(n, m, dtype=np.int32)
+    step_wrong = np.zeros(n, dtype=bool)
+    undecided = np.zeros(n, dtype=bool)
+
+    active = np.arange(n)
+    carry_votes = np.zeros((n, w + 1), dtype=np.int32)  # [:, 0] is correct, the rest are wrong answers
+    carry_valid = np.zeros(n, dtype=np.int32)
+
+    col = 0
+    while active.size and col < m:
+        b = min(block, m - col)
+        a = active.size
+
+        u = rng.random((a, b))
+        valid = u >= params.red_flag_rate
+        correct = valid & (u < p_correct)
+        wrong = valid & ~correct
+
+        votes = np.empty((a, b, w + 1), dtype=np.int32)
+        votes[:, :, 0] = np.cumsum(correct, axis=1)
+        if w == 1:
+            votes[:, :, 1] = np.cumsum(wrong, axis=1)
+        else:
+            choice = rng.integers(1, w + 1, size=(a, b))
+            for c in range(1, w + 1):
+                votes[:, :, c] = np.cumsum(wrong & (choice == c), axis=1)
+        votes += carry_votes[active, None, :]
+        valid_count = np.cumsum(valid, axis=1) + carry_valid[active, None]
+
+        if w == 1:
+            leader = votes.max(axis=2)
+            runnerup = votes.min(axis=2)
+        else:
+            ordered = np.sort(votes, axis=2)
+            leader = ordered[:, :, -1]
+            runnerup = ordered[:, :, -2]
+
+        if params.first_to_k:
+            decided = leader >= params.k
+        else:
+            decided = leader - runnerup >= params.k
+
+        # voter stops at the first decision, or once max_votes valid votes are in
+        stop = decided | (valid_count >= params.max_votes)
+        if col + b >= m:
+            stop[:, -1] = True  # max_samples reached
+        has_stop = stop.any(axis=1)
+        stop_idx = stop.argmax(axis=1)
+
+        rows = np.nonzero(has_stop)[0]
+        final_votes = votes[rows, stop_idx[rows]]
+        stopped = active[rows]
+        samples_used[stopped] = col + stop_idx[rows] + 1
+        # fallback ties are counted as errors (the voter may pick either)
+        step_wrong[stopped] = final_votes[:, 0] <= final_votes[:, 1:].max(axis=1)
+        undecided[stopped] = ~decided[rows, stop_idx[rows]]
+
+        still = np.nonzero(~has_stop)[0]
+        carry_votes[active[still]] = votes[still, -1]
+        carry_valid[active[still]] = valid_count[still, -1]
+        active = active[still]
+        col += b
+
+    return samples_used, step_wrong, undecided
+
+
+def _binomial_upper_bound(errors: int, n: int, confidence: float = 0.95) -> float:
+    """one-sided upper confidence bound on an error rate (exact for zero errors)."""
+    if errors == 0:
+        return 1 - (1 - confidence) ** (1 / n)
+    p = errors / n
+    z = NormalDist().inv_cdf(confidence)
+    return min(1.0, p + z * math.sqrt(p * (1 - p) / n))
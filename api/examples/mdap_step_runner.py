@@ -0,0 +1,626 @@
+"""
+step runner extensions for the maker/mdap demos.
+
+- `sample_async`: await a single sample from any step runner without blocking
+  the event loop (shared by parallel voting and calibration).
+- `RateLimiter`: async request-rate limiter.
+- `StreamingStepRunner`: streams completions and aborts a sample as soon as
+  the red-flagger rejects the partial output.
+
+`CachedStepRunner` is a `SynqedStepRunner` that records every llm completion
+in a pluggable on-disk cache keyed by (prompt, model config, sample ordinal).
+replaying a run, re-calibrating, or sweeping k against the same prompts then
+costs zero api calls for every sample that was already bought.
+
+the sample ordinal is the number of times the same prompt has been requested
+from the cache in this process, so repeated votes on one step still get
+distinct samples
+(voting needs independent draws), while a replay asks for the same ordinals in
+the same order. only the raw completion is cached; parsing and red-flagging
+run again on every hit, so red-flag thresholds can be swept too.
+
+usage:
+    from mdap_step_runner import CachedStepRunner, SqliteResponseCache
+
+    cache = SqliteResponseCache("hanoi-cache.sqlite")
+    step_runner = CachedStepRunner(
+        cache=cache,
+        model_config=model_config,
+        red_flagger=red_flagger,
+        prompt_builder=build_hanoi_prompt,
+        response_parser=parse_hanoi_response,
+        system_prompt=system_prompt,
+    )
+    ...
+    print(cache.stats)
+    cache.close()
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Executor
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from synqed.mdap import StepInput, StepOutput, SynqedStepRunner
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# sampling helpers
+# ============================================================================
+
+async def sample_async(
+    step_runner: Any,
+    step_input: StepInput,
+    executor: Optional[Executor] = None,
+) -> StepOutput:
+    """
+    draw a single sample from a step runner without blocking the event loop.
+
+    runners with a `sample_once_async` coroutine, or a `SynqedStepRunner`
+    created with `use_async=True`, are awaited directly (and can be
+    cancelled). sync runners are dispatched to `executor`.
+
+    args:
+        step_runner: step runner to sample from.
+        step_input: input to the step.
+        executor: executor for sync runners (default: the loop's executor).
+
+    returns:
+        stepoutput (may be invalid if red-flagged).
+    """
+    sample_once_async = getattr(step_runner, "sample_once_async", None)
+    if sample_once_async is not None:
+        return await sample_once_async(step_input)
+
+    if getattr(step_runner, "use_async", False) and hasattr(step_runner, "_sample_once_async"):
+        return await step_runner._sample_once_async(step_input)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, step_runner.sample_once, step_input)
+
+
+class RateLimiter:
+    """
+    async rate limiter that spaces request starts evenly.
+
+    usage:
+        limiter = RateLimiter(max_per_second=20)
+        await limiter.acquire()  # before each llm call
+    """
+
+    def __init__(self, max_per_second: float):
+        if max_per_second <= 0:
+            raise ValueError(f"max_per_second must be > 0, got {max_per_second}")
+        self.interval = 1.0 / max_per_second
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """wait until the next request may start."""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def build_step_output(
+    step_runner: SynqedStepRunner,
+    raw_text: str,
+    step_input: StepInput,
+    tokens_input: int = 0,
+    tokens_output: int = 0,
+) -> StepOutput:
+    """parse and red-flag a completion the way `SynqedStepRunner` does."""
+    try:
+        action, next_state = step_runner.response_parser(raw_text)
+        parsed_output = {"action": action, "next_state": next_state}
+    except Exception as e:
+        logger.debug(f"parse error: {e}")
+        action = None
+        next_state = None
+        parsed_output = None
+
+    is_valid, red_flags = step_runner.red_flagger.evaluate(
+        raw_text=raw_text,
+        parsed_output=parsed_output,
+        step_input=step_input,
+    )
+
+    return StepOutput(
+        action=action,
+        next_state=next_state,
+        raw_text=raw_text,
+        valid=is_valid,
+        red_flags=red_flags,
+        tokens_input=tokens_input,
+        tokens_output=tokens_output,
+    )
+
+
+# ============================================================================
+# response caches
+# ============================================================================
+
+@dataclass
+class CachedResponse:
+    """a single cached llm completion."""
+    raw_text: str
+    tokens_input: int = 0
+    tokens_output: int = 0
+
+
+@dataclass
+class CacheStats:
+    """
+    hit/miss counters for a response cache.
+
+    attributes:
+        hits: lookups answered from the cache.
+        misses: lookups that required an llm call.
+    """
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self) -> str:
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.2%})"
+
+
+class ResponseCache(ABC):
+    """
+    abstract interface for response caches.
+
+    implementations must be safe to call from several threads, since
+    `ParallelVoter` may sample a sync runner from a thread pool.
+
+    the cache also hands out sample ordinals, so several runners sharing one
+    cache (e.g. one per api key in a `ModelPool`) never replay the same
+    sample twice.
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+        self._ordinals: dict[str, int] = defaultdict(int)
+        self._ordinals_lock = threading.Lock()
+
+    def next_ordinal(self, prompt_hash: str) -> int:
+        """return the ordinal of the next sample requested for `prompt_hash`."""
+        with self._ordinals_lock:
+            ordinal = self._ordinals[prompt_hash]
+            self._ordinals[prompt_hash] = ordinal + 1
+        return ordinal
+
+    @abstractmethod
+    def get(self, prompt_hash: str, ordinal: int) -> Optional[CachedResponse]:
+        """return the cached response, or none on a miss."""
+        pass
+
+    @abstractmethod
+    def put(self, prompt_hash: str, ordinal: int, response: CachedResponse) -> None:
+        """store a response."""
+        pass
+
+    def close(self) -> None:
+        """flush pending writes and release resources."""
+        pass
+
+
+class SqliteResponseCache(ResponseCache):
+    """
+    response cache stored in a single sqlite file.
+
+    writes are committed in batches of `commit_every` so the cache does not
+    add an fsync per sample; call `close()` (or `flush()`) at the end of a run.
+    """
+
+    def __init__(self, path: str | Path, commit_every: int = 100):
+        """
+        open (or create) a sqlite response cache.
+
+        args:
+            path: sqlite database file.
+            commit_every: number of puts between commits.
+        """
+        super().__init__()
+        self.path = Path(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                prompt_hash TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                raw_text TEXT NOT NULL,
+                tokens_input INTEGER NOT NULL,
+                tokens_output INTEGER NOT NULL,
+                PRIMARY KEY (prompt_hash, ordinal)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get(self, prompt_hash: str, ordinal: int) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw_text, tokens_input, tokens_output FROM responses "
+                "WHERE prompt_hash = ? AND ordinal = ?",
+                (prompt_hash, ordinal),
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+        return CachedResponse(raw_text=row[0], tokens_input=row[1], tokens_output=row[2])
+
+    def put(self, prompt_hash: str, ordinal: int, response: CachedResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (prompt_hash, ordinal, response.raw_text, response.tokens_input, response.tokens_output),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def flush(self) -> None:
+        """commit pending writes."""
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __repr__(self) -> str:
+        return f"SqliteResponseCache({self.path}, {self.stats})"
+
+
+# ============================================================================
+# cached step runner
+# ============================================================================
+
+class CachedStepRunner(SynqedStepRunner):
+    """
+    synqed step runner with a deterministic response cache.
+
+    on a hit the llm is not called; the cached completion is parsed and
+    red-flagged exactly like a fresh one. failed llm calls are never cached,
+    nor are streams aborted mid-way (see `StreamingStepRunner`): their text
+    is not a full completion, and a replay with other red-flag thresholds
+    must not parse it as one. such ordinals are sampled again on replay.
+    """
+
+    def __init__(self, cache: ResponseCache, *args, **kwargs):
+        """
+        initialize cached step runner.
+
+        args:
+            cache: response cache to read from and write to.
+            *args, **kwargs: forwarded to `SynqedStepRunner`.
+        """
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def _sample_once_sync(self, step_input: StepInput) -> StepOutput:
+        prompt_hash, ordinal = self._next_key(step_input)
+
+        cached = self.cache.get(prompt_hash, ordinal)
+        if cached is not None:
+            return self._output_from_cache(cached, step_input)
+
+        output = super()._sample_once_sync(step_input)
+        self._store(prompt_hash, ordinal, output)
+        return output
+
+    async def _sample_once_async(self, step_input: StepInput) -> StepOutput:
+        prompt_hash, ordinal = self._next_key(step_input)
+
+        cached = self.cache.get(prompt_hash, ordinal)
+        if cached is not None:
+            return self._output_from_cache(cached, step_input)
+
+        output = await super()._sample_once_async(step_input)
+        self._store(prompt_hash, ordinal, output)
+        return output
+
+    def prompt_hash(self, step_input: StepInput) -> str:
+        """
+        hash everything that determines the completion distribution.
+
+        mirrors the temperature rule of `SynqedStepRunner` (step 0 uses 0.0).
+        """
+        temperature = self.model_config.temperature if step_input.step_index > 0 else 0.0
+        key = json.dumps(
+            [
+                self.model_config.provider,
+                self.model_config.model,
+                temperature,
+                self.model_config.max_output_tokens,
+                self.system_prompt,
+                self.prompt_builder(step_input),
+            ],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _next_key(self, step_input: StepInput) -> tuple[str, int]:
+        prompt_hash = self.prompt_hash(step_input)
+        return prompt_hash, self.cache.next_ordinal(prompt_hash)
+
+    def _store(self, prompt_hash: str, ordinal: int, output: StepOutput) -> None:
+        if "llm_error" in output.red_flags or isinstance(output, _AbortedStepOutput):
+            return
+        self.cache.put(
+            prompt_hash,
+            ordinal,
+            CachedResponse(
+                raw_text=output.raw_text,
+                tokens_input=output.tokens_input,
+                tokens_output=output.tokens_output,
+            ),
+        )
+
+    def _output_from_cache(self, cached: CachedResponse, step_input: StepInput) -> StepOutput:
+        """parse and red-flag a cached completion like a fresh one."""
+        return build_step_output(
+            self,
+            cached.raw_text,
+            step_input,
+            tokens_input=cached.tokens_input,
+            tokens_output=cached.tokens_output,
+        )
+
+
+# ============================================================================
+# streaming step runner
+# ============================================================================
+
+@dataclass
+class StreamStats:
+    """
+    counters for streamed samples.
+
+    attributes:
+        completed: samples streamed to the end.
+        aborted: samples cut off because they were red-flagged mid-stream.
+        aborted_output_tokens: (estimated) output tokens generated by aborted
+            samples before they were cut off.
+    """
+    completed: int = 0
+    aborted: int = 0
+    aborted_output_tokens: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"StreamStats(completed={self.completed}, aborted={self.aborted}, "
+            f"aborted_output_tokens={self.aborted_output_tokens})"
+        )
+
+
+@dataclass(repr=False)
+class _AbortedStepOutput(StepOutput):
+    """a sample whose stream was cut off by a red flag; never cached."""
+
+
+class _StreamAccumulator:
+    """
+    collects text and usage from provider stream events.
+
+    the partial text is only joined for `check_partial` once it is longer
+    than `safe_chars`, so short outputs cost O(1) per delta.
+    """
+
+    def __init__(self, provider: str, check_partial: Callable[[str], Optional[str]], safe_chars: int = -1):
+        self.provider = provider
+        self.check_partial = check_partial
+        self.safe_chars = safe_chars
+        self.parts: list[str] = []
+        self.length = 0
+        self.tokens_input = 0
+        self.tokens_output = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def feed(self, event: Any) -> Optional[str]:
+        """consume one stream event; return a red flag if the sample should be aborted."""
+        delta = None
+        if self.provider == "anthropic":
+            if event.type == "message_start":
+                self.tokens_input = event.message.usage.input_tokens
+            elif event.type == "content_block_delta":
+                delta = getattr(event.delta, "text", None)
+            elif event.type == "message_delta":
+                self.tokens_output = event.usage.output_tokens
+        else:  # openai
+            if event.choices:
+                delta = event.choices[0].delta.content
+            if getattr(event, "usage", None) is not None:
+                self.tokens_input = event.usage.prompt_tokens
+                self.tokens_output = event.usage.completion_tokens
+
+        if not delta:
+            return None
+        self.parts.append(delta)
+        self.length += len(delta)
+        if self.length <= self.safe_chars:
+            return None
+        return self.check_partial(self.text)
+
+
+class StreamingStepRunner(SynqedStepRunner):
+    """
+    synqed step runner that streams completions and aborts runaway samples.
+
+    every text delta is passed to the red-flagger's `check_partial` (see
+    `FastRedFlagger`); other red-flaggers get a chars / 4 length gate. as
+    soon as a partial completion is flagged the stream is closed, which stops
+    generation (and billing) for the rest of the output and frees the slot
+    for another vote. completed streams are parsed and red-flagged as usual.
+
+    usage:
+        step_runner = StreamingStepRunner(
+            model_config=model_config,
+            red_flagger=FastRedFlagger(max_output_tokens=750, ...),
+            prompt_builder=build_hanoi_prompt,
+            response_parser=parse_hanoi_response,
+            system_prompt=system_prompt,
+            use_async=True,
+        )
+        ...
+        print(step_runner.stream_stats)
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        initialize streaming step runner.
+
+        args:
+            *args, **kwargs: forwarded to `SynqedStepRunner`.
+        """
+        super().__init__(*args, **kwargs)
+        self.stream_stats = StreamStats()
+        self._stats_lock = threading.Lock()
+
+    def _sample_once_sync(self, step_input: StepInput) -> StepOutput:
+        acc = self._accumulator()
+        try:
+            stream = self._create_stream(self.client, step_input)
+            try:
+                for event in stream:
+                    reason = acc.feed(event)
+                    if reason is not None:
+                        return self._aborted(acc, reason)
+            finally:
+                stream.close()
+        except Exception as e:
+            return self._llm_error(e)
+        return self._completed(acc, step_input)
+
+    async def _sample_once_async(self, step_input: StepInput) -> StepOutput:
+        acc = self._accumulator()
+        try:
+            stream = await self._create_stream(self.client, step_input)
+            try:
+                async for event in stream:
+                    reason = acc.feed(event)
+                    if reason is not None:
+                        return self._aborted(acc, reason)
+            finally:
+                await stream.close()
+        except Exception as e:
+            return self._llm_error(e)
+        return self._completed(acc, step_input)
+
+    def _create_stream(self, client: Any, step_input: StepInput) -> Any:
+        """open a streaming completion (awaitable for async clients)."""
+        prompt = self.prompt_builder(step_input)
+        temperature = self.model_config.temperature if step_input.step_index > 0 else 0.0
+        provider = self.model_config.provider
+
+        if provider == "openai":
+            return client.chat.completions.create(
+                model=self.model_config.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=temperature,
+                max_tokens=self.model_config.max_output_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        if provider == "anthropic":
+            return client.messages.create(
+                model=self.model_config.model,
+                max_tokens=self.model_config.max_output_tokens,
+                temperature=temperature,
+                system=self.system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+        raise ValueError(f"unsupported provider: {provider}")
+
+    def _accumulator(self) -> _StreamAccumulator:
+        check_partial = getattr(self.red_flagger, "check_partial", None)
+        if check_partial is not None:
+            return _StreamAccumulator(self.model_config.provider, check_partial, self.red_flagger.partial_safe_chars)
+
+        # called only past max_chars, so always a flag
+        max_chars = 4 * self.red_flagger.max_output_tokens + 3
+
+        def too_long(text: str) -> Optional[str]:
+            return f"too_long({len(text) // 4}>{self.red_flagger.max_output_tokens})"
+
+        return _StreamAccumulator(self.model_config.provider, too_long, max_chars)
+
+    def _completed(self, acc: _StreamAccumulator, step_input: StepInput) -> StepOutput:
+        with self._stats_lock:
+            self.stream_stats.completed += 1
+        return build_step_output(
+            self,
+            acc.text,
+            step_input,
+            tokens_input=acc.tokens_input,
+            tokens_output=acc.tokens_output,
+        )
+
+    def _aborted(self, acc: _StreamAccumulator, reason: str) -> StepOutput:
+        # usage is only reported at the end of a stream; estimate what was generated
+        tokens_output = max(acc.tokens_output, acc.length // 4)
+        with self._stats_lock:
+            self.stream_stats.aborted += 1
+            self.stream_stats.aborted_output_tokens += tokens_output
+        logger.debug(f"aborted stream after {acc.length} chars: {reason}")
+        return _AbortedStepOutput(
+            action=None,
+            next_state=None,
+            raw_text=acc.text,
+            valid=False,
+            red_flags=[reason],
+            tokens_input=acc.tokens_input,
+            tokens_output=tokens_output,
+        )
+
+    def _llm_error(self, e: Exception) -> StepOutput:
+        logger.error(f"llm call error: {e}")
+        return StepOutput(
+            action=None,
+            next_state=None,
+            raw_text=str(e),
+            valid=False,
+            red_flags=["llm_error"],
+            tokens_input=0,
+            tokens_output=0,
+        )
+
+
+class CachedStreamingStepRunner(CachedStepRunner, StreamingStepRunner):
+    """cached step runner whose cache misses are streamed (see both bases)."""
@@ -0,0 +1,299 @@
+"""
+parallel first-to-ahead-by-k voting for the maker/mdap demos.
+
+the stock `synqed.mdap.Voter` draws one sample at a time, so every step of a
+million-step run costs a full sequence of llm round trips. `ParallelVoter`
+keeps a bounded batch of samples in flight, tallies them as they complete, and
+cancels whatever is still outstanding as soon as a candidate is decided.
+
+usage:
+    from mdap_voting import ParallelVoter
+
+    step_runner = SynqedStepRunner(..., use_async=True)
+    voter = ParallelVoter(
+        step_runner=step_runner,
+        red_flagger=red_flagger,
+        k=3,
+        parallelism=6,
+    )
+
+    result = voter.vote_until_decided(step_input)
+    print(result.stats.wasted_samples)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from synqed.mdap import StepInput, StepOutput, Voter, VotingResult, VotingStats
+
+from mdap_step_runner import sample_async
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class ParallelVotingStats(VotingStats):
+    """
+    voting statistics with parallel-sampling bookkeeping.
+
+    attributes:
+        wasted_samples: samples launched but not counted towards the vote
+            (cancelled in flight, or completed after the step was decided).
+        cancelled_samples: wasted samples that were cancelled before completing.
+        max_in_flight: peak number of concurrent samples for this step.
+        speculative: whether this step's vote was started speculatively,
+            before the previous step was decided (see `PipelinedExecutor`).
+        speculation_wasted_samples: samples bought for speculative votes that
+            were discarded while this step was being decided.
+    """
+    wasted_samples: int = 0
+    cancelled_samples: int = 0
+    max_in_flight: int = 0
+    speculative: bool = False
+    speculation_wasted_samples: int = 0
+
+
+class ParallelVoter(Voter):
+    """
+    voter that samples candidates concurrently.
+
+    at most `parallelism` samples are in flight at once, and never more than
+    the number of valid votes the current leader still needs to win. this
+    keeps the endpoint busy early in a step without over-buying samples once
+    a candidate is close to deciding.
+
+    async step runners (`SynqedStepRunner(use_async=True)` or anything with a
+    `sample_once_async` coroutine) are awaited directly and truly cancelled.
+    sync runners are dispatched to a thread pool; requests that are already
+    running cannot be interrupted and are simply abandoned.
+    """
+
+    def __init__(
+        self,
+        step_runner: Any,  # StepRunnerInterface
+        red_flagger: Any,  # RedFlagger
+        k: int = 3,
+        max_votes: int = 20,
+        max_samples: int = 100,
+        first_to_k: bool = False,
+        normalize_fn: Optional[callable] = None,
+        parallelism: int = 4,
+    ):
+        """
+        initialize parallel voter.
+
+        args:
+            step_runner: step runner that produces candidate stepoutputs.
+            red_flagger: red flagger that validates outputs.
+            k: vote margin threshold for first-to-ahead-by-k.
+            max_votes: maximum number of valid votes per step.
+            max_samples: maximum total samples (including red-flagged).
+            first_to_k: if true, use simpler first-to-k instead of first-to-ahead-by-k.
+            normalize_fn: optional function to normalize candidate outputs for comparison.
+            parallelism: maximum number of samples in flight at once.
+        """
+        super().__init__(
+            step_runner=step_runner,
+            red_flagger=red_flagger,
+            k=k,
+            max_votes=max_votes,
+            max_samples=max_samples,
+            first_to_k=first_to_k,
+            normalize_fn=normalize_fn,
+        )
+        if parallelism < 1:
+            raise ValueError(f"parallelism must be >= 1, got {parallelism}")
+
+        self.parallelism = parallelism
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def vote_until_decided(self, step_input: StepInput) -> VotingResult:
+        """
+        run voting until a candidate is decided (sync entry point).
+
+        uses a private event loop that lives as long as the voter, so async
+        llm clients keep their connection pool across steps. callers that are
+        already inside an event loop should await `vote_until_decided_async`.
+        """
+        return self.run_until_complete(self.vote_until_decided_async(step_input))
+
+    def run_until_complete(self, awaitable: Awaitable[T]) -> T:
+        """run `awaitable` on the voter's private event loop."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(awaitable)
+
+    async def vote_until_decided_async(
+        self,
+        step_input: StepInput,
+        stats: Optional[ParallelVotingStats] = None,
+        on_vote: Optional[Callable[[str, StepOutput, int], None]] = None,
+    ) -> VotingResult:
+        """
+        run voting with up to `parallelism` samples in flight.
+
+        args:
+            step_input: input to the step.
+            stats: stats object to fill in (default: a new one). sample
+                counters are kept current while voting, so a caller holding
+                this object can still account for a cancelled vote.
+            on_vote: called whenever completed samples leave the step
+                undecided, with (leader key, leader output, valid votes the
+                leader still needs to win).
+
+        returns:
+            votingresult whose stats is a parallelvotingstats.
+        """
+        vote_counts: dict[str, int] = defaultdict(int)
+        candidate_outputs: dict[str, StepOutput] = {}
+
+        if stats is None:
+            stats = ParallelVotingStats(step_index=step_input.step_index)
+
+        sample_count = 0
+        valid_count = 0
+        winner_key: Optional[str] = None
+        pending: set[asyncio.Future] = set()
+        failed = False
+
+        try:
+            while True:
+                # top up in-flight samples without exceeding the remaining budget
+                budget = min(
+                    self.max_samples - sample_count,
+                    self.max_votes - valid_count,
+                ) - len(pending)
+                launch = min(
+                    self.parallelism - len(pending),
+                    self._votes_needed(vote_counts) - len(pending),
+                    budget,
+                )
+                for _ in range(max(0, launch)):
+                    pending.add(asyncio.ensure_future(self._sample(step_input)))
+                stats.max_in_flight = max(stats.max_in_flight, len(pending))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                # retrieve every exception of the batch before failing the step on the first
+                errors = [task.exception() for task in done if task.exception() is not None]
+                if errors:
+                    failed = True
+                    raise errors[0]
+
+                for task in done:
+                    sample_count += 1
+                    stats.total_samples = sample_count
+                    output = task.result()
+
+                    if winner_key is not None:
+                        # arrived in the same batch as the deciding vote
+                        stats.wasted_samples += 1
+                        continue
+
+                    if not output.valid:
+                        stats.red_flagged_samples += 1
+                        continue
+
+                    valid_count += 1
+                    candidate_key = self.normalize_fn(output)
+                    if candidate_key not in candidate_outputs:
+                        candidate_outputs[candidate_key] = output
+                    vote_counts[candidate_key] += 1
+
+                    if self._check_winner(vote_counts, candidate_key):
+                        winner_key = candidate_key
+
+                if winner_key is not None:
+                    break
+
+                if on_vote is not None and vote_counts:
+                    leader_key = max(vote_counts, key=vote_counts.get)
+                    on_vote(leader_key, candidate_outputs[leader_key], self._votes_needed(vote_counts))
+        finally:
+            # cancel outstanding requests as soon as the step is decided
+            for task in pending:
+                task.cancel()
+            stats.cancelled_samples = len(pending)
+            if not failed:
+                # a failed step has no winner for these samples to be wasted against
+                stats.wasted_samples += len(pending)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner_key is None:
+            if not vote_counts:
+                raise RuntimeError(
+                    f"step {step_input.step_index}: no valid samples after {sample_count} attempts"
+                )
+            winner_key = max(vote_counts, key=vote_counts.get)
+            logger.warning(
+                f"step {step_input.step_index}: voting did not converge after "
+                f"{sample_count} samples; returning best candidate with "
+                f"{vote_counts[winner_key]} votes"
+            )
+
+        # fill stats
+        stats.total_samples = sample_count
+        stats.valid_samples = valid_count
+        stats.vote_counts = dict(vote_counts)
+        stats.winner_votes = vote_counts[winner_key]
+        sorted_votes = sorted(vote_counts.values(), reverse=True)
+        stats.runnerup_votes = sorted_votes[1] if len(sorted_votes) > 1 else 0
+        stats.rounds_to_decide = valid_count
+
+        logger.debug(
+            f"step {step_input.step_index}: decided in {valid_count} votes "
+            f"({sample_count} samples, {stats.wasted_samples} wasted, "
+            f"peak in flight {stats.max_in_flight})"
+        )
+
+        return VotingResult(
+            step_input=step_input,
+            winner=candidate_outputs[winner_key],
+            stats=stats,
+        )
+
+    def close(self) -> None:
+        """release the private event loop and thread pool."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.close()
+        self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _votes_needed(self, vote_counts: dict[str, int]) -> int:
+        """
+        minimum number of further valid votes before any candidate can win.
+
+        first-to-k: k - v[leader].
+        first-to-ahead-by-k: k - (v[leader] - v[runner-up]).
+        """
+        sorted_votes = sorted(vote_counts.values(), reverse=True)
+        leader = sorted_votes[0] if sorted_votes else 0
+        runnerup = sorted_votes[1] if len(sorted_votes) > 1 else 0
+
+        if self.first_to_k:
+            return max(1, self.k - leader)
+        return max(1, self.k - (leader - runnerup))
+
+    async def _sample(self, step_input: StepInput) -> StepOutput:
+        """draw a single sample from the step runner without blocking the loop."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.parallelism,
+                thread_name_prefix="mdap-vote",
+            )
+        return await sample_async(self.step_runner, step_input, self._executor)
@@ -0,0 +1,770 @@
+"""
+compact, interned transcript storage for synqed message routers.
+
+`MessageRouter` keeps its transcript as a list of dicts: one dict, one
+timestamp string and one content string per message, with agent names and
+workspace ids referenced from every entry. with thousands of workspaces
+alive in one process that is most of the router's memory.
+
+`CompactTranscript` stores the same entries column-wise:
+- sender, recipient and workspace id as indexes into an intern table,
+- timestamps as integer microseconds (the router's isoformat strings are
+  rebuilt exactly on read),
+- contents utf-8 encoded in one append-only arena; a content identical to
+  a recent one (startup markers, repeated protocol text) is stored once,
+- message ids as the same string objects the router's dedup set holds.
+values that do not fit a column (non-string names, other timestamp formats,
+extra keys) are kept as-is on the side, so every entry reads back exactly.
+
+queries: the store keeps secondary indexes (sorted sequence numbers) by
+sender, recipient and message kind ("message", "startup", "subteam_result",
+"empty"), so
+- `last_message(to="USER")` is o(1),
+- `messages(from_=..., since=seq)` is o(log n + matches), and
+- `count(kind="message")` is o(log n) for a single filter.
+`completion_status(workspace)` answers `Workspace.get_completion_status()`
+from the indexes. the module-level `last_message`/`messages`/`count` helpers
+accept any router and fall back to a scan for a plain `MessageRouter`.
+
+reading:
+- `records()` iterates `TranscriptRecord` views without building dicts;
+  a record is a read-only mapping with the dict entry's keys, so
+  `record["from"]` and `record.get("content")` work unchanged.
+- `rows()` yields plain tuples, for hot loops.
+- `get_transcript()` returns a `TranscriptView`: a sequence of records over
+  the entries live at the call, o(1) to build. the library only indexes,
+  slices, `len()`s and `.get()`s it; code that keeps or serializes the
+  transcript takes `dict(record)` or `to_dicts()`, which builds every dict.
+
+usage:
+    router = CompactMessageRouter()  # a MessageRouter with a compact transcript
+    for record in router.iter_transcript():
+        print(record.sender, record.recipient, record.content)
+
+    manager = CompactWorkspaceManager(workspaces_root=Path("/tmp/ws"))
+    workspace = await manager.create_workspace(...)  # routers are compact
+    final = last_message(workspace.router, to="USER", kind="message")
+"""
+
+from __future__ import annotations
+
+import sys
+import bisect
+import heapq
+import logging
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, Optional
+
+import synqed
+import synqed.router
+
+logger = logging.getLogger(__name__)
+
+_KEYS = ("timestamp", "workspace_id", "from", "to", "message_id", "content")
+_KEY_INDEX = {key: index for index, key in enumerate(_KEYS)}
+
+# message kinds, as classified by the library's completion and history code
+KINDS = ("message", "startup", "subteam_result", "empty")
+_KIND_IDS = {kind: index for index, kind in enumerate(KINDS)}
+
+# timestamp formats rebuilt from microseconds
+_ISO, _ISO_Z, _RAW = 0, 1, 2
+_EPOCH = datetime(1970, 1, 1)
+
+# content slot of an entry whose content is not in the arena (see transcript_spill.py)
+NOT_RESIDENT = 0xFFFFFFFF
+
+# recent contents remembered for deduplication, per transcript; the table
+# costs ~80 bytes per content, so it is bounded rather than global
+_DEDUP_CONTENTS = 128
+
+
+class CompactTranscript(Sequence):
+    """
+    columnar, append-only store of router transcript entries.
+
+    entries are numbered by a sequence number that never changes; dropping
+    old entries (`drop_before`) advances `first_seq`. indexing, `len` and
+    iteration cover the live entries, like the router's list.
+    """
+
+    __slots__ = (
+        "first_seq", "_offset", "_names", "_name_ids", "_workspace", "_sender", "_recipient",
+        "_stamp", "_stamp_kind", "_message_ids", "_content_slot", "_arena", "_slot_start",
+        "_slot_by_hash", "_odd", "_extra", "_kind", "_by_sender", "_by_recipient", "_by_kind",
+        "_final_attempts",
+    )
+
+    def __init__(self):
+        self.first_seq = 0
+        self._offset = 0  # sequence number of column position 0
+        self._names: list[str] = [""]  # id 0 doubles as the placeholder of odd values
+        self._name_ids: dict[str, int] = {"": 0}
+        self._workspace = array("I")
+        self._sender = array("I")
+        self._recipient = array("I")
+        self._stamp = array("q")
+        self._stamp_kind = array("B")
+        self._message_ids: list[Any] = []
+        self._content_slot = array("I")
+        self._arena = bytearray()
+        self._slot_start = array("I", [0, 0])  # slot i spans _arena[start[i]:start[i + 1]]; slot 0 is ""
+        self._slot_by_hash: dict[int, int] = {hash(""): 0}
+        self._odd: dict[tuple[int, str], Any] = {}  # (seq, key) -> value that does not fit its column
+        self._extra: dict[int, dict[str, Any]] = {}  # seq -> keys beyond the router's six
+        self._kind = array("B")
+        # secondary indexes: sorted sequence numbers per name id / kind id
+        self._by_sender: dict[int, array] = {}
+        self._by_recipient: dict[int, array] = {}
+        self._by_kind: dict[int, array] = {}
+        # messages that try to reach USER/planner through send_to but were routed elsewhere
+        self._final_attempts = array("I")
+
+    # ========================================================================
+    # writing
+    # ========================================================================
+
+    def append(self, entry: Mapping) -> int:
+        """store a transcript entry; returns its sequence number."""
+        seq = self._offset + len(self._message_ids)
+        sender, recipient, content = entry["from"], entry["to"], entry["content"]
+        self._workspace.append(self._intern(seq, "workspace_id", entry["workspace_id"]))
+        sender_id = self._intern(seq, "from", sender)
+        recipient_id = self._intern(seq, "to", recipient)
+        self._sender.append(sender_id)
+        self._recipient.append(recipient_id)
+        stamp, stamp_format = _pack_timestamp(entry["timestamp"])
+        if stamp_format == _RAW:
+            self._odd[seq, "timestamp"] = entry["timestamp"]
+        self._stamp.append(stamp)
+        self._stamp_kind.append(stamp_format)
+        self._message_ids.append(entry["message_id"])
+        self._content_slot.append(self._store_content(seq, content))
+
+        kind_id = _KIND_IDS[message_kind(content)]
+        self._kind.append(kind_id)
+        if type(sender) is str:
+            self._by_sender.setdefault(sender_id, array("I")).append(seq)
+        if type(recipient) is str:
+            self._by_recipient.setdefault(recipient_id, array("I")).append(seq)
+        self._by_kind.setdefault(kind_id, array("I")).append(seq)
+        if _is_final_attempt(recipient, content):
+            self._final_attempts.append(seq)
+
+        extra = {key: value for key, value in entry.items() if key not in _KEYS}
+        if extra:
+            self._extra[seq] = extra
+        return seq
+
+    def drop_before(self, seq: int) -> None:
+        """forget entries older than `seq`; storage is compacted in batches."""
+        if seq <= self.first_seq:
+            return
+        self.first_seq = min(seq, self.end_seq)
+        dead = self.first_seq - self._offset
+        if dead >= 1024 and dead >= len(self):
+            self._compact()
+
+    def _intern(self, seq: int, key: str, value: Any) -> int:
+        if type(value) is not str:
+            self._odd[seq, key] = value
+            return 0
+        name_id = self._name_ids.get(value)
+        if name_id is None:
+            name_id = self._name_ids[value] = len(self._names)
+            self._names.append(sys.intern(value))
+        return name_id
+
+    def _store_content(self, seq: int, content: Any) -> int:
+        if type(content) is not str:
+            self._odd[seq, "content"] = content
+            return 0
+        key = hash(content)
+        slot = self._slot_by_hash.get(key)
+        if slot is not None and self._content(slot) == content:
+            return slot
+        self._arena += content.encode("utf-8", "surrogatepass")
+        self._slot_start.append(len(self._arena))
+        if len(self._slot_by_hash) >= _DEDUP_CONTENTS:
+            self._slot_by_hash = {hash(""): 0}
+        slot = self._slot_by_hash[key] = len(self._slot_start) - 2
+        return slot
+
+    def _compact(self) -> None:
+        """rebuild the columns and the arena from the live entries."""
+        dead = self.first_seq - self._offset
+        self._content_slot = self._content_slot[dead:]
+        self._rebuild_arena()
+        for column in ("_workspace", "_sender", "_recipient", "_stamp", "_stamp_kind", "_kind"):
+            setattr(self, column, getattr(self, column)[dead:])
+        for index in (self._by_sender, self._by_recipient, self._by_kind):
+            for key, seqs in list(index.items()):
+                seqs = seqs[bisect.bisect_left(seqs, self.first_seq):]
+                if seqs:
+                    index[key] = seqs
+                else:
+                    del index[key]
+        self._final_attempts = self._final_attempts[bisect.bisect_left(self._final_attempts, self.first_seq):]
+        del self._message_ids[:dead]
+        self._odd = {key: value for key, value in self._odd.items() if key[0] >= self.first_seq}
+        self._extra = {seq: extra for seq, extra in self._extra.items() if seq >= self.first_seq}
+        self._offset = self.first_seq
+
+    def _rebuild_arena(self) -> None:
+        """re-store the contents `_content_slot` still references, dropping the rest."""
+        slots = self._content_slot
+        contents = {slot: self._content(slot) for slot in sorted(set(slots)) if slot != NOT_RESIDENT}
+        self._arena = bytearray()
+        self._slot_start = array("I", [0, 0])
+        self._slot_by_hash = {hash(""): 0}
+        renumbered = {slot: self._store_content(-1, content) for slot, content in contents.items()}
+        renumbered[NOT_RESIDENT] = NOT_RESIDENT
+        self._content_slot = array("I", (renumbered[slot] for slot in slots))
+
+    # ========================================================================
+    # reading
+    # ========================================================================
+
+    @property
+    def end_seq(self) -> int:
+        """sequence number the next entry will get."""
+        return self._offset + len(self._message_ids)
+
+    def __len__(self) -> int:
+        return self.end_seq - self.first_seq
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("transcript index out of range")
+        return TranscriptRecord(self, self.first_seq + index)
+
+    def __iter__(self) -> Iterator[TranscriptRecord]:
+        return self.records()
+
+    def records(self, since: Optional[int] = None) -> Iterator[TranscriptRecord]:
+        """record views of the entries with sequence number >= `since`."""
+        for seq in range(max(since or 0, self.first_seq), self.end_seq):
+            yield TranscriptRecord(self, seq)
+
+    def rows(self, since: Optional[int] = None, until: Optional[int] = None) -> Iterator[tuple]:
+        """
+        (seq, timestamp, workspace_id, from, to, message_id, content) tuples
+        of the entries with `since` <= seq < `until`.
+        """
+        until = self.end_seq if until is None else min(until, self.end_seq)
+        for seq in range(max(since or 0, self.first_seq), until):
+            yield (seq, *self.fields(seq))
+
+    def fields(self, seq: int) -> tuple:
+        """(timestamp, workspace_id, from, to, message_id, content) of one entry."""
+        pos = seq - self._offset
+        if not self.first_seq <= seq < self.end_seq:
+            raise IndexError(f"transcript entry {seq} is not live")
+        names = self._names
+        kind = self._stamp_kind[pos]
+        values = (
+            None if kind == _RAW else _unpack_timestamp(self._stamp[pos], kind),
+            names[self._workspace[pos]],
+            names[self._sender[pos]],
+            names[self._recipient[pos]],
+            self._message_ids[pos],
+            self._entry_content(seq, pos),
+        )
+        odd = self._odd
+        if odd:
+            values = tuple(odd.get((seq, key), value) for key, value in zip(_KEYS, values))
+        return values
+
+    def field(self, seq: int, key: str) -> Any:
+        """one of the six router keys of one entry, decoding only that column."""
+        pos = seq - self._offset
+        if seq < self.first_seq or pos >= len(self._message_ids):
+            raise IndexError(f"transcript entry {seq} is not live")
+        if self._odd and (seq, key) in self._odd:
+            return self._odd[(seq, key)]
+        if key == "to":
+            return self._names[self._recipient[pos]]
+        if key == "from":
+            return self._names[self._sender[pos]]
+        if key == "content":
+            return self._entry_content(seq, pos)
+        if key == "message_id":
+            return self._message_ids[pos]
+        if key == "workspace_id":
+            return self._names[self._workspace[pos]]
+        if key == "timestamp":
+            kind = self._stamp_kind[pos]
+            return None if kind == _RAW else _unpack_timestamp(self._stamp[pos], kind)
+        raise KeyError(key)
+
+    def entry(self, seq: int) -> dict[str, Any]:
+        """one entry as the dict the router would have stored."""
+        entry = dict(zip(_KEYS, self.fields(seq)))
+        extra = self._extra.get(seq)
+        if extra:
+            entry.update(extra)
+        return entry
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """the live entries as a list of dicts."""
+        return [self.entry(seq) for seq in range(self.first_seq, self.end_seq)]
+
+    def view(self) -> TranscriptView:
+        """the live entries as a sequence of records (the `get_transcript()` view)."""
+        return TranscriptView(self, self.first_seq, self.end_seq)
+
+    # ========================================================================
+    # indexed queries
+    # ========================================================================
+
+    def select(
+        self,
+        from_: str | Iterable[str] | None = None,
+        to: str | Iterable[str] | None = None,
+        kind: Optional[str] = None,
+        since: Optional[int] = None,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        sequence numbers of the live entries matching every given filter,
+        oldest first (newest first with `reverse`).
+
+        `from_` and `to` take a name or a collection of names; `since` is
+        a sequence number (inclusive).
+        """
+        lo = max(since or 0, self.first_seq)
+        filters = []
+        if from_ is not None:
+            filters.append(self._seqs(self._by_sender, self._name_set(from_), lo))
+        if to is not None:
+            filters.append(self._seqs(self._by_recipient, self._name_set(to), lo))
+        if kind is not None:
+            if kind not in _KIND_IDS:
+                raise ValueError(f"unknown message kind {kind!r}, expected one of {KINDS}")
+            filters.append(self._seqs(self._by_kind, {_KIND_IDS[kind]}, lo))
+        if not filters:
+            seqs = range(lo, self.end_seq)
+            return iter(reversed(seqs) if reverse else seqs)
+
+        # walk the shortest candidate list, check the other filters per entry
+        seqs, start = min(filters, key=lambda candidates: len(candidates[0]) - candidates[1])
+        return self._matching(seqs, start, len(seqs), from_, to, kind, reverse)
+
+    def _matching(
+        self, seqs: Any, start: int, stop: int, from_: Any, to: Any, kind: Optional[str], reverse: bool
+    ) -> Iterator[int]:
+        sender_ids = self._name_set(from_) if from_ is not None else None
+        recipient_ids = self._name_set(to) if to is not None else None
+        kind_id = _KIND_IDS[kind] if kind is not None else None
+        odd = self._odd
+        for i in (range(stop - 1, start - 1, -1) if reverse else range(start, stop)):
+            seq = seqs[i]
+            if seq < self.first_seq:
+                continue  # dropped while iterating
+            pos = seq - self._offset
+            if sender_ids is not None and (self._sender[pos] not in sender_ids or (seq, "from") in odd):
+                continue
+            if recipient_ids is not None and (self._recipient[pos] not in recipient_ids or (seq, "to") in odd):
+                continue
+            if kind_id is not None and self._kind[pos] != kind_id:
+                continue
+            yield seq
+
+    def last(self, **filters: Any) -> Optional[int]:
+        """sequence number of the newest entry matching `filters` (see `select`)."""
+        return next(self.select(reverse=True, **filters), None)
+
+    def count(self, **filters: Any) -> int:
+        """number of live entries matching `filters` (see `select`)."""
+        if len(filters) == 1:
+            (key, value), = filters.items()
+            if key == "kind" or (key in ("from_", "to") and isinstance(value, str)):
+                index = {"from_": self._by_sender, "to": self._by_recipient, "kind": self._by_kind}[key]
+                if key == "kind":
+                    if value not in _KIND_IDS:
+                        raise ValueError(f"unknown message kind {value!r}, expected one of {KINDS}")
+                    ids = {_KIND_IDS[value]}
+                else:
+                    ids = self._name_set(value)
+                seqs, start = self._seqs(index, ids, self.first_seq)
+                return len(seqs) - start
+        return sum(1 for _ in self.select(**filters))
+
+    def final_attempts(self) -> int:
+        """entries whose content addresses USER/planner but that were routed elsewhere."""
+        attempts = self._final_attempts
+        return len(attempts) - bisect.bisect_left(attempts, self.first_seq)
+
+    def _name_set(self, names: str | Iterable[str]) -> set[int]:
+        if isinstance(names, str):
+            names = (names,)
+        ids = self._name_ids
+        return {ids[name] for name in names if name in ids}
+
+    def _seqs(self, index: dict[int, array], keys: set[int], lo: int) -> tuple[Any, int]:
+        """(sorted sequence numbers, position of the first one >= lo) under the given index keys."""
+        parts = [index[key] for key in keys if key in index]
+        if len(parts) == 1:
+            return parts[0], bisect.bisect_left(parts[0], lo)
+        merged = [seq for seq in heapq.merge(*parts) if seq >= lo]
+        return merged, 0
+
+    def message_id(self, seq: int) -> Any:
+        return self._message_ids[seq - self._offset]
+
+    def _entry_content(self, seq: int, pos: int) -> str:
+        return self._content(self._content_slot[pos])
+
+    def _content(self, slot: int) -> str:
+        start = self._slot_start
+        return self._arena[start[slot]:start[slot + 1]].decode("utf-8", "surrogatepass")
+
+    @property
+    def nbytes(self) -> int:
+        """approximate bytes held by the columns, arena and message ids."""
+        columns = (self._workspace, self._sender, self._recipient, self._stamp, self._stamp_kind,
+                   self._content_slot, self._slot_start)
+        return (
+            sum(column.itemsize * len(column) for column in columns)
+            + len(self._arena)
+            + sys.getsizeof(self._message_ids)
+            + sum(sys.getsizeof(name) for name in self._names)
+        )
+
+
+class TranscriptRecord(Mapping):
+    """
+    read-only view of one `CompactTranscript` entry, keyed like the router's
+    dicts. each key is read from its own column when accessed: reading
+    "from" does not decode the content or the timestamp. the content is
+    decoded once per record.
+    """
+
+    __slots__ = ("_store", "seq", "_content")
+
+    def __init__(self, store: CompactTranscript, seq: int):
+        self._store = store
+        self.seq = seq
+        self._content: Optional[str] = None
+
+    @property
+    def sender(self) -> str:
+        return self._store.field(self.seq, "from")
+
+    @property
+    def recipient(self) -> str:
+        return self._store.field(self.seq, "to")
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self._store.field(self.seq, "content")
+        return self._content
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "content":
+            return self.content
+        if key in _KEY_INDEX:
+            return self._store.field(self.seq, key)
+        return self._store._extra.get(self.seq, {})[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # the library reads entries with .get(); skip Mapping.get's extra call
+        if key == "content":
+            return self.content
+        if key in _KEY_INDEX:
+            return self._store.field(self.seq, key)
+        return self._store._extra.get(self.seq, {}).get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _KEYS
+        yield from self._store._extra.get(self.seq, ())
+
+    def __len__(self) -> int:
+        return len(_KEYS) + len(self._store._extra.get(self.seq, ()))
+
+    def __repr__(self) -> str:
+        return f"TranscriptRecord({self._store.entry(self.seq)!r})"
+
+
+class TranscriptView(Sequence):
+    """
+    the entries of a `CompactTranscript` between two sequence numbers, as
+    `TranscriptRecord`s. entries appended later are not part of the view;
+    entries dropped by the size limit can no longer be read through it.
+    slicing returns a narrower view.
+
+    the first iteration keeps its records, so code that walks the view
+    several times (`Workspace.get_completion_status` does three passes)
+    decodes each content once; the records go away with the view.
+    """
+
+    __slots__ = ("_store", "_start", "_stop", "_records")
+
+    def __init__(self, store: CompactTranscript, start: int, stop: int):
+        self._store = store
+        self._start = start
+        self._stop = stop
+        self._records: Optional[list[TranscriptRecord]] = None
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return TranscriptView(self._store, self._start + start, self._start + max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("transcript index out of range")
+        if self._records is not None:
+            return self._records[index]
+        return TranscriptRecord(self._store, self._start + index)
+
+    def __iter__(self) -> Iterator[TranscriptRecord]:
+        if self._records is None:
+            store = self._store
+            self._records = [TranscriptRecord(store, seq) for seq in range(self._start, self._stop)]
+        return iter(self._records)
+
+    def __reversed__(self) -> Iterator[TranscriptRecord]:
+        if self._records is not None:
+            return reversed(self._records)
+        store = self._store
+        return (TranscriptRecord(store, seq) for seq in range(self._stop - 1, self._start - 1, -1))
+
+    def __repr__(self) -> str:
+        return f"TranscriptView({self._stop - self._start} entries from {self._start})"
+
+
+def message_kind(content: Any) -> str:
+    """classify transcript content the way the library's completion and history code does."""
+    if type(content) is not str:
+        return "message"
+    if content == "[startup]":
+        return "startup"
+    if content == "":
+        return "empty"
+    if content.startswith("[subteam_result]"):
+        return "subteam_result"
+    return "message"
+
+
+def _is_final_attempt(recipient: Any, content: Any) -> bool:
+    """same test as `Workspace.get_completion_status()` for a malformed USER/planner reply."""
+    if recipient in ("USER", "planner") or type(content) is not str or '"send_to"' not in content:
+        return False
+    return (
+        '"send_to": "USER"' in content or '"send_to":"USER"' in content
+        or '"send_to": "planner"' in content or '"send_to":"planner"' in content
+    )
+
+
+def _pack_timestamp(timestamp: Any) -> tuple[int, int]:
+    """(microseconds since epoch, format) of an isoformat timestamp, or (0, _RAW)."""
+    if type(timestamp) is not str:
+        return 0, _RAW
+    kind = _ISO_Z if timestamp.endswith("Z") else _ISO
+    text = timestamp[:-1] if kind == _ISO_Z else timestamp
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return 0, _RAW
+    if moment.tzinfo is not None or moment.isoformat() != text:
+        return 0, _RAW
+    delta = moment - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds, kind
+
+
+def _unpack_timestamp(micros: int, kind: int) -> str:
+    text = (_EPOCH + timedelta(microseconds=micros)).isoformat()
+    return text + "Z" if kind == _ISO_Z else text
+
+
+# ============================================================================
+# router and workspace manager
+# ============================================================================
+
+class CompactMessageRouter(synqed.MessageRouter):
+    """
+    `MessageRouter` whose transcript is a `CompactTranscript`.
+
+    routing, validation, deduplication and the size limit behave as in the
+    base class; `get_transcript()` returns a `TranscriptView` of records
+    instead of a list of dicts.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._transcript = self._new_transcript()
+
+    def _new_transcript(self) -> CompactTranscript:
+        return CompactTranscript()
+
+    @classmethod
+    def from_router(cls, router: synqed.MessageRouter, **kwargs: Any) -> CompactMessageRouter:
+        """a compact copy of `router`: same agents, counter and transcript."""
+        compact = cls(**kwargs)
+        compact._agents = router._agents
+        compact._message_counter = router._message_counter
+        for entry in router.get_transcript():
+            compact._add_transcript_entry(dict(entry))
+        return compact
+
+    def _add_transcript_entry(self, entry: dict[str, Any]) -> None:
+        if not isinstance(entry, dict):
+            logger.warning("router: invalid transcript entry: not a dictionary, ignoring")
+            return
+        missing_keys = set(_KEYS) - set(entry.keys())
+        if missing_keys:
+            logger.warning(f"router: invalid transcript entry: missing keys {missing_keys}, ignoring")
+            return
+        msg_id = entry.get("message_id")
+        if msg_id in self._transcripted_message_ids:
+            logger.debug(f"router: duplicate transcript entry '{msg_id}', ignoring")
+            return
+
+        transcript = self._transcript
+        transcript.append(entry)
+        self._transcripted_message_ids.add(msg_id)
+
+        # read at call time, like the base class, so the limit stays configurable
+        excess_count = len(transcript) - synqed.router.MAX_TRANSCRIPT_SIZE
+        if excess_count > 0:
+            for seq in range(transcript.first_seq, transcript.first_seq + excess_count):
+                self._transcripted_message_ids.discard(transcript.message_id(seq))
+            transcript.drop_before(transcript.first_seq + excess_count)
+            logger.debug(f"router: transcript size limit exceeded, removed {excess_count} oldest entries")
+
+    def get_transcript(self) -> TranscriptView:
+        return self._transcript.view()
+
+    def iter_transcript(self, since: Optional[int] = None) -> Iterator[TranscriptRecord]:
+        """record views of the transcript, optionally from sequence number `since`."""
+        return self._transcript.records(since)
+
+    def last_message(self, **filters: Any) -> Optional[TranscriptRecord]:
+        """newest entry matching `filters` (from_, to, kind, since), or None."""
+        seq = self._transcript.last(**filters)
+        return None if seq is None else TranscriptRecord(self._transcript, seq)
+
+    def messages(self, **filters: Any) -> list[TranscriptRecord]:
+        """entries matching `filters` (from_, to, kind, since), oldest first."""
+        transcript = self._transcript
+        return [TranscriptRecord(transcript, seq) for seq in transcript.select(**filters)]
+
+    def count(self, **filters: Any) -> int:
+        """number of entries matching `filters` (from_, to, kind, since)."""
+        return self._transcript.count(**filters)
+
+    def clear_transcript(self) -> None:
+        self._transcript = self._new_transcript()
+        self._transcripted_message_ids.clear()
+        self._message_counter = 0
+        logger.debug("router: transcript cleared")
+
+
+def use_compact_transcript(workspace: synqed.Workspace) -> CompactMessageRouter:
+    """switch a workspace to a `CompactMessageRouter` (a no-op if it already uses one)."""
+    if not isinstance(workspace.router, CompactMessageRouter):
+        workspace.router = CompactMessageRouter.from_router(workspace.router)
+    return workspace.router
+
+
+class CompactWorkspaceManager(synqed.WorkspaceManager):
+    """workspace manager whose workspaces store their transcripts compactly."""
+
+    async def create_workspace(self, *args, **kwargs) -> synqed.Workspace:
+        workspace = await super().create_workspace(*args, **kwargs)
+        use_compact_transcript(workspace)
+        return workspace
+
+
+# ============================================================================
+# queries on any router
+# ============================================================================
+
+def last_message(router: synqed.MessageRouter, **filters: Any) -> Optional[Mapping]:
+    """
+    newest transcript entry matching `filters` (from_, to, kind, since).
+
+    indexed for a `CompactMessageRouter`, a reverse scan otherwise.
+    """
+    if isinstance(router, CompactMessageRouter):
+        return router.last_message(**filters)
+    return next(_scan(router.get_transcript(), reverse=True, **filters), None)
+
+
+def messages(router: synqed.MessageRouter, **filters: Any) -> list[Mapping]:
+    """transcript entries matching `filters` (from_, to, kind, since), oldest first."""
+    if isinstance(router, CompactMessageRouter):
+        return router.messages(**filters)
+    return list(_scan(router.get_transcript(), **filters))
+
+
+def count(router: synqed.MessageRouter, **filters: Any) -> int:
+    """number of transcript entries matching `filters` (from_, to, kind, since)."""
+    if isinstance(router, CompactMessageRouter):
+        return router.count(**filters)
+    return sum(1 for _ in _scan(router.get_transcript(), **filters))
+
+
+def completion_status(workspace: synqed.Workspace) -> dict:
+    """`workspace.get_completion_status()`, answered from the transcript indexes when available."""
+    router = workspace.router
+    if not isinstance(router, CompactMessageRouter):
+        return workspace.get_completion_status()
+    transcript = router._transcript
+    completed = transcript.last(to="USER", kind="message") is not None
+    attempted = transcript.final_attempts()
+    if completed:
+        status_message = "✅ Task completed successfully (message sent to planner/USER)"
+    elif attempted > 0:
+        status_message = (
+            f"⚠️  Task incomplete ({attempted} attempt(s) to send to planner/USER, "
+            f"but JSON was malformed/truncated)\n"
+            f"    Suggestion: Increase max_tokens to allow complete responses"
+        )
+    else:
+        status_message = "⚠️  Task incomplete (no message sent to USER)"
+    return {
+        "completed": completed,
+        "attempted": attempted,
+        "total_messages": transcript.count(kind="message"),
+        "status_message": status_message,
+    }
+
+
+def _scan(
+    transcript: Sequence[Mapping],
+    from_: str | Iterable[str] | None = None,
+    to: str | Iterable[str] | None = None,
+    kind: Optional[str] = None,
+    since: Optional[int] = None,
+    reverse: bool = False,
+) -> Iterator[Mapping]:
+    """filter a `get_transcript()` result like `CompactTranscript.select` (`since` is a list index)."""
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"unknown message kind {kind!r}, expected one of {KINDS}")
+    senders = {from_} if isinstance(from_, str) else None if from_ is None else set(from_)
+    recipients = {to} if isinstance(to, str) else None if to is None else set(to)
+    entries = transcript[since or 0:]
+    for entry in (reversed(entries) if reverse else entries):
+        if senders is not None and entry.get("from") not in senders:
+            continue
+        if recipients is not None and entry.get("to") not in recipients:
+            continue
+        if kind is not None and message_kind(entry.get("content", "")) != kind:
+            continue
+        yield entry
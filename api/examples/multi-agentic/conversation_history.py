@@ -0,0 +1,455 @@
+"""
+incremental, memoized conversation history rendering for synqed workspaces.
+
+`AgentLogicContext.get_conversation_history()` re-reads the whole workspace
+transcript on every call: it copies it, json-parses every message and
+re-formats every line. agents call it once per turn, so a run of n turns
+does o(n^2) parsing and string building.
+
+`HistoryCache` keeps, per `MessageRouter`, the parsed content of every
+transcript entry (shared by all agents) and one rendered view per
+(agent, format, workspace_wide, include_system_messages, parse_json_content).
+a call only parses and formats the entries appended since the previous call
+for that view, and returns exactly what `get_conversation_history()` would.
+
+token budgets: `max_tokens` bounds the rendered history (estimated at ~4
+characters per token, or `HistoryCache.count_tokens`). the most recent
+messages are kept verbatim, always including the latest one; older ones are
+- dropped (`strategy="window"`), or
+- compressed (`strategy="summarize"`): older messages are grouped into
+  ranges aligned to `summary_block` transcript entries and each range is
+  replaced by one summary. summaries are computed once per range and view
+  filter and shared by every agent with a workspace-wide view, so a long
+  conversation costs one summary per block, not one per turn. the oldest
+  summaries are dropped when they no longer fit in the budget.
+
+the default summarizer is extractive (one shortened line per message, no llm
+call); set `HistoryCache.summarizer` to plug in another one.
+
+usage:
+    history = history_cache(workspace.router)
+    text = history.render(context, workspace_wide=True)
+    text = history.render(context, max_tokens=2000, strategy="summarize")
+
+`EventDrivenExecutionEngine(cached_history=True)` (the default) serves
+`context.get_conversation_history()` from the cache, so agent logic does not
+change; its `history_max_tokens`/`history_strategy` options set the budget
+used when agent logic does not pass one.
+"""
+
+from __future__ import annotations
+
+import json
+import bisect
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from compact_transcript import CompactTranscript
+
+_caches: "weakref.WeakKeyDictionary[Any, HistoryCache]" = weakref.WeakKeyDictionary()
+
+HISTORY_STRATEGIES = ("window", "summarize")
+
+
+def history_cache(router: Any) -> HistoryCache:
+    """return the history cache of a router, creating it on first use."""
+    cache = _caches.get(router)
+    if cache is None:
+        cache = _caches[router] = HistoryCache(router)
+    return cache
+
+
+@dataclass(eq=False)
+class _View:
+    """rendered history for one (agent, options) combination."""
+    parts: list = field(default_factory=list)  # str parts, or raw message dicts
+    indices: list[int] = field(default_factory=list)  # absolute transcript index of each part
+    tokens: list[int] = field(default_factory=list)  # estimated tokens of each part
+    consumed: int = 0  # absolute index of the first entry not yet rendered
+    text: str = ""  # "\n\n".join(parts), text views only
+
+    def drop_before(self, index: int) -> None:
+        """forget parts rendered from entries the router has trimmed."""
+        count = bisect.bisect_left(self.indices, index)
+        if not count:
+            return
+        if self.text:
+            # each dropped part is followed by its "\n\n" separator
+            self.text = self.text[sum(len(part) + 2 for part in self.parts[:count]):]
+        del self.parts[:count]
+        del self.indices[:count]
+        del self.tokens[:count]
+
+
+class HistoryCache:
+    """
+    incrementally maintained conversation history renderings of one router.
+
+    the router's transcript is append-only, except that it drops its oldest
+    entries past its size limit and can be cleared; both replace the
+    underlying list. a trim drops the matching prefix of every view and the
+    summaries of trimmed ranges, a clear resets the cache.
+    """
+
+    def __init__(
+        self,
+        router: Any,
+        summarizer: Optional[Callable[[list[dict]], str]] = None,
+        summary_block: int = 20,
+        summary_share: float = 0.25,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        """
+        args:
+            router: the workspace's `MessageRouter`.
+            summarizer: maps raw messages (sender, recipient, content) to a
+                summary (default: `summarize_messages`).
+            summary_block: transcript entries per summarized range.
+            summary_share: fraction of `max_tokens` reserved for summaries
+                when `strategy="summarize"`.
+            count_tokens: token estimate for a string (default: ~4 chars
+                per token).
+        """
+        if summary_block < 1 or not 0 <= summary_share < 1:
+            raise ValueError("summary_block must be >= 1 and summary_share in [0, 1)")
+        self.router = router
+        self.summarizer = summarizer or summarize_messages
+        self.summary_block = summary_block
+        self.summary_share = summary_share
+        self.count_tokens = count_tokens or estimate_tokens
+        self._transcript: Optional[list] = None
+        self._base = 0  # absolute index of self._transcript[0]
+        self._display: list[str] = []  # json "content" field or raw content, per live entry
+        self._views: dict[tuple, _View] = {}
+        # (lo, hi, agent or None, include_system_messages, parse_json_content) -> (messages, summary)
+        self._summaries: dict[tuple, tuple[int, str]] = {}
+        self.rendered_entries = 0  # entries formatted, summed over views
+        self.summaries_computed = 0
+        self.summary_hits = 0
+        self.resets = 0
+
+    def bind(
+        self,
+        context: Any,
+        max_tokens: Optional[int] = None,
+        strategy: str = "window",
+    ) -> Callable[..., Any]:
+        """
+        a drop-in `get_conversation_history` for `context`; `max_tokens` and
+        `strategy` are the defaults for calls that do not pass them.
+        """
+        default_max_tokens, default_strategy = max_tokens, strategy
+
+        def get_conversation_history(
+            format: str = "text",
+            include_system_messages: bool = False,
+            parse_json_content: bool = True,
+            workspace_wide: bool = True,
+            max_messages: Optional[int] = None,
+            max_tokens: Optional[int] = None,
+            strategy: Optional[str] = None,
+        ) -> str | list[dict]:
+            return self.render(
+                context,
+                format=format,
+                include_system_messages=include_system_messages,
+                parse_json_content=parse_json_content,
+                workspace_wide=workspace_wide,
+                max_messages=max_messages,
+                max_tokens=default_max_tokens if max_tokens is None else max_tokens,
+                strategy=strategy or default_strategy,
+            )
+
+        return get_conversation_history
+
+    def render(
+        self,
+        context: Any,
+        format: str = "text",
+        include_system_messages: bool = False,
+        parse_json_content: bool = True,
+        workspace_wide: bool = True,
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        strategy: str = "window",
+    ) -> str | list[dict]:
+        """
+        same arguments and result as `AgentLogicContext.get_conversation_history`,
+        plus an optional token budget (`max_tokens`, `strategy`).
+        """
+        if strategy not in HISTORY_STRATEGIES:
+            raise ValueError(f"unknown history strategy {strategy!r}, expected one of {HISTORY_STRATEGIES}")
+        agent_name = context.agent_name
+        if not context.workspace or not agent_name:
+            return "" if format == "text" else []
+
+        transcript = self._sync()
+        end = self._base + len(transcript)
+        key = (agent_name, format == "text", workspace_wide, include_system_messages, parse_json_content)
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = _View(consumed=self._base)
+        if view.consumed < end:
+            self._extend(view, transcript, *key)
+
+        start = 0
+        if max_messages is not None and len(transcript) > max_messages:
+            start = bisect.bisect_left(view.indices, end - max_messages)
+
+        latest = context.latest_message
+        footer = ""
+        if format == "text" and latest and latest.from_agent:
+            footer = (
+                f"\n\n\n>>> Current message is FROM: {latest.from_agent}"
+                f"\n\n>>> You should respond TO: {latest.from_agent}"
+            )
+
+        summaries: list = []
+        if max_tokens is not None and start < len(view.parts):
+            budget = max_tokens - (self.count_tokens(footer) if footer else 0)
+            start, summaries = self._fit(view, key, start, budget, strategy)
+
+        if format != "text":
+            return summaries + [dict(message) for message in view.parts[start:]]
+
+        if start == len(view.parts):
+            return ""
+        if start == 0 and not summaries:
+            return view.text + footer
+        return "\n\n".join([*summaries, *view.parts[start:]]) + footer
+
+    # ========================================================================
+    # token budgets
+    # ========================================================================
+
+    def _fit(self, view: _View, key: tuple, start: int, budget: int, strategy: str) -> tuple[int, list]:
+        """
+        first verbatim part and the summary parts that fit in `budget`.
+
+        the latest part is always kept, even if it alone exceeds the budget.
+        """
+        tokens = view.tokens
+        verbatim_budget = budget if strategy == "window" else int(budget * (1 - self.summary_share))
+        first = len(view.parts) - 1
+        used = tokens[first]
+        while first > start and used + tokens[first - 1] + 1 <= verbatim_budget:
+            first -= 1
+            used += tokens[first] + 1  # +1 for the "\n\n" separator
+        if strategy == "window" or first == start:
+            return first, []
+
+        # older parts are replaced by the summaries of their ranges. ranges
+        # end on block boundaries, so they stay the same from turn to turn:
+        # the verbatim window starts at the next boundary, unless that would
+        # leave out the latest part
+        agent_name, as_text, workspace_wide, include_system_messages, parse_json_content = key
+        block = self.summary_block
+        lo, hi = view.indices[start], view.indices[first]
+        aligned = -(-hi // block) * block
+        if aligned != hi and aligned <= view.indices[-1]:
+            skipped = bisect.bisect_left(view.indices, aligned) - first
+            used -= sum(tokens[first:first + skipped]) + skipped
+            first += skipped
+            hi = aligned
+        ranges = []
+        while lo < hi:
+            end = min((lo // block + 1) * block, hi)
+            ranges.append((lo, end))
+            lo = end
+
+        summaries: list = []
+        remaining = budget - used
+        for lo, hi in reversed(ranges):
+            summary_key = (lo, hi, None if workspace_wide else agent_name, include_system_messages, parse_json_content)
+            count, summary = self._summary(summary_key)
+            if not count:
+                continue
+            label = f"[SUMMARY of {count} earlier message{'s' if count != 1 else ''}]"
+            cost = self.count_tokens(label) + self.count_tokens(summary) + 1
+            if cost > remaining:
+                break  # older summaries are dropped
+            remaining -= cost
+            if as_text:
+                summaries.append(f"{label}\n{summary}")
+            else:
+                summaries.append({
+                    "sender": "SUMMARY",
+                    "recipient": "ALL",
+                    "content": summary,
+                    "original_content": summary,
+                    "timestamp": "",
+                })
+        summaries.reverse()
+        return first, summaries
+
+    def _summary(self, summary_key: tuple) -> tuple[int, str]:
+        """(message count, summary) of a transcript range, computed once."""
+        cached = self._summaries.get(summary_key)
+        if cached is not None:
+            self.summary_hits += 1
+            return cached
+
+        lo, hi, agent_name, include_system_messages, parse_json_content = summary_key
+        messages = []
+        for index, sender, recipient, content, _ in self._rows(lo, hi):
+            if not _visible(sender, recipient, content, agent_name, include_system_messages):
+                continue
+            messages.append({
+                "sender": sender,
+                "recipient": recipient,
+                "content": self._display[index - self._base] if parse_json_content else content,
+            })
+        cached = self._summaries[summary_key] = (len(messages), self.summarizer(messages) if messages else "")
+        self.summaries_computed += 1
+        return cached
+
+    def _sync(self) -> list | CompactTranscript:
+        """parse transcript entries appended since the last call."""
+        # MessageRouter.get_transcript() returns a copy; read the store itself
+        transcript = self.router._transcript
+        trimmed = self._trimmed(transcript)
+        if trimmed is None:
+            if self._transcript is not None:
+                self.resets += 1
+            self._base = transcript.first_seq if isinstance(transcript, CompactTranscript) else 0
+            self._display = []
+            self._views.clear()
+            self._summaries.clear()
+        elif trimmed:
+            self._base += trimmed
+            del self._display[:trimmed]
+            for view in self._views.values():
+                view.drop_before(self._base)
+            for summary_key in [k for k in self._summaries if k[0] < self._base]:
+                del self._summaries[summary_key]
+        self._transcript = transcript
+        for _, _, _, content, _ in self._rows(self._base + len(self._display), self._base + len(transcript)):
+            self._display.append(_display_content(content))
+        return transcript
+
+    def _rows(self, lo: int, hi: int) -> Iterator[tuple]:
+        """(index, from, to, content, timestamp) of the live entries with lo <= index < hi."""
+        transcript, base = self._transcript, self._base
+        if isinstance(transcript, CompactTranscript):
+            # a compact transcript's sequence numbers are the absolute indexes
+            for seq, timestamp, _, sender, recipient, _, content in transcript.rows(lo, hi):
+                yield seq, sender, recipient, content, timestamp
+            return
+        for index in range(max(lo, base), hi):
+            entry = transcript[index - base]
+            yield index, entry.get("from", ""), entry.get("to", ""), entry.get("content", ""), entry.get("timestamp", "")
+
+    def _trimmed(self, transcript: list | CompactTranscript) -> Optional[int]:
+        """
+        entries dropped from the front if `transcript` continues the one
+        seen last time, else None.
+        """
+        previous = self._transcript
+        if isinstance(transcript, CompactTranscript):
+            # trimmed in place; a cleared router gets a new store
+            return transcript.first_seq - self._base if transcript is previous else None
+        if transcript is previous:
+            return 0
+        if not previous or not transcript:
+            return None if previous else 0
+        seen = len(self._display)
+        first = transcript[0]
+        # the router trims a few entries at a time, so the scan is short
+        for offset in range(seen):
+            if previous[offset] is first:
+                break
+        else:
+            return None
+        kept = seen - offset
+        if len(transcript) < kept or transcript[kept - 1] is not previous[seen - 1]:
+            return None
+        return offset
+
+    def _extend(
+        self,
+        view: _View,
+        transcript: list | CompactTranscript,
+        agent_name: str,
+        as_text: bool,
+        workspace_wide: bool,
+        include_system_messages: bool,
+        parse_json_content: bool,
+    ) -> None:
+        new_parts = []
+        base = self._base
+        # entries trimmed before this view rendered them are skipped
+        for index, sender, recipient, content, timestamp in self._rows(max(view.consumed, base), base + len(transcript)):
+            if not _visible(sender, recipient, content, None if workspace_wide else agent_name, include_system_messages):
+                continue
+
+            display_content = self._display[index - base] if parse_json_content else content
+            if not as_text:
+                part = {
+                    "sender": sender,
+                    "recipient": recipient,
+                    "content": display_content,
+                    "original_content": content,
+                    "timestamp": timestamp,
+                }
+            elif sender == "USER":
+                part = f"[USER]\n{display_content}"
+            elif sender == agent_name:
+                target = "broadcast" if recipient == "ALL" else f"to {recipient}"
+                part = f"[YOU {target}]\n{display_content}"
+            elif workspace_wide:
+                target = "broadcast" if recipient == "ALL" else f"to {recipient}"
+                part = f"[{sender} {target}]\n{display_content}"
+            else:
+                part = f"[{sender}]\n{display_content}"
+            new_parts.append(part)
+            view.indices.append(index)
+            view.tokens.append(self.count_tokens(part if as_text else str(display_content)))
+
+        view.consumed = base + len(transcript)
+        self.rendered_entries += len(new_parts)
+        if not new_parts:
+            return
+        if as_text:
+            joined = "\n\n".join(new_parts)
+            view.text = f"{view.text}\n\n{joined}" if view.parts else joined
+        view.parts.extend(new_parts)
+
+
+def estimate_tokens(text: str) -> int:
+    """rough token count (~4 characters per token for english text)."""
+    return (len(text) + 3) // 4
+
+
+def summarize_messages(messages: list[dict], width: int = 100) -> str:
+    """extractive summary: one line per message, content shortened to `width` characters."""
+    lines = []
+    for message in messages:
+        content = " ".join(str(message["content"]).split())
+        if len(content) > width:
+            content = content[:width - 3] + "..."
+        lines.append(f"- {message['sender']} to {message['recipient']}: {content}")
+    return "\n".join(lines)
+
+
+def _visible(sender: str, recipient: str, content: str, agent_name: Optional[str], include_system_messages: bool) -> bool:
+    """
+    whether get_conversation_history() shows an entry; `agent_name` limits
+    the view to that agent's messages (workspace_wide=False).
+    """
+    if not include_system_messages and (content == "[startup]" or content.startswith("[subteam_result]")):
+        return False
+    return agent_name is None or recipient == agent_name or sender == agent_name
+
+
+def _display_content(content: str) -> str:
+    """the "content" field of a json message, or the content as-is."""
+    if not isinstance(content, str) or not content.lstrip().startswith("{"):
+        return content  # json.loads would fail or yield a non-dict
+    try:
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return content
+    if isinstance(parsed, dict) and "content" in parsed:
+        return parsed["content"]
+    return content
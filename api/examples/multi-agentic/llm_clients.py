@@ -0,0 +1,465 @@
+"""
+pooled, shared llm provider clients for agent logic.
+
+agent logic that builds a new `anthropic.AsyncAnthropic(...)` on every turn
+pays for it on every turn: each sdk client owns its own httpx connection
+pool, so the turn builds the client (ssl context, certificate bundle), opens
+a fresh tcp connection with a tls handshake, and throws the kept-alive
+connection away when it ends. the examples' agent logic takes its client
+from the pool instead; examples outside this directory put it on
+`sys.path` to import `llm_for`.
+
+`LLMClientPool` owns one sdk client per (provider, api key, base url) and
+event loop, so all agents calling the same provider with the same key
+share its connection pool:
+- connection limits (`max_connections`, `max_keepalive_connections`,
+  `keepalive_expiry`) bound how many sockets a large hierarchy opens.
+- http/2 when the `h2` package is installed (many turns multiplexed over
+  one connection); otherwise http/1.1 keep-alive.
+- clients are keyed by event loop as well: httpx connections cannot move
+  between loops, and each `asyncio.run()` (or shard process) gets its own.
+
+`EventDrivenExecutionEngine` hands every agent turn a handle to its pool as
+`context.llm` (see `llm_for` for logic that may also run under the base
+engine):
+
+    async def writer_logic(context):
+        client = llm_for(context).anthropic()  # shared AsyncAnthropic
+        resp = await client.messages.create(...)
+
+`context.llm.complete(**request)` sends one request through the pool and
+coalesces concurrent ones, for fan-outs where a scheduler tick wakes many
+agents at once:
+- identical requests (same provider, key and parameters) in flight at the
+  same time are sent once; every caller gets the same response.
+- with `CompletionPolicy(batch=True)`, anthropic requests arriving within
+  `batch_window` seconds of each other go to the message batches api as one
+  batch (lower cost, higher rate limits, but minutes of latency). past
+  `max_wait` seconds the batch is cancelled and its requests are sent
+  directly. openai requests are always sent directly.
+- policies are per workspace (`pool.set_policy(workspace_id, policy)`),
+  falling back to `pool.default_policy`.
+- prompt-cache usage (cached vs uncached input tokens) is recorded per
+  workspace in `pool.prompt_usage`; see prompt_cache.py for prompt layouts
+  that hit the cache.
+
+the pool holds configuration only when pickled, so an engine that carries
+one can be shipped to shard processes (workspace_sharding.py).
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+import logging
+import itertools
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("anthropic", "openai")
+_API_KEY_ENV = {"anthropic": "ANTHROPIC_API_KEY", "openai": "OPENAI_API_KEY"}
+
+
+@dataclass
+class PoolStats:
+    """
+    client pool counters.
+
+    attributes:
+        clients_created: sdk clients built (one per key and event loop).
+        clients_reused: requests for a client served by an existing one.
+        completions: `complete()` calls.
+        deduplicated: completions served by an identical request in flight.
+        batched: completions sent through the batches api.
+        batches: batches submitted.
+        batch_fallbacks: batched completions sent directly after `max_wait`.
+    """
+    clients_created: int = 0
+    clients_reused: int = 0
+    completions: int = 0
+    deduplicated: int = 0
+    batched: int = 0
+    batches: int = 0
+    batch_fallbacks: int = 0
+
+
+@dataclass
+class PromptUsage:
+    """
+    prompt tokens of one workspace's completions.
+
+    attributes:
+        requests: completions sent (deduplicated ones count once).
+        input_tokens: prompt tokens neither read from nor written to the cache.
+        cache_read_tokens: prompt tokens served from the provider's cache.
+        cache_write_tokens: prompt tokens written to the cache.
+    """
+    requests: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+
+    @property
+    def cached_ratio(self) -> float:
+        """share of prompt tokens read from the cache."""
+        return self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        self.requests += 1
+        if hasattr(usage, "prompt_tokens"):  # openai: cached tokens are part of prompt_tokens
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+            self.input_tokens += usage.prompt_tokens - cached
+            self.cache_read_tokens += cached
+        else:
+            self.input_tokens += usage.input_tokens or 0
+            self.cache_read_tokens += getattr(usage, "cache_read_input_tokens", None) or 0
+            self.cache_write_tokens += getattr(usage, "cache_creation_input_tokens", None) or 0
+
+
+@dataclass(frozen=True)
+class CompletionPolicy:
+    """
+    how `complete()` sends a workspace's requests.
+
+    attributes:
+        dedupe: share one in-flight request between identical requests.
+        batch: send anthropic requests through the message batches api.
+        batch_window: seconds to collect requests into one batch.
+        max_batch_size: requests per batch; a full batch is sent at once.
+        poll_interval: seconds between batch status checks.
+        max_wait: seconds to wait for a batch before cancelling it and
+            sending its requests directly (None: wait for the batch).
+    """
+    dedupe: bool = True
+    batch: bool = False
+    batch_window: float = 0.05
+    max_batch_size: int = 1000
+    poll_interval: float = 10.0
+    max_wait: Optional[float] = None
+
+
+class LLMClientPool:
+    """shared sdk clients per (provider, api key, base url) and event loop."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        http2: bool = True,
+        default_policy: CompletionPolicy = CompletionPolicy(),
+        **http_client_kwargs: Any,
+    ):
+        """
+        args:
+            max_connections: open connections allowed per client.
+            max_keepalive_connections: idle connections kept per client.
+            keepalive_expiry: seconds an idle connection is kept.
+            http2: negotiate http/2 when the `h2` package is available.
+            default_policy: `complete()` policy of workspaces without their own.
+            **http_client_kwargs: forwarded to the sdk's httpx client
+                (e.g. `timeout`, `verify`).
+        """
+        if max_connections < 1 or max_keepalive_connections < 0:
+            raise ValueError("max_connections must be >= 1 and max_keepalive_connections >= 0")
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _h2_available()
+        if http2 and not self.http2:
+            logger.info("llm client pool: h2 is not installed, using http/1.1 keep-alive")
+        self.http_client_kwargs = http_client_kwargs
+        self.default_policy = default_policy
+        self.policies: dict[str, CompletionPolicy] = {}
+        self.stats = PoolStats()
+        self.prompt_usage: dict[Optional[str], PromptUsage] = {}  # workspace id -> prompt tokens
+        self._clients: WeakKeyDictionary = WeakKeyDictionary()  # event loop -> {key: sdk client}
+        self._inflight: WeakKeyDictionary = WeakKeyDictionary()  # event loop -> {request key: task}
+        self._batchers: WeakKeyDictionary = WeakKeyDictionary()  # event loop -> {(client key, policy): _Batcher}
+
+    def client(self, provider: str = "anthropic", api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        """
+        the shared sdk client for `provider` in the running event loop.
+
+        `api_key` defaults to the provider's environment variable, as in
+        the sdks.
+        """
+        key = self._client_key(provider, api_key, base_url)
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = self._create(provider, api_key, base_url)
+            self.stats.clients_created += 1
+        else:
+            self.stats.clients_reused += 1
+        return client
+
+    def anthropic(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        """the shared `anthropic.AsyncAnthropic`."""
+        return self.client("anthropic", api_key, base_url)
+
+    def openai(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        """the shared `openai.AsyncOpenAI`."""
+        return self.client("openai", api_key, base_url)
+
+    def bind(self, context: Any) -> LLMHandle:
+        """the `context.llm` handle of one agent turn."""
+        return LLMHandle(self, context)
+
+    def _client_key(self, provider: str, api_key: Optional[str], base_url: Optional[str]) -> tuple:
+        if provider not in PROVIDERS:
+            raise ValueError(f"unknown provider {provider!r}, expected one of {PROVIDERS}")
+        return provider, api_key or os.environ.get(_API_KEY_ENV[provider]), base_url
+
+    def _create(self, provider: str, api_key: Optional[str], base_url: Optional[str]) -> Any:
+        import httpx
+
+        options = {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": self.http2,
+            **self.http_client_kwargs,
+        }
+        if provider == "anthropic":
+            import anthropic
+
+            return anthropic.AsyncAnthropic(
+                api_key=api_key, base_url=base_url, http_client=anthropic.DefaultAsyncHttpxClient(**options)
+            )
+        import openai
+
+        return openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=openai.DefaultAsyncHttpxClient(**options))
+
+    async def aclose(self) -> None:
+        """close the clients of the running event loop."""
+        loop = asyncio.get_running_loop()
+        self._inflight.pop(loop, None)
+        self._batchers.pop(loop, None)
+        clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            await client.close()
+
+    # ========================================================================
+    # completions: in-flight deduplication and batching
+    # ========================================================================
+
+    def set_policy(self, workspace_id: str, policy: Optional[CompletionPolicy]) -> None:
+        """set (or, with None, reset) the `complete()` policy of one workspace."""
+        if policy is None:
+            self.policies.pop(workspace_id, None)
+        else:
+            self.policies[workspace_id] = policy
+
+    def policy_for(self, workspace_id: Optional[str]) -> CompletionPolicy:
+        return self.policies.get(workspace_id, self.default_policy) if workspace_id else self.default_policy
+
+    async def complete(
+        self,
+        provider: str = "anthropic",
+        *,
+        workspace_id: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        **request: Any,
+    ) -> Any:
+        """
+        send one completion request (`messages.create` for anthropic,
+        `chat.completions.create` for openai) under the policy of
+        `workspace_id`; returns the sdk's response object.
+        """
+        self.stats.completions += 1
+        policy = self.policy_for(workspace_id)
+        client_key = self._client_key(provider, api_key, base_url)
+        if not policy.dedupe:
+            return await self._send(client_key, policy, request, workspace_id)
+
+        key = (client_key, json.dumps(request, sort_keys=True, default=repr))
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        task = inflight.get(key)
+        if task is None:
+            task = inflight[key] = asyncio.ensure_future(self._send(client_key, policy, request, workspace_id))
+            task.add_done_callback(lambda _, key=key: inflight.pop(key, None))
+        else:
+            self.stats.deduplicated += 1
+        # one caller giving up must not cancel the request the others wait for
+        return await asyncio.shield(task)
+
+    async def _send(self, client_key: tuple, policy: CompletionPolicy, request: dict, workspace_id: Optional[str]) -> Any:
+        provider, api_key, base_url = client_key
+        client = self.client(provider, api_key, base_url)
+        if provider == "openai":
+            response = await client.chat.completions.create(**request)
+        elif not policy.batch:
+            response = await client.messages.create(**request)
+        else:
+            batchers = self._batchers.setdefault(asyncio.get_running_loop(), {})
+            batcher = batchers.get((client_key, policy))
+            if batcher is None:
+                batcher = batchers[(client_key, policy)] = _Batcher(self, client, policy)
+            response = await batcher.submit(request)
+        self.prompt_usage.setdefault(workspace_id, PromptUsage()).add(response)
+        return response
+
+    def print_prompt_cache_stats(self) -> None:
+        """print prompt tokens and cache hit ratio per workspace."""
+        print("\nPrompt cache:")
+        print(f"  {'workspace':<40} {'requests':>8} {'prompt tokens':>14} {'cached':>7}")
+        for workspace_id, usage in self.prompt_usage.items():
+            print(
+                f"  {workspace_id or '-':<40} {usage.requests:>8} {usage.prompt_tokens:>14} "
+                f"{usage.cached_ratio:>7.1%}"
+            )
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_clients"] = state["_inflight"] = state["_batchers"] = None
+        state["stats"] = PoolStats()
+        state["prompt_usage"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._clients = WeakKeyDictionary()
+        self._inflight = WeakKeyDictionary()
+        self._batchers = WeakKeyDictionary()
+
+
+@dataclass
+class _Batcher:
+    """collects one client's batched requests and runs them as message batches."""
+    pool: LLMClientPool
+    client: Any
+    policy: CompletionPolicy
+    pending: list[tuple[str, dict, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    ids: Any = field(default_factory=itertools.count)
+
+    def submit(self, request: dict) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((f"req-{next(self.ids)}", request, future))
+        if len(self.pending) >= self.policy.max_batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.policy.batch_window, self.flush)
+        return future
+
+    def flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        items, self.pending = self.pending, []
+        if items:
+            asyncio.ensure_future(self._run(items))
+
+    async def _run(self, items: list[tuple[str, dict, asyncio.Future]]) -> None:
+        stats = self.pool.stats
+        batches = self.client.messages.batches
+        try:
+            batch = await batches.create(requests=[{"custom_id": custom_id, "params": params} for custom_id, params, _ in items])
+            stats.batches += 1
+            stats.batched += len(items)
+            deadline = None if self.policy.max_wait is None else time.monotonic() + self.policy.max_wait
+            while batch.processing_status != "ended":
+                if deadline is not None and time.monotonic() >= deadline:
+                    await batches.cancel(batch.id)
+                    stats.batch_fallbacks += len(items)
+                    await self._send_directly(items)
+                    return
+                await asyncio.sleep(self.policy.poll_interval)
+                batch = await batches.retrieve(batch.id)
+            results = {entry.custom_id: entry.result async for entry in await batches.results(batch.id)}
+        except Exception as error:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        retry = []
+        for custom_id, params, future in items:
+            result = results.get(custom_id)
+            if future.done():
+                continue
+            if result is not None and result.type == "succeeded":
+                future.set_result(result.message)
+            elif result is not None and result.type == "errored":
+                future.set_exception(RuntimeError(f"batched request failed: {result.error}"))
+            else:  # canceled or expired: the request never ran
+                retry.append((custom_id, params, future))
+        await self._send_directly(retry)
+
+    async def _send_directly(self, items: list[tuple[str, dict, asyncio.Future]]) -> None:
+        async def send(params: dict, future: asyncio.Future) -> None:
+            try:
+                response = await self.client.messages.create(**params)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(response)
+
+        await asyncio.gather(*(send(params, future) for _, params, future in items))
+
+
+class LLMHandle:
+    """
+    `context.llm`: the pool's clients, as seen from one agent turn.
+    """
+
+    __slots__ = ("pool", "context")
+
+    def __init__(self, pool: LLMClientPool, context: Any):
+        self.pool = pool
+        self.context = context
+
+    def client(self, provider: str = "anthropic", api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        return self.pool.client(provider, api_key, base_url)
+
+    def anthropic(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        return self.pool.client("anthropic", api_key, base_url)
+
+    def openai(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> Any:
+        return self.pool.client("openai", api_key, base_url)
+
+    async def complete(self, provider: str = "anthropic", **request: Any) -> Any:
+        """`LLMClientPool.complete` under the policy of the context's workspace."""
+        return await self.pool.complete(provider, workspace_id=getattr(self.context, "workspace_id", None), **request)
+
+
+_default_pool: Optional[LLMClientPool] = None
+
+
+def default_pool() -> LLMClientPool:
+    """the process-wide pool, used by engines not given one."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = LLMClientPool()
+    return _default_pool
+
+
+def llm_for(context: Any) -> LLMHandle:
+    """`context.llm`, or a handle to the default pool for contexts built without one."""
+    handle = getattr(context, "llm", None)
+    return handle if handle is not None else default_pool().bind(context)
+
+
+def _h2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
@@ -62,12 +62,15 @@ The Coordinator sends to multiple recipients in a single response, enabling true
 parallel delegation. All teams receive their tasks at the same moment, not sequentially.
 
 ⚡ PARALLEL EXECUTION:
-The WorkspaceExecutionEngine runs all workspaces concurrently using asyncio.gather,
-so all 3 teams work simultaneously. This provides significant speedup for independent
-workloads:
+The EventDrivenExecutionEngine (workspace_scheduling.py) runs every workspace as its own
+task, started the moment work is routed to it, so all 3 teams work simultaneously and the
+Coordinator picks up each report as soon as it arrives instead of waiting for the slowest
+team. This provides significant speedup for independent workloads:
 - Sequential: Time = Team₁ + Team₂ + Team₃
 - Parallel: Time ≈ max(Team₁, Team₂, Team₃)
 - Potential 3x speedup!
+With --shards N, ShardedExecutionEngine (workspace_sharding.py) also moves the team
+workspaces into N worker processes, so per-message CPU work is spread across cores.
 
 🤝 EMERGENT COLLABORATION:
 Within each workspace, collaboration patterns EMERGE from agent decisions:
@@ -81,8 +84,10 @@ Setup:
 1. install: pip install synqed anthropic python-dotenv
 2. create .env file with: ANTHROPIC_API_KEY='your-key-here'
 3. run: python parallel_three_teams.py
+   (or python parallel_three_teams.py --shards 3 to run each team in its own process)
 """
 import asyncio
+import argparse
 import os
 import logging
 from pathlib import Path
@@ -91,6 +96,9 @@ from dotenv import load_dotenv
 # Import the synqed API
 import synqed
 
+from compact_transcript import CompactWorkspaceManager, completion_status
+from workspace_sharding import ShardedExecutionEngine
+
 # Load environment variables
 load_dotenv()
 load_dotenv(dotenv_path=Path(__file__).parent / '.env')
@@ -115,15 +123,11 @@ async def coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     
     This achieves TRUE PARALLEL delegation - all teams receive work at the same time!
     """
-    import anthropic
-    
     # Get latest message
     latest_message = context.latest_message
     if not latest_message:
         return context.build_response("USER", "Ready to coordinate parallel research!")
     
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    
     # Autonomous decision-making system prompt
     system_prompt = (
         "You are a Research Coordinator managing 3 specialized research teams:\n"
@@ -147,7 +151,7 @@ async def coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     conversation_text = context.get_conversation_history()
     conversation_text += "\n\nRespond with JSON: {\"send_to\": \"target\", \"content\": \"message\"}"
     
-    resp = await client.messages.create(
+    resp = await context.llm.complete(
         model="claude-sonnet-4-5",
         max_tokens=600,
         system=system_prompt,
@@ -163,10 +167,6 @@ async def coordinator_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def lead_researcher_logic(context: synqed.AgentLogicContext) -> dict:
     """Generic lead researcher that autonomously decides workflow with senior assistant."""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    
     # Get agent name to determine specialty
     agent_name = context.agent_name or "Lead Researcher"
     
@@ -210,7 +210,7 @@ async def lead_researcher_logic(context: synqed.AgentLogicContext) -> dict:
     conversation_text = context.get_conversation_history()
     conversation_text += "\n\nRespond with JSON: {\"send_to\": \"target\", \"content\": \"message\"}"
     
-    resp = await client.messages.create(
+    resp = await context.llm.complete(
         model="claude-sonnet-4-5",
         max_tokens=400,
         system=system_prompt,
@@ -226,10 +226,6 @@ async def lead_researcher_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def senior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
     """Senior assistant that autonomously decides how to collaborate with junior assistant."""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    
     # Get agent name to determine specialty
     agent_name = context.agent_name or "Senior Research Assistant"
     
@@ -274,7 +270,7 @@ async def senior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
     conversation_text = context.get_conversation_history()
     conversation_text += f"\n\nRespond with JSON: {{\"send_to\": \"target\", \"content\": \"message\"}}"
     
-    resp = await client.messages.create(
+    resp = await context.llm.complete(
         model="claude-sonnet-4-5",
         max_tokens=400,
         system=system_prompt,
@@ -290,10 +286,6 @@ async def senior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def junior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
     """Junior assistant that reviews senior's work and adds complementary findings."""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    
     # Get agent name to determine specialty
     agent_name = context.agent_name or "Junior Research Assistant"
     
@@ -328,7 +320,7 @@ async def junior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
     conversation_text = context.get_conversation_history()
     conversation_text += f"\n\nRespond with JSON: {{\"send_to\": \"{senior}\", \"content\": \"additions\"}}"
     
-    resp = await client.messages.create(
+    resp = await context.llm.complete(
         model="claude-sonnet-4-5",
         max_tokens=250,
         system=system_prompt,
@@ -339,18 +331,15 @@ async def junior_assistant_logic(context: synqed.AgentLogicContext) -> dict:
 
 
 # ============================================================================
-# Main Execution
+# Agent Registration
 # ============================================================================
 
-async def main():
-    print("\n" + "="*80)
-    print("  🚀 Parallel Research Teams Demo - TRUE PARALLEL EXECUTION")
-    print("  Coordinator BROADCASTS to 3 Teams → All work SIMULTANEOUSLY")
-    print("  Each team has 3 agents: Lead + Senior Assistant + Junior Assistant")
-    print("  Assistants COLLABORATE with each other before reporting to Lead")
-    print("="*80 + "\n")
+def register_agents() -> None:
+    """
+    Register all agent prototypes with the AgentRuntimeRegistry.
     
-    # Step 1: Register all agent prototypes
+    Module-level so that shard worker processes (--shards) can run it too.
+    """
     coordinator = synqed.Agent(
         name="Research Coordinator",
         description="Coordinates parallel research across multiple teams",
@@ -439,10 +428,26 @@ async def main():
     synqed.AgentRuntimeRegistry.register("Space Senior Research Assistant", space_senior)
     synqed.AgentRuntimeRegistry.register("Space Junior Research Assistant", space_junior)
     
+    
+# ============================================================================
+# Main Execution
+# ============================================================================
+
+async def main(shards: int = 0):
+    print("\n" + "="*80)
+    print("  🚀 Parallel Research Teams Demo - TRUE PARALLEL EXECUTION")
+    print("  Coordinator BROADCASTS to 3 Teams → All work SIMULTANEOUSLY")
+    print("  Each team has 3 agents: Lead + Senior Assistant + Junior Assistant")
+    print("  Assistants COLLABORATE with each other before reporting to Lead")
+    print("="*80 + "\n")
+    
+    # Step 1: Register all agent prototypes
+    register_agents()
     print("✅ Registered 10 agents (1 coordinator + 3 teams of 3)\n")
     
     # Step 2: Create workspace manager and planner
-    workspace_manager = synqed.WorkspaceManager(workspaces_root=Path("/tmp/synqed_parallel_research"))
+    # Compact, indexed transcripts (see compact_transcript.py)
+    workspace_manager = CompactWorkspaceManager(workspaces_root=Path("/tmp/synqed_parallel_research"))
     
     planner = synqed.PlannerLLM(
         provider="anthropic",
@@ -533,12 +538,17 @@ async def main():
     print(f"   Agents: {list(space_workspace.agents.keys())}\n")
     
     # Step 4: Create execution engine
-    execution_engine = synqed.WorkspaceExecutionEngine(
+    execution_engine = ShardedExecutionEngine(
         planner=planner,
         workspace_manager=workspace_manager,
         enable_display=True,
         max_agent_turns=50,  # Allow enough turns for 3 parallel teams with assistant collaboration
         max_workspace_depth=3,
+        max_concurrent_workspaces=4,  # Root + 3 teams; raise caps with care, every workspace calls the LLM
+        max_concurrent_per_depth={1: 3},  # Team workspaces running at once (the root is always served first)
+        parallel_agents=True,  # Agents with pending messages in one workspace think concurrently
+        shards=shards,  # Team workspaces run in worker processes when > 0
+        shard_setup=register_agents,
     )
     
     print("✅ Created execution engine with parallel workspace support\n")
@@ -578,7 +588,9 @@ async def main():
     print("  EXECUTION SUMMARY")
     print("="*80 + "\n")
     
-    print(f"⏱️  Execution time: {elapsed_time:.2f} seconds\n")
+    print(f"⏱️  Execution time: {elapsed_time:.2f} seconds")
+    execution_engine.print_scheduling_stats()
+    print()
     
     print("📊 Workspace Hierarchy:")
     print(f"   Root: {root_workspace.workspace_id} (Coordinator)")
@@ -588,10 +600,10 @@ async def main():
     print()
     
     # Get completion status for each workspace
-    root_status = root_workspace.get_completion_status()
-    ai_status = ai_workspace.get_completion_status()
-    climate_status = climate_workspace.get_completion_status()
-    space_status = space_workspace.get_completion_status()
+    root_status = completion_status(root_workspace)
+    ai_status = completion_status(ai_workspace)
+    climate_status = completion_status(climate_workspace)
+    space_status = completion_status(space_workspace)
     
     print("📈 Message Statistics:")
     print(f"   Root: {root_status['total_messages']} messages")
@@ -610,6 +622,7 @@ async def main():
     space_workspace.display_transcript(title="SPACE TEAM")
     
     # Clean up
+    execution_engine.close()
     await workspace_manager.destroy_workspace(root_workspace.workspace_id)
     
     print("="*80)
@@ -618,5 +631,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Parallel research teams demo")
+    parser.add_argument("--shards", type=int, default=0, help="Worker processes for team workspaces (default: 0, in-process)")
+    args = parser.parse_args()
+    asyncio.run(main(shards=args.shards))
 
@@ -0,0 +1,217 @@
+"""
+prompt layouts with stable, cacheable prefixes for agent logic.
+
+agents build their system prompt from `synqed.get_interaction_protocol()`
+(the global protocol plus a roster of every other registered agent), their
+own instructions and `context.shared_plan`, and send it on every turn. the
+protocol alone is ~1.7k tokens, identical for every agent; the roster
+differs only by the agent it leaves out. providers can serve such repeated
+prefixes from a prompt cache, at a fraction of the price and latency, but
+only if the prompt is laid out so the prefix is byte-identical from turn to
+turn:
+- `interaction_protocol(exclude_agent)` renders the same text as
+  `synqed.get_interaction_protocol`, memoized per (roster version, excluded
+  agent, workspace scope). the roster is sorted: the registry lists roles
+  in set order, which changes between processes (string hashing), so
+  shards and restarts would otherwise render different prefixes.
+- `cached_prompt(context, instructions, conversation)` returns the
+  `system` and `messages` arguments of an anthropic `messages.create`,
+  ordered from most to least stable, with a `cache_control` breakpoint
+  after each stable part:
+
+      [global protocol]        shared by every agent         <- breakpoint
+      [roster + instructions]  per agent                     <- breakpoint
+      [shared plan]            changes when agents add to it <- breakpoint
+      user: [conversation]     changes every turn
+
+  openai caches prompt prefixes automatically; the same ordering lets it
+  hit, and the `cache_control` fields are dropped by `openai_messages`.
+
+roster versioning: importing this module gives `AgentRuntimeRegistry` a
+`roster_version` counter, bumped by `register`, `register_remote` and
+`clear`. a memoized protocol is looked up by that counter, so a turn costs
+one dict lookup however many agents are registered, and any registration
+renders a fresh roster. a prototype's description or capabilities changed
+in place are not seen: call `bump_roster_version()` after doing that.
+
+`workspace=` limits the roster to the agents of one workspace (keyed by
+its id and agent count; workspaces only ever gain agents), instead of every
+registered agent.
+
+`LLMClientPool.complete()` records prompt-cache usage per workspace (see
+`LLMClientPool.prompt_usage`):
+
+    resp = await context.llm.complete(
+        model="claude-sonnet-4-5",
+        max_tokens=600,
+        **cached_prompt(context, instructions, context.get_conversation_history()),
+    )
+    context.llm.pool.print_prompt_cache_stats()
+"""
+
+from __future__ import annotations
+
+import functools
+from collections import OrderedDict
+from typing import Any, Optional
+
+import synqed
+from synqed.agent import GLOBAL_INTERACTION_PROTOCOL
+
+CACHE_CONTROL = {"type": "ephemeral"}
+MAX_CACHED_PROTOCOLS = 1024
+
+# (exclude_agent, scope) -> (protocol, roster text) at _protocols_version, least recently used first
+_protocols: OrderedDict[tuple, tuple[str, str]] = OrderedDict()
+_protocols_version = -1
+
+
+# ============================================================================
+# roster versioning
+# ============================================================================
+
+def _versioned(method: Any) -> classmethod:
+    @functools.wraps(method)
+    def bump_after(cls, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            cls.roster_version += 1
+
+    return classmethod(bump_after)
+
+
+def _install_roster_versioning() -> None:
+    registry = synqed.AgentRuntimeRegistry
+    if "roster_version" in vars(registry):
+        return
+    registry.roster_version = 0
+    for name in ("register", "register_remote", "clear"):
+        setattr(registry, name, _versioned(getattr(registry, name)))
+
+
+_install_roster_versioning()
+
+
+def roster_version() -> int:
+    """the registry's roster version, bumped by every registration."""
+    return synqed.AgentRuntimeRegistry.roster_version
+
+
+def bump_roster_version() -> None:
+    """invalidate memoized protocols, e.g. after editing a registered prototype in place."""
+    synqed.AgentRuntimeRegistry.roster_version += 1
+
+
+def roster(roles: Optional[Any] = None) -> tuple:
+    """
+    the registered local agents (or those of `roles`) as sorted
+    (role, description, capabilities) tuples.
+    """
+    registry = synqed.AgentRuntimeRegistry
+    members = []
+    for role in sorted(registry.list_roles() if roles is None else set(roles)):
+        agent = registry.get(role)
+        if agent:
+            members.append((role, agent.description, tuple(agent.capabilities or ("general tasks",))))
+    return tuple(members)
+
+
+# ============================================================================
+# memoized protocol
+# ============================================================================
+
+def _render(exclude_agent: Optional[str], workspace: Any = None) -> tuple[str, str]:
+    global _protocols_version
+    if _protocols_version != roster_version():
+        _protocols.clear()
+        _protocols_version = roster_version()
+    scope = None if workspace is None else (workspace.workspace_id, len(workspace.agents))
+    key = (exclude_agent, scope)
+    rendered = _protocols.get(key)
+    if rendered is not None:
+        _protocols.move_to_end(key)
+        return rendered
+
+    team = [
+        f"  - {role}: {description}\n    Capabilities: {', '.join(capabilities)}"
+        for role, description, capabilities in roster(None if workspace is None else workspace.agents)
+        if not (exclude_agent and role == exclude_agent)
+    ]
+    team_roster = (
+        f"TEAM MEMBERS (other agents in this workspace):\n{chr(10).join(team)}\n\n"
+        "When coordinating, contact the appropriate agent based on their capabilities above."
+        if team else ""
+    )
+    protocol = f"{GLOBAL_INTERACTION_PROTOCOL}\n\n{team_roster}" if team_roster else GLOBAL_INTERACTION_PROTOCOL
+    rendered = _protocols[key] = (protocol, team_roster)
+    if len(_protocols) > MAX_CACHED_PROTOCOLS:
+        _protocols.popitem(last=False)
+    return rendered
+
+
+def interaction_protocol(exclude_agent: Optional[str] = None, workspace: Any = None) -> str:
+    """
+    memoized `synqed.get_interaction_protocol(exclude_agent)`, with a sorted
+    roster, limited to the agents of `workspace` if given.
+    """
+    return _render(exclude_agent, workspace)[0]
+
+
+def team_roster(exclude_agent: Optional[str] = None, workspace: Any = None) -> str:
+    """memoized `synqed.agent.get_team_roster(exclude_agent)`, sorted, limited to `workspace` if given."""
+    return _render(exclude_agent, workspace)[1]
+
+
+def clear_protocol_cache() -> None:
+    _protocols.clear()
+
+
+# ============================================================================
+# prompt layout
+# ============================================================================
+
+def _block(text: str, cache: bool) -> dict:
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = CACHE_CONTROL
+    return block
+
+
+def cached_prompt(
+    context: Any,
+    instructions: str,
+    conversation: str,
+    protocol: bool = True,
+    shared_plan: bool = True,
+    workspace_roster: bool = False,
+) -> dict:
+    """
+    `system` and `messages` for `messages.create(**cached_prompt(...))`.
+
+    args:
+        context: the agent's logic context (agent name, shared plan).
+        instructions: the agent's own system prompt.
+        conversation: the user turn, e.g. the conversation history.
+        protocol: start with the interaction protocol and team roster.
+        shared_plan: include `context.shared_plan`, when not empty.
+        workspace_roster: list only the agents of `context.workspace` in
+            the roster, not every registered agent.
+    """
+    system = []
+    if protocol:
+        workspace = getattr(context, "workspace", None) if workspace_roster else None
+        roster_text = team_roster(exclude_agent=context.agent_name, workspace=workspace)
+        system.append(_block(GLOBAL_INTERACTION_PROTOCOL, cache=True))
+        instructions = f"{roster_text}\n\n{instructions}" if roster_text else instructions
+    system.append(_block(instructions, cache=True))
+    plan = getattr(context, "shared_plan", "") if shared_plan else ""
+    if plan:
+        system.append(_block(f"SHARED WORKSPACE PLAN:\n{plan}", cache=True))
+    return {"system": system, "messages": [{"role": "user", "content": conversation}]}
+
+
+def openai_messages(prompt: dict) -> list[dict]:
+    """a `cached_prompt` as openai chat messages (one system message, same order)."""
+    system = "\n\n".join(block["text"] for block in prompt["system"])
+    return [{"role": "system", "content": system}, *prompt["messages"]]
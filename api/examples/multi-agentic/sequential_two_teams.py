@@ -67,6 +67,9 @@ from dotenv import load_dotenv
 
 import synqed
 
+from llm_clients import llm_for
+from streaming import stream_response
+
 # Load environment variables
 load_dotenv()
 load_dotenv(dotenv_path=Path(__file__).parent / '.env')
@@ -92,9 +95,7 @@ async def project_manager_logic(context: synqed.AgentLogicContext) -> dict:
     - Delegates to Research Team and Development Team
     - Aggregates results and reports back to USER
     """
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Project Manager orchestrating a software project. "
@@ -149,8 +150,6 @@ _research_lead_state = {}
 
 async def research_lead_logic(context: synqed.AgentLogicContext) -> dict:
     """Research Lead coordinates the research team with state machine"""
-    import anthropic
-    
     # State machine: WAITING_FOR_DATA -> READY_TO_WRITE -> DONE
     latest_message = context.latest_message
     workspace_id = context.workspace.workspace_id if context.workspace else "default"
@@ -165,7 +164,7 @@ async def research_lead_logic(context: synqed.AgentLogicContext) -> dict:
     if current_state == "DONE":
         return None
     
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Research Lead coordinating a research team for a social media analytics dashboard product. "
@@ -216,9 +215,7 @@ async def research_lead_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def data_analyst_logic(context: synqed.AgentLogicContext) -> dict:
     """Data Analyst gathers and analyzes data"""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Data Analyst on a research team studying the market for a social media analytics dashboard. "
@@ -257,9 +254,7 @@ async def data_analyst_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def report_writer_logic(context: synqed.AgentLogicContext) -> dict:
     """Report Writer creates final research reports"""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Report Writer on a research team. "
@@ -284,15 +279,17 @@ async def report_writer_logic(context: synqed.AgentLogicContext) -> dict:
         "Create the report. Respond with JSON: {\"send_to\": \"Research Lead\", \"content\": \"your report\"}"
     )
     
-    resp = await client.messages.create(
+    # Stream the report: the recipient and the text reach the router's stream consumers as they are generated
+    async with client.messages.stream(
         model="claude-sonnet-4-5",
         max_tokens=400,
         system=system_prompt,
         messages=[{"role": "user", "content": conversation_text}],
-    )
+    ) as stream:
+        response_text = await stream_response(context, stream.text_stream)
     
     # Return the response
-    return resp.content[0].text.strip()
+    return response_text.strip()
 
 
 # ============================================================================
@@ -304,8 +301,6 @@ _tech_lead_state = {}
 
 async def tech_lead_logic(context: synqed.AgentLogicContext) -> dict:
     """Tech Lead coordinates the development team with state machine"""
-    import anthropic
-    
     # State machine: WAITING_FOR_INSTRUCTIONS -> GATHERING_SUBPLANS -> FINALIZING_REPORT -> DONE
     latest_message = context.latest_message
     workspace_id = context.workspace.workspace_id if context.workspace else "default"
@@ -320,7 +315,7 @@ async def tech_lead_logic(context: synqed.AgentLogicContext) -> dict:
     if current_state == "DONE":
         return None
     
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Tech Lead coordinating a development team building a social media analytics dashboard. "
@@ -390,9 +385,7 @@ async def tech_lead_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def backend_dev_logic(context: synqed.AgentLogicContext) -> dict:
     """Backend Developer implements server-side features"""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Backend Developer specializing in server-side implementation for a social media analytics dashboard.\n"
@@ -429,9 +422,7 @@ async def backend_dev_logic(context: synqed.AgentLogicContext) -> dict:
 
 async def frontend_dev_logic(context: synqed.AgentLogicContext) -> dict:
     """Frontend Developer implements client-side features"""
-    import anthropic
-    
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    client = llm_for(context).anthropic()
     
     system_prompt = (
         "You are a Frontend Developer specializing in UI/UX implementation for a social media analytics dashboard.\n"
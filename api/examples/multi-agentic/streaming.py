@@ -0,0 +1,531 @@
+"""
+streaming agent output through the workspace router.
+
+`Agent.process()` returns only once the agent's logic has the full llm
+completion; the engine then parses `{"send_to", "content"}` and routes it.
+for long outputs (a writer's 500-word story) the display and anyone waiting
+on the message see nothing until the last token.
+
+`stream_response(context, chunks)` lets agent logic pass the completion on
+while it is generated. it parses the response as it arrives: the routing
+header (`send_to`) is known as soon as the model has written it, and the
+decoded `content` string is published chunk by chunk. the logic still
+returns the full text, so the engine parses, validates and routes the
+message exactly as before; the transcript only ever holds complete
+messages.
+
+    async def writer_logic(context):
+        client = context.llm.anthropic()
+        async with client.messages.stream(model=..., max_tokens=..., messages=...) as stream:
+            return await stream_response(context, stream.text_stream)
+
+chunks are published by `MessageStreams`, one per router
+(`message_streams(router)`). it also hooks the router's transcript, so a
+routed message ends its stream, and messages that were not streamed reach
+stream consumers as one chunk:
+- `streams.stream(sender=..., recipient=...)` yields the text of the next
+  matching message as it arrives, shaped like synqed's `Client.stream`.
+- `streams.subscribe()` yields every `StreamEvent` ("start" once the
+  recipient is known, "chunk", "done" once generated, "end" once routed).
+- `LiveDisplay` prints a streamed message on the engine's display while it
+  is generated (`EventDrivenExecutionEngine(streaming=True)`), and
+  `display_transcript(workspace)` appends messages still in flight.
+- `streams.stats` measures time to first token end to end: from the start
+  of the agent's turn to the first content chunk reaching consumers (to
+  the routed message, for messages that were not streamed); see
+  `streams.print_stats()`.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import asyncio
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Optional
+
+_streams: "weakref.WeakKeyDictionary[Any, MessageStreams]" = weakref.WeakKeyDictionary()
+
+
+def message_streams(router: Any) -> MessageStreams:
+    """return the message streams of a router, creating them on first use."""
+    streams = _streams.get(router)
+    if streams is None:
+        streams = _streams[router] = MessageStreams(router)
+    return streams
+
+
+# ============================================================================
+# incremental response parsing
+# ============================================================================
+
+class ResponseStreamParser:
+    """
+    incremental parser for `{"send_to": ..., "content": "..."}` responses.
+
+    `feed(text)` returns the events completed by `text`: ("send_to", value)
+    once the header value is complete, and ("content", text) for each piece
+    of the decoded content string. text before the first "{" (a ```json
+    fence, prose) and keys other than send_to/content are skipped.
+    """
+
+    def __init__(self):
+        self._state = "prefix"
+        self._key: list[str] = []
+        self._value: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = ""  # pending escape sequence, in a key, value or the content
+        self._high_surrogate = ""
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        events: list[tuple[str, Any]] = []
+        content: list[str] = []
+        for char in text:
+            state = self._state
+            if state == "content":
+                self._content_char(char, content, events)
+            elif state == "prefix":
+                if char == "{":
+                    self._state = "object"
+            elif state == "object":
+                if char == '"':
+                    self._state, self._key, self._escape = "key", [], ""
+                elif char == "}":
+                    self._state = "done"
+            elif state == "key":
+                if self._escape:
+                    self._escape = ""
+                    self._key.append(char)
+                elif char == "\\":
+                    self._escape = char
+                    self._key.append(char)
+                elif char == '"':
+                    self._state = "colon"
+                else:
+                    self._key.append(char)
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value_start"
+            elif state == "value_start":
+                if char.isspace():
+                    continue
+                if "".join(self._key) == "content" and char == '"':
+                    self._state, self._escape = "content", ""
+                    continue
+                self._state, self._value, self._depth, self._in_string, self._escape = "value", [], 0, False, ""
+                self._value_char(char, events)
+            elif state == "value":
+                self._value_char(char, events)
+        if content:
+            events.append(("content", "".join(content)))
+        return events
+
+    def _content_char(self, char: str, content: list[str], events: list) -> None:
+        if self._escape:
+            self._escape += char
+            if self._escape.startswith("\\u") and len(self._escape) < 6:
+                return
+            decoded = json.loads(f'"{self._escape}"')
+            self._escape = ""
+            if "\ud800" <= decoded <= "\udbff":  # first half of a surrogate pair
+                self._high_surrogate = decoded
+                return
+            if self._high_surrogate:
+                decoded = (self._high_surrogate + decoded).encode("utf-16", "surrogatepass").decode("utf-16")
+                self._high_surrogate = ""
+            content.append(decoded)
+        elif char == "\\":
+            self._escape = char
+        elif char == '"':
+            if content:
+                events.append(("content", "".join(content)))
+                content.clear()
+            self._state = "object"
+        else:
+            content.append(char)
+
+    def _value_char(self, char: str, events: list) -> None:
+        """accumulate a non-content value; hand the closing `,`/`}` back to the object state."""
+        if self._in_string:
+            self._value.append(char)
+            if self._escape:
+                self._escape = ""
+            elif char == "\\":
+                self._escape = char
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    self._end_value(events)
+            return
+        if self._depth == 0 and char in ",}":
+            self._end_value(events)
+            if char == "}":
+                self._state = "done"
+            return
+        self._value.append(char)
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._end_value(events)
+
+    def _end_value(self, events: list) -> None:
+        self._state = "object"
+        if "".join(self._key) == "send_to":
+            try:
+                events.append(("send_to", json.loads("".join(self._value))))
+            except json.JSONDecodeError:
+                pass
+
+
+# ============================================================================
+# message streams
+# ============================================================================
+
+@dataclass(eq=False)
+class LiveMessage:
+    """one agent message, streamed or routed whole."""
+    sender: str
+    started_at: Optional[float]  # perf_counter() at the start of the sender's turn, if known
+    recipient: Any = None  # send_to from the header (str or list); None until known
+    chunks: list[str] = field(default_factory=list)
+    streamed: bool = True
+    published: int = 0  # chunks already published (chunks before the header wait for it)
+    header_at: Optional[float] = None
+    first_chunk_at: Optional[float] = None
+    finished_at: Optional[float] = None  # generation done
+    routed_at: Optional[float] = None
+    message_ids: list[str] = field(default_factory=list)
+
+    @property
+    def content(self) -> str:
+        return "".join(self.chunks)
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """
+    a message stream event.
+
+    attributes:
+        kind: "start" (recipient known), "chunk", "done" (generated), or
+            "end" (routed; once per transcript entry, so a broadcast ends
+            once per recipient).
+        message: the message.
+        text: the chunk, for "chunk" events.
+        recipient: the transcript entry's recipient, for "end" events.
+    """
+    kind: str
+    message: LiveMessage
+    text: str = ""
+    recipient: Optional[str] = None
+
+
+@dataclass
+class StreamStats:
+    """
+    time to first token and friends, measured end to end from the start of
+    the sender's turn (`turn_started`), in seconds.
+
+    attributes:
+        streamed: messages routed after being streamed.
+        whole: messages routed without being streamed.
+        first_content: latency to the first content reaching consumers (to
+            the routed message, if it was not streamed), recent messages.
+        header: latency to the recipient being known, recent streamed
+            messages.
+        routed: latency to the message being routed, recent messages.
+    """
+    streamed: int = 0
+    whole: int = 0
+    first_content: deque = field(default_factory=lambda: deque(maxlen=1024))
+    header: deque = field(default_factory=lambda: deque(maxlen=1024))
+    routed: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    @staticmethod
+    def percentile(latencies: deque, q: float) -> float:
+        """latency percentile (0 <= q <= 1)."""
+        if not latencies:
+            return 0.0
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MessageStreams:
+    """publishes a router's messages to stream consumers as they are generated."""
+
+    def __init__(self, router: Any):
+        self.stats = StreamStats()
+        self.listeners: list[Callable[[StreamEvent], None]] = []
+        self._queues: list[asyncio.Queue] = []
+        self._turn_started: dict[str, float] = {}
+        self._live: list[LiveMessage] = []  # streams in flight
+        self._finished: dict[str, LiveMessage] = {}  # sender -> last finished stream, until routed
+
+        add_entry = router._add_transcript_entry
+
+        def publishing_add_entry(entry: dict) -> None:
+            add_entry(entry)
+            self._routed(entry)
+
+        # an instance attribute shadows the router's method
+        router._add_transcript_entry = publishing_add_entry
+
+    # ------------------------------------------------------------------------
+    # producers
+    # ------------------------------------------------------------------------
+
+    def turn_started(self, agent_name: str, at: Optional[float] = None) -> None:
+        """record the start of an agent's turn, the zero of its latencies."""
+        self._turn_started[agent_name] = time.perf_counter() if at is None else at
+
+    def open(self, sender: str) -> LiveMessage:
+        message = LiveMessage(sender=sender, started_at=self._turn_started.pop(sender, None))
+        self._finished.pop(sender, None)
+        self._live.append(message)
+        return message
+
+    def start(self, message: LiveMessage, recipient: Any) -> None:
+        """the routing header is known: publish "start" and any content written before it."""
+        if message.header_at is not None:
+            return
+        message.recipient = recipient
+        message.header_at = time.perf_counter()
+        if message.streamed and message.started_at is not None:
+            self.stats.header.append(message.header_at - message.started_at)
+        self._publish(StreamEvent("start", message))
+        self._flush(message)
+
+    def write(self, message: LiveMessage, text: str) -> None:
+        if text:
+            message.chunks.append(text)
+            if message.header_at is not None:
+                self._flush(message)
+
+    def finish(self, message: LiveMessage) -> None:
+        """generation is done; the stream ends when the engine routes the message."""
+        self.start(message, message.recipient)
+        message.finished_at = time.perf_counter()
+        if message in self._live:
+            self._live.remove(message)
+        self._finished[message.sender] = message
+        self._publish(StreamEvent("done", message))
+
+    def _flush(self, message: LiveMessage) -> None:
+        pending = message.chunks[message.published:]
+        if not pending:
+            return
+        if message.first_chunk_at is None:
+            message.first_chunk_at = time.perf_counter()
+            if message.started_at is not None:
+                self.stats.first_content.append(message.first_chunk_at - message.started_at)
+        message.published = len(message.chunks)
+        self._publish(StreamEvent("chunk", message, text="".join(pending)))
+
+    def _routed(self, entry: dict) -> None:
+        sender, content = entry.get("from", ""), str(entry.get("content", ""))
+        if content == "[startup]":  # wake-ups, not messages
+            return
+        message = self._finished.get(sender)
+        # the routed content may be cut (USER entries keep 1000 characters)
+        if message is None or not message.content.startswith(content):
+            message = LiveMessage(sender=sender, started_at=self._turn_started.pop(sender, None), streamed=False)
+            message.chunks.append(content)
+            self.start(message, entry.get("to"))
+            message.finished_at = time.perf_counter()
+            self._publish(StreamEvent("done", message))
+            self.stats.whole += 1
+        elif message.routed_at is None:
+            self.stats.streamed += 1
+        if message.routed_at is None:
+            message.routed_at = time.perf_counter()
+            if message.started_at is not None:
+                self.stats.routed.append(message.routed_at - message.started_at)
+        message.message_ids.append(entry.get("message_id"))
+        self._publish(StreamEvent("end", message, recipient=entry.get("to")))
+
+    def _publish(self, event: StreamEvent) -> None:
+        for listener in list(self.listeners):
+            listener(event)
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    # ------------------------------------------------------------------------
+    # consumers
+    # ------------------------------------------------------------------------
+
+    def print_stats(self) -> None:
+        """print time to first token, to the recipient and to routing."""
+        stats = self.stats
+        print("\nMessage streams:")
+        print(f"  Messages: {stats.streamed} streamed, {stats.whole} routed whole")
+        for label, latencies in (
+            ("First token", stats.first_content),
+            ("Recipient known", stats.header),
+            ("Routed", stats.routed),
+        ):
+            print(
+                f"  {label + ':':<17} p50 {stats.percentile(latencies, 0.5) * 1000:.0f}ms, "
+                f"p95 {stats.percentile(latencies, 0.95) * 1000:.0f}ms"
+            )
+
+    @property
+    def in_flight(self) -> list[LiveMessage]:
+        """messages being generated."""
+        return list(self._live)
+
+    async def subscribe(self) -> AsyncIterator[StreamEvent]:
+        """every stream event from now on."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._queues.remove(queue)
+
+    async def stream(self, sender: Optional[str] = None, recipient: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        the text of the next message from `sender` to `recipient` (either may
+        be None for any), chunk by chunk, ending once it is routed; like
+        `synqed.Client.stream`. messages that were not streamed arrive as
+        one chunk.
+        """
+        events = self.subscribe()
+        current: Optional[LiveMessage] = None
+        held: list[str] = []  # chunks of a message whose recipient is not known yet
+        try:
+            async for event in events:
+                message = event.message
+                if current is None:
+                    if event.kind != "start" or (sender is not None and message.sender != sender):
+                        continue
+                    if recipient is not None and message.recipient is not None and not _addressed_to(message.recipient, recipient):
+                        continue
+                    current, held = message, []
+                    continue
+                if message is not current:
+                    continue
+                if event.kind == "chunk":
+                    if recipient is None or message.recipient is not None:
+                        yield event.text
+                    else:
+                        held.append(event.text)
+                elif event.kind == "end":
+                    if recipient is not None and message.recipient is None:
+                        if event.recipient != recipient:
+                            current = None
+                            continue
+                        for text in held:
+                            yield text
+                    return
+        finally:
+            await events.aclose()
+
+
+def _addressed_to(send_to: Any, recipient: str) -> bool:
+    targets = send_to if isinstance(send_to, list) else [send_to]
+    return recipient in targets or "ALL" in targets
+
+
+async def stream_response(context: Any, chunks: AsyncIterable[str]) -> str:
+    """
+    publish an llm completion to the workspace's message streams as it is
+    generated; returns the full text, to be returned from agent logic.
+    """
+    streams = message_streams(context.workspace.router)
+    message = streams.open(context.agent_name)
+    parser = ResponseStreamParser()
+    text = []
+    try:
+        async for chunk in chunks:
+            text.append(chunk)
+            for kind, value in parser.feed(chunk):
+                if kind == "send_to":
+                    streams.start(message, value)
+                else:
+                    streams.write(message, value)
+    finally:
+        streams.finish(message)
+    return "".join(text)
+
+
+# ============================================================================
+# display
+# ============================================================================
+
+class LiveDisplay:
+    """
+    prints streamed messages on a `MessageDisplay` as they are generated.
+
+    one message is printed live at a time; messages streamed meanwhile are
+    printed by the engine as usual once routed. the engine announces a turn
+    and displays its message once the agent's logic has returned:
+    `display_processing` and `display_message` are wrapped so a turn
+    printed live is not printed again.
+    """
+
+    def __init__(self, display: Any):
+        self.display = display
+        self._current: Optional[LiveMessage] = None
+        self._announced: set[str] = set()  # senders whose turn was announced live, until routed
+        self._printed: set[tuple[str, str]] = set()  # (sender, content) printed live, not yet displayed
+        display_processing = display.display_processing
+        display_message = display.display_message
+
+        def skip_announced(agent_name: str, *args, **kwargs) -> None:
+            if agent_name not in self._announced:
+                display_processing(agent_name, *args, **kwargs)
+
+        def skip_printed(sender: str, recipient: str, content: str, *args, **kwargs) -> None:
+            key = (sender, content)
+            if key in self._printed:
+                self._printed.discard(key)
+                return
+            display_message(sender, recipient, content, *args, **kwargs)
+
+        self._display_processing = display_processing
+        display.display_processing = skip_announced
+        display.display_message = skip_printed
+
+    def attach(self, streams: MessageStreams) -> None:
+        if self not in streams.listeners:
+            streams.listeners.append(self)
+
+    def __call__(self, event: StreamEvent) -> None:
+        message = event.message
+        if not message.streamed:
+            return
+        if event.kind == "start" and self._current is None:
+            self._current = message
+            self._display_processing(message.sender)
+            self._announced.add(message.sender)
+            recipient = message.recipient if message.recipient is not None else "?"
+            label = "(broadcast)" if recipient == "ALL" or isinstance(recipient, list) else f"to {recipient}"
+            print(f"[Turn {self.display.turn_counter}] {message.sender} {label}: ", end="", flush=True)
+        elif message is self._current:
+            if event.kind == "chunk":
+                print(event.text, end="", flush=True)
+            elif event.kind == "done":
+                # the engine displays a message before routing it
+                print()
+                self._printed.add((message.sender, message.content))
+                self._current = None
+        if event.kind == "end":
+            self._announced.discard(message.sender)
+
+
+def display_transcript(workspace: Any, **kwargs: Any) -> None:
+    """`workspace.display_transcript(**kwargs)`, followed by the messages still being generated."""
+    workspace.display_transcript(**kwargs)
+    for message in message_streams(workspace.router).in_flight:
+        print(f"[Streaming] From: {message.sender}  To: {message.recipient or '?'}")
+        print("-" * 80)
+        print(message.content)
+        print()
@@ -0,0 +1,373 @@
+"""
+spill router transcripts to disk under the workspace directory.
+
+`WorkspaceManager(workspaces_root=...)` gives every workspace its own
+directory, but the transcript lives entirely in memory: a long-running
+workspace (an auto-workspace serving one email thread for hours) holds
+every message body it ever routed, up to `MAX_TRANSCRIPT_SIZE` of them.
+
+`SpillingTranscript` is a `CompactTranscript` that also appends every
+entry, as one json line, to a segmented log in `<workspace>/.transcript/`:
+
+    .transcript/0001-000000000000.ndjson   entries 0 .. segment_entries - 1
+    .transcript/0001-000000004096.ndjson   ...
+
+only the newest `hot_entries` contents stay in memory; older contents are
+read back from their log line when asked for. the memory bound is on
+contents, not on messages: what routing, deduplication,
+`last_message`/`count` and the size limit need to behave exactly as with a
+compact router stays in memory for every message until `MAX_TRANSCRIPT_SIZE`
+drops it: the per-entry columns (name ids, timestamp, kind, content slot, a
+4-byte line offset), the message id string and the router's dedup set
+entry for it, and the query index entries. that is ~240 bytes per message
+(`workspace_benchmarks.py transcript-spill`), against ~380 for a compact
+router and ~730 for a `MessageRouter` with short contents; per segment the
+store adds a path and a sequence number. entries dropped by the size limit
+stay in the log as an archive unless `archive=False`; the files go away
+with the workspace directory in `destroy_workspace`.
+
+open files: the log files of every store in the process share one pool of
+`open_files.max_open` (default 64) descriptors (`FileHandles`), so
+thousands of live workspaces stay far below the fd limit. a segment is
+opened when it is written or read, and closed when the pool needs room.
+
+each store opens a new epoch (the number before the dash), so a cleared
+transcript or a restarted process never appends to an old segment.
+
+usage:
+    manager = SpillingWorkspaceManager(workspaces_root=Path("/tmp/ws"), hot_entries=256)
+    workspace = await manager.create_workspace(...)  # routers spill to /tmp/ws/<id>/.transcript
+
+    install_spilling_auto_workspaces(hot_entries=64)  # for get_auto_workspace_manager()
+"""
+
+from __future__ import annotations
+
+import json
+import bisect
+import logging
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+
+import synqed
+
+from compact_transcript import NOT_RESIDENT, CompactMessageRouter, CompactTranscript, CompactWorkspaceManager
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_DIRNAME = ".transcript"
+DEFAULT_HOT_ENTRIES = 256
+DEFAULT_SEGMENT_ENTRIES = 4096
+DEFAULT_MAX_OPEN_FILES = 64
+_MAX_SEGMENT_BYTES = 2 ** 32 - 1  # line offsets are stored as 32-bit
+
+
+class FileHandles:
+    """
+    least recently used open log files, shared by every spilling transcript
+    in the process, so thousands of live workspaces hold at most `max_open`
+    file descriptors. a file closed to make room is reopened when next used.
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN_FILES):
+        if max_open < 1:
+            raise ValueError("max_open must be >= 1")
+        self.max_open = max_open
+        self._files: OrderedDict[tuple[Path, str], BinaryIO] = OrderedDict()
+
+    def get(self, path: Path, mode: str) -> BinaryIO:
+        """the open file for `path` in `mode` ("ab" or "rb"), opening it if needed."""
+        key = (path, mode)
+        handle = self._files.get(key)
+        if handle is not None:
+            self._files.move_to_end(key)
+            return handle
+        while len(self._files) >= self.max_open:
+            self._files.popitem(last=False)[1].close()
+        handle = self._files[key] = open(path, mode)
+        return handle
+
+    def flush(self, path: Path) -> None:
+        """flush buffered appends to `path`, so a reader sees them."""
+        handle = self._files.get((path, "ab"))
+        if handle is not None:
+            handle.flush()
+
+    def close(self, path: Path, mode: Optional[str] = None) -> None:
+        """close `path` (in `mode` only, if given)."""
+        for key in [(path, mode)] if mode else [(path, "ab"), (path, "rb")]:
+            handle = self._files.pop(key, None)
+            if handle is not None:
+                handle.close()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+open_files = FileHandles()
+
+
+class SpillingTranscript(CompactTranscript):
+    """
+    `CompactTranscript` that logs every entry to disk and keeps only the
+    newest `hot_entries` contents in memory.
+    """
+
+    __slots__ = (
+        "directory", "hot_entries", "segment_entries", "archive", "_epoch", "_segments",
+        "_segment_start", "_line_at", "_write_pos", "_segment_count", "_resident_from", "_evicted",
+    )
+
+    def __init__(
+        self,
+        directory: Path,
+        hot_entries: int = DEFAULT_HOT_ENTRIES,
+        segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+        archive: bool = True,
+    ):
+        if hot_entries < 0 or segment_entries < 1:
+            raise ValueError("hot_entries must be >= 0 and segment_entries >= 1")
+        super().__init__()
+        self.directory = Path(directory)
+        self.hot_entries = hot_entries
+        self.segment_entries = segment_entries
+        self.archive = archive
+        self._epoch = 1 + max((_segment_epoch(path) for path in self.directory.glob("*.ndjson")), default=0)
+        self._segments: list[Path] = []
+        self._segment_start: list[int] = []  # per segment: sequence number of its first entry
+        self._line_at = array("I")  # per column position: byte offset of the entry's line in its segment
+        self._write_pos = 0
+        self._segment_count = 0
+        self._resident_from = 0  # oldest sequence number whose content may still be in memory
+        self._evicted = 0  # contents evicted since the arena was last rebuilt
+
+    # ========================================================================
+    # writing
+    # ========================================================================
+
+    def append(self, entry: Mapping) -> int:
+        seq = super().append(entry)
+        line = json.dumps(dict(entry), default=repr).encode("utf-8") + b"\n"
+        if (
+            not self._segments
+            or self._segment_count >= self.segment_entries
+            or self._write_pos + len(line) > _MAX_SEGMENT_BYTES
+        ):
+            self._open_segment(seq)
+        open_files.get(self._segments[-1], "ab").write(line)
+        self._line_at.append(self._write_pos)
+        self._write_pos += len(line)
+        self._segment_count += 1
+        self._evict(self.end_seq - self.hot_entries)
+        return seq
+
+    def _open_segment(self, seq: int) -> None:
+        if self._segments:
+            open_files.close(self._segments[-1], "ab")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self._epoch:04d}-{seq:012d}.ndjson"
+        self._segments.append(path)
+        self._segment_start.append(seq)
+        self._write_pos = open_files.get(path, "ab").tell()
+        self._segment_count = 0
+
+    def _evict(self, cold: int) -> None:
+        """drop the in-memory contents of entries older than `cold`."""
+        slots = self._content_slot
+        for seq in range(max(self._resident_from, self._offset), cold):
+            pos = seq - self._offset
+            if slots[pos] != 0:  # slot 0 is "" and non-string contents, which cost nothing
+                slots[pos] = NOT_RESIDENT
+                self._evicted += 1
+        self._resident_from = max(self._resident_from, cold)
+        # the arena only shrinks when rebuilt; do it once per hot window's worth of evictions
+        if self._evicted >= max(self.hot_entries, 1024):
+            self._rebuild_arena()
+            self._evicted = 0
+
+    def _compact(self) -> None:
+        dead = self.first_seq - self._offset
+        self._line_at = self._line_at[dead:]
+        super()._compact()
+        self._evicted = 0
+        if not self.archive:
+            self._remove_dropped_segments()
+
+    def _remove_dropped_segments(self) -> None:
+        """delete the segments that hold only dropped entries."""
+        for path in self._segments[:self._segment_index(self.first_seq)]:
+            open_files.close(path)
+            if path.exists():
+                path.unlink()
+
+    def close(self) -> None:
+        """close the store's open log files; they are reopened if the store is used again."""
+        for path in self._segments:
+            open_files.close(path)
+
+    # ========================================================================
+    # reading
+    # ========================================================================
+
+    def _entry_content(self, seq: int, pos: int) -> str:
+        slot = self._content_slot[pos]
+        if slot != NOT_RESIDENT:
+            return self._content(slot)
+        return json.loads(self._read_line(self._segment_index(seq), self._line_at[pos]))["content"]
+
+    def _segment_index(self, seq: int) -> int:
+        return max(bisect.bisect_right(self._segment_start, seq) - 1, 0)
+
+    def _read_line(self, segment: int, offset: int) -> bytes:
+        path = self._segments[segment]
+        if segment == len(self._segments) - 1:
+            open_files.flush(path)
+        reader = open_files.get(path, "rb")
+        reader.seek(offset)
+        return reader.readline()
+
+    @property
+    def segments(self) -> list[Path]:
+        """log files written by this store, oldest first."""
+        return list(self._segments)
+
+    @property
+    def nbytes(self) -> int:
+        return super().nbytes + self._line_at.itemsize * len(self._line_at)
+
+
+def _segment_epoch(path: Path) -> int:
+    try:
+        return int(path.name.split("-", 1)[0])
+    except ValueError:
+        return 0
+
+
+# ============================================================================
+# router and workspace managers
+# ============================================================================
+
+class SpillingMessageRouter(CompactMessageRouter):
+    """
+    `CompactMessageRouter` whose transcript spills to a segmented log in
+    `directory`, keeping `hot_entries` contents in memory.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        hot_entries: int = DEFAULT_HOT_ENTRIES,
+        segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+        archive: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.hot_entries = hot_entries
+        self.segment_entries = segment_entries
+        self.archive = archive
+        super().__init__()
+
+    def _new_transcript(self) -> SpillingTranscript:
+        return SpillingTranscript(self.directory, self.hot_entries, self.segment_entries, self.archive)
+
+    def clear_transcript(self) -> None:
+        self._transcript.close()
+        super().clear_transcript()
+
+    def close(self) -> None:
+        """close the transcript's log files."""
+        self._transcript.close()
+
+
+def use_spilling_transcript(
+    workspace: synqed.Workspace,
+    hot_entries: int = DEFAULT_HOT_ENTRIES,
+    segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+    archive: bool = True,
+) -> SpillingMessageRouter:
+    """
+    switch a workspace to a `SpillingMessageRouter` logging to
+    `<workspace.directory>/.transcript` (a no-op if it already uses one).
+    """
+    if not isinstance(workspace.router, SpillingMessageRouter):
+        workspace.router = SpillingMessageRouter.from_router(
+            workspace.router,
+            directory=Path(workspace.directory) / TRANSCRIPT_DIRNAME,
+            hot_entries=hot_entries,
+            segment_entries=segment_entries,
+            archive=archive,
+        )
+    return workspace.router
+
+
+def close_transcript(workspace: synqed.Workspace) -> None:
+    """close a workspace's transcript log, if its router spills."""
+    if isinstance(workspace.router, SpillingMessageRouter):
+        workspace.router.close()
+
+
+class SpillingWorkspaceManager(CompactWorkspaceManager):
+    """workspace manager whose workspaces spill their transcripts under `workspaces_root`."""
+
+    def __init__(
+        self,
+        *args: Any,
+        hot_entries: int = DEFAULT_HOT_ENTRIES,
+        segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+        archive: bool = True,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.hot_entries = hot_entries
+        self.segment_entries = segment_entries
+        self.archive = archive
+
+    async def create_workspace(self, *args, **kwargs) -> synqed.Workspace:
+        workspace = await super().create_workspace(*args, **kwargs)
+        use_spilling_transcript(workspace, self.hot_entries, self.segment_entries, self.archive)
+        return workspace
+
+    async def destroy_workspace(self, workspace_id: str) -> None:
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is not None:
+            close_transcript(workspace)
+        await super().destroy_workspace(workspace_id)
+
+
+class SpillingAutoWorkspaceManager(synqed.AutoWorkspaceManager):
+    """`AutoWorkspaceManager` whose per-thread workspaces spill their transcripts."""
+
+    def __init__(
+        self,
+        config: Optional[synqed.AutoWorkspaceConfig] = None,
+        hot_entries: int = DEFAULT_HOT_ENTRIES,
+        segment_entries: int = DEFAULT_SEGMENT_ENTRIES,
+        archive: bool = True,
+    ):
+        super().__init__(config)
+        self.hot_entries = hot_entries
+        self.segment_entries = segment_entries
+        self.archive = archive
+
+    async def get_or_create_workspace(self, sender: str, recipient: str, thread_id: str) -> Optional[synqed.Workspace]:
+        workspace = await super().get_or_create_workspace(sender, recipient, thread_id)
+        if workspace is not None:
+            use_spilling_transcript(workspace, self.hot_entries, self.segment_entries, self.archive)
+        return workspace
+
+    async def cleanup_workspace(self, workspace_id: str) -> None:
+        workspace = self.workspace_manager.workspaces.get(workspace_id)
+        if workspace is not None:
+            close_transcript(workspace)
+        await super().cleanup_workspace(workspace_id)
+
+
+def install_spilling_auto_workspaces(
+    config: Optional[synqed.AutoWorkspaceConfig] = None, **kwargs: Any
+) -> SpillingAutoWorkspaceManager:
+    """make `get_auto_workspace_manager()` return a `SpillingAutoWorkspaceManager`."""
+    manager = SpillingAutoWorkspaceManager(config, **kwargs)
+    synqed.set_auto_workspace_manager(manager)
+    return manager
@@ -0,0 +1,1058 @@
+"""
+Offline benchmarks for the workspace execution helpers in this directory.
+
+Agents are simulated (a sleep stands in for the LLM call), so no API key is
+needed and timings isolate the framework overhead being measured.
+
+Benchmarks:
+- parallel-agents: the single_workspace.py broadcast pattern. One agent
+  broadcasts to "ALL" peers in a single workspace; with parallel_agents the
+  peers' turns overlap, so wall time drops from the sum of their latencies
+  to roughly the slowest one.
+- history: one get_conversation_history() call per turn against transcripts
+  of 1k-10k messages, uncached (AgentLogicContext) vs the incremental
+  HistoryCache. Outputs are checked to be identical.
+- history-budget: history size and cost per turn with a token budget
+  (max_tokens), unbounded vs the "window" and "summarize" strategies.
+- transcript-memory: memory held by the transcripts of many workspaces,
+  MessageRouter's list of dicts vs CompactMessageRouter.
+- transcript-spill: one long-running workspace, resident transcript memory
+  in RAM (MessageRouter, CompactMessageRouter) vs SpillingMessageRouter,
+  which logs to disk and keeps a hot tail of contents in memory.
+- transcript-queries: final-answer lookup, per-sender window and completion
+  status, scanning get_transcript() vs CompactMessageRouter's indexes.
+- recovery: cost of journaling routed messages (DurableWorkspaceManager vs
+  CompactWorkspaceManager) and time to recover the journaled workspaces.
+- llm-clients: agent turns against a local mock of the Anthropic messages
+  endpoint (HTTPS with a throwaway self-signed certificate when the openssl
+  CLI is available), a new AsyncAnthropic per turn vs LLMClientPool.
+  --connect-delay adds a simulated network round trip to every new
+  connection.
+- llm-complete: many agents sending requests in one scheduler tick against
+  a mock provider with limited capacity, one messages.create each vs
+  LLMClientPool.complete() (identical prompts deduplicated) vs complete()
+  through the message batches API.
+- prompt-cache: prompt tokens read from the (simulated) provider prompt
+  cache per workspace, the examples' single-string system prompt vs
+  prompt_cache.cached_prompt().
+- protocol: cost per turn of the interaction protocol for registries of 10
+  to 500 agents, synqed.get_interaction_protocol() vs the memoized
+  prompt_cache.interaction_protocol() (whole registry and one workspace's
+  agents). Outputs are checked to hold the same lines.
+- streaming: a Writer sends a ~500-word story to an Editor, generated by a
+  simulated token stream (time to first token, then one word per
+  --token-delay). A consumer reads it with MessageStreams.stream(); the
+  Writer's logic returns the full completion vs streaming.stream_response().
+  Reports when the consumer sees the first and last words and, from the
+  start of the Writer's turn, when the recipient is known and when the
+  message is routed.
+
+Usage:
+    python workspace_benchmarks.py parallel-agents
+    python workspace_benchmarks.py parallel-agents --peers 6 --latency 0.2 --jitter 0.3
+    python workspace_benchmarks.py history --sizes 1000 5000 10000
+    python workspace_benchmarks.py history-budget --max-tokens 4000
+    python workspace_benchmarks.py transcript-memory --workspaces 1000 --messages 200
+    python workspace_benchmarks.py transcript-spill --messages 20000 --hot-entries 256
+    python workspace_benchmarks.py transcript-queries --sizes 1000 10000
+    python workspace_benchmarks.py recovery --workspaces 20 --messages 500
+    python workspace_benchmarks.py llm-clients --agents 8 --turns 20 --connect-delay 0.03
+    python workspace_benchmarks.py llm-complete --agents 48 --distinct 16 --capacity 8
+    python workspace_benchmarks.py prompt-cache --workspaces 4 --agents 6 --turns 10
+    python workspace_benchmarks.py protocol --sizes 10 100 500
+    python workspace_benchmarks.py streaming --words 500 --first-token 0.3 --token-delay 0.005
+"""
+import asyncio
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import shutil
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import synqed
+from synqed.execution_engine import Context
+
+from compact_transcript import CompactMessageRouter, CompactWorkspaceManager, completion_status, count, last_message, messages
+from conversation_history import estimate_tokens, history_cache
+from llm_clients import CompletionPolicy, LLMClientPool
+from prompt_cache import cached_prompt, interaction_protocol
+from streaming import message_streams, stream_response
+from transcript_spill import SpillingMessageRouter
+from workspace_recovery import DurableWorkspaceManager
+from workspace_scheduling import EventDrivenExecutionEngine
+
+logging.basicConfig(level=logging.ERROR)
+
+
+# ============================================================================
+# parallel-agents
+# ============================================================================
+
+def register_broadcast_team(latencies: dict[str, float]) -> list[str]:
+    """Register a lead that broadcasts to ALL, plus peers that reply after a simulated LLM call."""
+
+    async def lead_logic(context: synqed.AgentLogicContext) -> dict:
+        latest = context.latest_message
+        if latest and latest.from_agent == "USER":
+            return {"send_to": "ALL", "content": "Share your part of the plan."}
+        return None
+
+    async def peer_logic(context: synqed.AgentLogicContext) -> dict:
+        await asyncio.sleep(latencies[context.agent_name])
+        return {"send_to": "USER", "content": f"{context.agent_name}: my part is ready."}
+
+    synqed.AgentRuntimeRegistry.register(
+        "lead", synqed.Agent(name="lead", description="Broadcasts the task", logic=lead_logic, default_target="USER")
+    )
+    for name in latencies:
+        synqed.AgentRuntimeRegistry.register(
+            name, synqed.Agent(name=name, description="Peer specialist", logic=peer_logic, default_target="USER")
+        )
+    return ["lead", *latencies]
+
+
+async def run_broadcast(latencies: dict[str, float], parallel_agents: bool) -> tuple[float, int]:
+    """Run one broadcast round; returns (wall seconds, replies delivered to USER)."""
+    agents = register_broadcast_team(latencies)
+    with tempfile.TemporaryDirectory() as root:
+        workspace_manager = synqed.WorkspaceManager(workspaces_root=Path(root))
+        workspace = await workspace_manager.create_workspace(
+            task_tree_node=synqed.TaskTreeNode(id="team", description="Broadcast team", required_agents=agents, children=[]),
+            parent_workspace_id=None,
+        )
+        engine = EventDrivenExecutionEngine(
+            planner=None,
+            workspace_manager=workspace_manager,
+            enable_display=False,
+            parallel_agents=parallel_agents,
+        )
+        await workspace.route_message("USER", "lead", "Plan the party.", manager=workspace_manager)
+
+        start = time.perf_counter()
+        await engine.run(workspace.workspace_id)
+        elapsed = time.perf_counter() - start
+
+        replies = count(workspace.router, to="USER", from_=latencies)
+    return elapsed, replies
+
+
+def bench_parallel_agents(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    latencies = {
+        f"peer{i}": args.latency + rng.uniform(0, args.jitter)
+        for i in range(args.peers)
+    }
+    print(f"\nBroadcast to {args.peers} peers (simulated LLM latency {args.latency:.2f}-{args.latency + args.jitter:.2f}s)")
+    print(f"  sum of latencies: {sum(latencies.values()):.2f}s, slowest: {max(latencies.values()):.2f}s\n")
+    print(f"  {'mode':<12} {'wall(s)':>8} {'replies':>8}")
+    for parallel_agents in (False, True):
+        elapsed, replies = asyncio.run(run_broadcast(latencies, parallel_agents))
+        mode = "parallel" if parallel_agents else "sequential"
+        print(f"  {mode:<12} {elapsed:>8.2f} {replies:>8}")
+
+
+# ============================================================================
+# history
+# ============================================================================
+
+async def build_history_workspace(root: Path, agents: list[str]) -> synqed.Workspace:
+    """Create a workspace of simple agents whose transcript the benchmark grows by hand."""
+
+    async def idle_logic(context: synqed.AgentLogicContext) -> dict:
+        return None
+
+    for name in agents:
+        synqed.AgentRuntimeRegistry.register(
+            name, synqed.Agent(name=name, description="History reader", logic=idle_logic, default_target="USER")
+        )
+    workspace_manager = synqed.WorkspaceManager(workspaces_root=root)
+    return await workspace_manager.create_workspace(
+        task_tree_node=synqed.TaskTreeNode(id="history", description="History benchmark", required_agents=agents, children=[]),
+        parent_workspace_id=None,
+    )
+
+
+FILLER = "Details on the findings so far, open questions and the next steps planned for this part. "
+
+
+def append_turn(workspace: synqed.Workspace, agents: list[str], index: int, filler: int = 0) -> None:
+    """Append one JSON-structured agent message (plus `filler` sentences) to the workspace transcript."""
+    sender = agents[index % len(agents)]
+    recipient = "ALL" if index % 5 == 0 else agents[(index + 1) % len(agents)]
+    content = f"Turn {index}: progress update from {sender}. {FILLER * filler}".rstrip()
+    workspace.router.add_transcript_entry({
+        "timestamp": time.time(),
+        "workspace_id": workspace.workspace_id,
+        "from": sender,
+        "to": recipient,
+        "message_id": f"msg-{index}",
+        "content": json.dumps({"send_to": recipient, "content": content}),
+    })
+
+
+def history_context(workspace: synqed.Workspace, agent_name: str) -> Context:
+    agent = workspace.agents[agent_name]
+    return Context(
+        agent_name=agent_name,
+        workspace=workspace,
+        workspace_id=workspace.workspace_id,
+        messages=[],
+        memory=agent.memory,
+        default_target=agent.default_target,
+    )
+
+
+def bench_history(args: argparse.Namespace) -> None:
+    agents = [f"agent{i}" for i in range(args.agents)]
+    print(f"\nget_conversation_history() per turn, {args.agents} agents, {args.turns} turns measured per size\n")
+    print(f"  {'messages':>8} {'uncached(ms)':>13} {'cached(ms)':>11} {'speedup':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            workspace = asyncio.run(build_history_workspace(Path(root), agents))
+            contexts = {name: history_context(workspace, name) for name in agents}
+            cache = history_cache(workspace.router)
+            for index in range(size):
+                append_turn(workspace, agents, index)
+            for context in contexts.values():
+                cache.render(context)  # warm up: the first call renders everything once
+
+            uncached = cached = 0.0
+            for turn in range(args.turns):
+                append_turn(workspace, agents, size + turn)
+                context = contexts[agents[turn % len(agents)]]
+
+                start = time.perf_counter()
+                expected = context.get_conversation_history()
+                uncached += time.perf_counter() - start
+
+                start = time.perf_counter()
+                actual = cache.render(context)
+                cached += time.perf_counter() - start
+
+                if actual != expected:
+                    raise AssertionError(f"cached history differs from get_conversation_history() at {size + turn} messages")
+
+        uncached_ms = uncached / args.turns * 1000
+        cached_ms = cached / args.turns * 1000
+        print(f"  {size:>8} {uncached_ms:>13.3f} {cached_ms:>11.3f} {uncached_ms / cached_ms:>7.0f}x")
+
+
+def bench_history_budget(args: argparse.Namespace) -> None:
+    agents = [f"agent{i}" for i in range(args.agents)]
+    print(
+        f"\nHistory per turn with max_tokens={args.max_tokens}, {args.agents} agents, "
+        f"~{estimate_tokens(FILLER * args.filler)} tokens per message\n"
+    )
+    print(f"  {'messages':>8} {'strategy':<10} {'tokens':>8} {'ms/turn':>8} {'summaries':>10}")
+    for size in args.sizes:
+        for strategy in (None, "window", "summarize"):
+            with tempfile.TemporaryDirectory() as root:
+                workspace = asyncio.run(build_history_workspace(Path(root), agents))
+                contexts = {name: history_context(workspace, name) for name in agents}
+                cache = history_cache(workspace.router)
+                budget = {} if strategy is None else {"max_tokens": args.max_tokens, "strategy": strategy}
+                for index in range(size):
+                    append_turn(workspace, agents, index, args.filler)
+                for context in contexts.values():
+                    cache.render(context, **budget)
+
+                tokens = elapsed = 0.0
+                for turn in range(args.turns):
+                    append_turn(workspace, agents, size + turn, args.filler)
+                    start = time.perf_counter()
+                    history = cache.render(contexts[agents[turn % len(agents)]], **budget)
+                    elapsed += time.perf_counter() - start
+                    tokens += estimate_tokens(history)
+
+            print(
+                f"  {size:>8} {strategy or 'unbounded':<10} {tokens / args.turns:>8.0f} "
+                f"{elapsed / args.turns * 1000:>8.3f} {cache.summaries_computed:>10}"
+            )
+
+
+# ============================================================================
+# transcript-memory
+# ============================================================================
+
+def fill_router(router: synqed.MessageRouter, workspace_id: str, messages: int, distinct: int) -> None:
+    """Route-shaped transcript entries: 4 agents, `distinct` different message texts."""
+    agents = [f"agent{i}" for i in range(4)]
+    for index in range(messages):
+        sender = agents[index % len(agents)]
+        recipient = "ALL" if index % 5 == 0 else agents[(index + 1) % len(agents)]
+        router.add_transcript_entry({
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "workspace_id": workspace_id,
+            "from": sender,
+            "to": recipient,
+            "message_id": f"msg-{workspace_id}-{recipient}-{index}",
+            "content": json.dumps({
+                "send_to": recipient,
+                "content": f"Update {index % distinct}: {FILLER * (index % 3)}".rstrip(),
+            }),
+        })
+
+
+def bench_transcript_memory(args: argparse.Namespace) -> None:
+    print(
+        f"\nTranscripts of {args.workspaces} workspaces x {args.messages} messages "
+        f"({args.distinct} distinct message texts)\n"
+    )
+    print(f"  {'router':<22} {'memory(MB)':>11} {'bytes/msg':>10} {'iterate(ms)':>12}")
+    for router_class in (synqed.MessageRouter, CompactMessageRouter):
+        tracemalloc.start()
+        routers = []
+        for index in range(args.workspaces):
+            router = router_class()
+            fill_router(router, f"ws-{index:05d}", args.messages, args.distinct)
+            routers.append(router)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for router in routers:
+            sum(1 for entry in router.get_transcript() if entry["to"] == "ALL")
+        elapsed = time.perf_counter() - start
+
+        total = args.workspaces * args.messages
+        print(f"  {router_class.__name__:<22} {held / 2**20:>11.1f} {held / total:>10.0f} {elapsed * 1000:>12.1f}")
+        del routers
+
+
+# ============================================================================
+# transcript-spill
+# ============================================================================
+
+def bench_transcript_spill(args: argparse.Namespace) -> None:
+    print(
+        f"\nOne workspace x {args.messages} messages "
+        f"(spilling router keeps {args.hot_entries} contents in memory)\n"
+    )
+    print(f"  {'router':<22} {'memory(MB)':>11} {'bytes/msg':>10} {'append(us)':>11} {'disk(MB)':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        factories = {
+            "MessageRouter": synqed.MessageRouter,
+            "CompactMessageRouter": CompactMessageRouter,
+            "SpillingMessageRouter": lambda: SpillingMessageRouter(Path(root) / "transcript", hot_entries=args.hot_entries),
+        }
+        expected = None
+        for name, factory in factories.items():
+            tracemalloc.start()
+            router = factory()
+            start = time.perf_counter()
+            fill_router(router, "ws-long-running", args.messages, args.distinct)
+            elapsed = time.perf_counter() - start
+            held = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            # the spilled contents read back exactly (timestamps differ between runs)
+            transcript = [(entry["from"], entry["to"], entry["content"]) for entry in router.get_transcript()]
+            if expected is None:
+                expected = transcript
+            elif transcript != expected:
+                raise AssertionError(f"{name} transcript differs from MessageRouter's")
+            disk = sum(path.stat().st_size for path in Path(root).rglob("*.ndjson")) if name.startswith("Spilling") else 0
+            print(
+                f"  {name:<22} {held / 2**20:>11.1f} {held / args.messages:>10.0f} "
+                f"{elapsed / args.messages * 1e6:>11.1f} {disk / 2**20:>9.1f}"
+            )
+            if isinstance(router, SpillingMessageRouter):
+                router.close()
+            del router, transcript
+
+
+# ============================================================================
+# transcript-queries
+# ============================================================================
+
+async def build_query_workspace(root: Path, router_class: type, size: int) -> synqed.Workspace:
+    """A workspace whose transcript holds `size` messages and ends with one reply to USER."""
+    agents = [f"agent{i}" for i in range(4)]
+    workspace = await build_history_workspace(root, agents)
+    if router_class is CompactMessageRouter:
+        workspace.router = CompactMessageRouter.from_router(workspace.router)
+    fill_router(workspace.router, workspace.workspace_id, size - 1, distinct=50)
+    workspace.router.add_transcript_entry({
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "workspace_id": workspace.workspace_id,
+        "from": "agent0",
+        "to": "USER",
+        "message_id": "final",
+        "content": "Final report.",
+    })
+    return workspace
+
+
+def query_result(result: Any) -> Any:
+    """Comparable form of a query result: (from, to, content) per entry."""
+    if isinstance(result, list):
+        return [query_result(entry) for entry in result]
+    if result is None or "status_message" in result:
+        return result
+    return result["from"], result["to"], result["content"]
+
+
+def bench_transcript_queries(args: argparse.Namespace) -> None:
+    print(f"\nTranscript queries, {args.repeat} calls each\n")
+    print(f"  {'messages':>8} {'query':<24} {'scan(ms)':>9} {'indexed(ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        queries = {
+            "last_message(to=USER)": lambda workspace: last_message(workspace.router, to="USER", kind="message"),
+            "messages(from_, since)": lambda workspace: messages(workspace.router, from_="agent1", since=size - 100),
+            "completion_status": completion_status,
+        }
+        with tempfile.TemporaryDirectory() as root:
+            plain = asyncio.run(build_query_workspace(Path(root) / "plain", synqed.MessageRouter, size))
+            compact = asyncio.run(build_query_workspace(Path(root) / "compact", CompactMessageRouter, size))
+            for name, query in queries.items():
+                if query_result(query(plain)) != query_result(query(compact)):
+                    raise AssertionError(f"{name} differs between the scan and the index at {size} messages")
+                timings = []
+                for workspace in (plain, compact):
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        query(workspace)
+                    timings.append((time.perf_counter() - start) / args.repeat * 1000)
+                print(f"  {size:>8} {name:<24} {timings[0]:>9.3f} {timings[1]:>12.4f} {timings[0] / timings[1]:>7.0f}x")
+
+
+# ============================================================================
+# recovery
+# ============================================================================
+
+async def route_conversations(manager: synqed.WorkspaceManager, workspaces: int, messages: int) -> float:
+    """Create workspaces of 4 agents and route `messages` messages in each; returns seconds spent routing."""
+    agents = [f"agent{i}" for i in range(4)]
+    created = [
+        await manager.create_workspace(
+            task_tree_node=synqed.TaskTreeNode(id=f"team{index}", description="Recovery benchmark", required_agents=agents, children=[]),
+            parent_workspace_id=None,
+        )
+        for index in range(workspaces)
+    ]
+    start = time.perf_counter()
+    for index in range(messages):
+        sender, recipient = agents[index % 4], agents[(index + 1) % 4]
+        for workspace in created:
+            message_id = await workspace.route_message(sender, recipient, f"Update {index}: {FILLER}", manager=manager)
+            if index % 2:
+                workspace.agents[recipient].memory.mark_message_processed(message_id)
+    return time.perf_counter() - start
+
+
+def workspace_state(manager: synqed.WorkspaceManager) -> list:
+    """Comparable form of every workspace: transcript and inboxes."""
+    return [
+        (
+            [(entry["from"], entry["to"], entry["content"]) for entry in workspace.router.get_transcript()],
+            {name: ([message.content for message in agent.memory.messages], sorted(agent.memory.processed_ids))
+             for name, agent in workspace.agents.items()},
+        )
+        for workspace in manager.workspaces.values()
+    ]
+
+
+def bench_recovery(args: argparse.Namespace) -> None:
+    async def run() -> None:
+        await build_history_workspace(Path(tempfile.mkdtemp()), [f"agent{i}" for i in range(4)])  # registers the agents
+        total = args.workspaces * args.messages
+        print(f"\n{args.workspaces} workspaces x {args.messages} routed messages\n")
+        print(f"  {'manager':<26} {'route(us/msg)':>14} {'journal(MB)':>12} {'recover(s)':>11}")
+        with tempfile.TemporaryDirectory() as root:
+            compact = CompactWorkspaceManager(workspaces_root=Path(root) / "compact")
+            elapsed = await route_conversations(compact, args.workspaces, args.messages)
+            print(f"  {'CompactWorkspaceManager':<26} {elapsed / total * 1e6:>14.1f} {'-':>12} {'-':>11}")
+
+            durable = DurableWorkspaceManager(workspaces_root=Path(root) / "durable", snapshot_every=args.snapshot_every)
+            elapsed = await route_conversations(durable, args.workspaces, args.messages)
+            durable.close()
+            journal = sum(path.stat().st_size for path in durable.journal_dir.iterdir())
+
+            recovered = DurableWorkspaceManager(workspaces_root=Path(root) / "durable")
+            start = time.perf_counter()
+            await recovered.recover()
+            recover_seconds = time.perf_counter() - start
+            if workspace_state(recovered) != workspace_state(durable):
+                raise AssertionError("recovered workspaces differ from the journaled ones")
+            print(
+                f"  {'DurableWorkspaceManager':<26} {elapsed / total * 1e6:>14.1f} "
+                f"{journal / 2**20:>12.1f} {recover_seconds:>11.2f}"
+            )
+
+    asyncio.run(run())
+
+
+# ============================================================================
+# llm-clients
+# ============================================================================
+
+MOCK_MESSAGE = {
+    "id": "msg_bench",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-sonnet-4-5",
+    "content": [{"type": "text", "text": '{"send_to": "USER", "content": "done"}'}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 100, "output_tokens": 10},
+}
+
+
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def self_signed_certificate(directory: Path) -> Any:
+    """Write a localhost certificate with the openssl CLI; returns (cert, key) paths, or None without openssl."""
+    if shutil.which("openssl") is None:
+        return None
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1", "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class MockProvider:
+    """
+    HTTP/1.1 keep-alive mock of the Anthropic messages and message batches
+    endpoints. A message takes `latency` seconds, at most `capacity` at a
+    time; a batch ends `batch_latency` seconds after it is created. Usage
+    reports prompt caching: prefixes ending at a `cache_control` breakpoint
+    (of at least MIN_CACHEABLE_TOKENS) are cached and read back when a later
+    request starts with the same prefix.
+    """
+
+    def __init__(
+        self,
+        latency: float,
+        connect_delay: float = 0.0,
+        tls: Any = None,
+        capacity: int = 1000,
+        batch_latency: float = 1.0,
+    ):
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.tls = tls
+        self.capacity = asyncio.Semaphore(capacity)
+        self.batch_latency = batch_latency
+        self.connections = 0
+        self.requests = 0
+        self.generated = 0
+        self.batches: dict[str, tuple[float, list]] = {}
+        self.cached_prefixes: set[str] = set()
+        self.server = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0, ssl=self.tls)
+        port = self.server.sockets[0].getsockname()[1]
+        self.base_url = f"{'https' if self.tls else 'http'}://127.0.0.1:{port}"
+        return self.base_url
+
+    def reset(self) -> None:
+        self.connections = self.requests = self.generated = 0
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            await asyncio.sleep(self.connect_delay)  # stands in for the tcp and tls round trips
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                method, path, _ = head[0].split(" ", 2)
+                length = 0
+                for line in head[1:]:
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                request = json.loads(await reader.readexactly(length)) if length else None
+                self.requests += 1
+                content_type, body = await self.respond(method, path.split("?", 1)[0], request)
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\ncontent-type: {content_type}\r\ncontent-length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method: str, path: str, request: Any) -> tuple[str, bytes]:
+        if path == "/v1/messages":
+            async with self.capacity:
+                await asyncio.sleep(self.latency)
+                self.generated += 1
+            return "application/json", json.dumps(self.message(request)).encode()
+        if path == "/v1/messages/batches":
+            batch_id = f"msgbatch_{len(self.batches)}"
+            self.batches[batch_id] = (time.monotonic(), request["requests"])
+            return "application/json", json.dumps(self.batch(batch_id)).encode()
+        batch_id = path.split("/")[4]
+        if path.endswith("/results"):
+            _, requests = self.batches[batch_id]
+            self.generated += len(requests)
+            lines = [
+                json.dumps({"custom_id": item["custom_id"], "result": {"type": "succeeded", "message": self.message(item["params"])}})
+                for item in requests
+            ]
+            return "application/binary", "\n".join(lines).encode()
+        return "application/json", json.dumps(self.batch(batch_id)).encode()
+
+    def message(self, request: dict) -> dict:
+        """MOCK_MESSAGE with the prompt usage of `request`."""
+        parts = []  # (text, ends at a breakpoint)
+        system = request.get("system") or []
+        for block in [{"type": "text", "text": system}] if isinstance(system, str) else system:
+            parts.append((block["text"], "cache_control" in block))
+        for message in request["messages"]:
+            content = message["content"]
+            for block in [{"type": "text", "text": content}] if isinstance(content, str) else content:
+                parts.append((f"{message['role']}: {block['text']}", "cache_control" in block))
+
+        digest, tokens, breakpoints = hashlib.sha256(), 0, []
+        for text, breakpoint in parts:
+            digest.update(f"{len(text)}:{text}".encode())
+            tokens += estimate_tokens(text)
+            if breakpoint and tokens >= MIN_CACHEABLE_TOKENS:
+                breakpoints.append((digest.hexdigest(), tokens))
+        read = max((cached for prefix, cached in breakpoints if prefix in self.cached_prefixes), default=0)
+        written = breakpoints[-1][1] - read if breakpoints else 0
+        self.cached_prefixes.update(prefix for prefix, _ in breakpoints)
+        usage = {"input_tokens": tokens - read - written, "cache_read_input_tokens": read, "cache_creation_input_tokens": written, "output_tokens": 10}
+        return {**MOCK_MESSAGE, "usage": usage}
+
+    def batch(self, batch_id: str) -> dict:
+        created, requests = self.batches[batch_id]
+        ended = time.monotonic() - created >= self.batch_latency
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(requests), "succeeded": len(requests) if ended else 0,
+                "errored": 0, "canceled": 0, "expired": 0,
+            },
+            "created_at": "2025-01-01T00:00:00Z",
+            "expires_at": "2025-01-02T00:00:00Z",
+            "ended_at": "2025-01-01T00:00:01Z" if ended else None,
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run_llm_turns(agents: int, turns: int, get_client: Any) -> tuple[float, list[float]]:
+    """`agents` concurrent agents making `turns` sequential calls each; returns (wall seconds, turn latencies)."""
+    latencies: list[float] = []
+
+    async def agent(index: int) -> None:
+        for turn in range(turns):
+            start = time.perf_counter()
+            client = get_client()
+            await client.messages.create(
+                model="claude-sonnet-4-5",
+                max_tokens=256,
+                messages=[{"role": "user", "content": f"agent {index}, turn {turn}"}],
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(index) for index in range(agents)))
+    return time.perf_counter() - start, latencies
+
+
+def bench_llm_clients(args: argparse.Namespace) -> None:
+    import anthropic
+
+    async def run(certificate: Any) -> None:
+        tls = None
+        if certificate:
+            tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            tls.load_cert_chain(*certificate)
+        provider = MockProvider(args.latency, args.connect_delay, tls)
+        base_url = await provider.start()
+
+        def verify() -> Any:
+            return ssl.create_default_context(cafile=str(certificate[0])) if certificate else True
+
+        per_turn_clients = []
+
+        def per_turn() -> Any:
+            # what the examples used to do: a new client, and connection pool, every turn
+            client = anthropic.AsyncAnthropic(
+                api_key="bench", base_url=base_url, http_client=anthropic.DefaultAsyncHttpxClient(verify=verify())
+            )
+            per_turn_clients.append(client)
+            return client
+
+        pool = LLMClientPool(max_keepalive_connections=args.agents, verify=verify())
+        scenarios = [
+            ("new client per turn", per_turn),
+            ("LLMClientPool", lambda: pool.anthropic(api_key="bench", base_url=base_url)),
+        ]
+        print(
+            f"\n{args.agents} agents x {args.turns} turns over {'https' if tls else 'http (openssl not found)'}, "
+            f"provider latency {args.latency * 1000:.0f}ms, connect delay {args.connect_delay * 1000:.0f}ms\n"
+        )
+        print(f"  {'clients':<22} {'wall(s)':>8} {'mean(ms)':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'connections':>12}")
+        for name, get_client in scenarios:
+            provider.connections = 0
+            wall, latencies = await run_llm_turns(args.agents, args.turns, get_client)
+            p95 = statistics.quantiles(latencies, n=20)[18]
+            print(
+                f"  {name:<22} {wall:>8.2f} {statistics.mean(latencies) * 1000:>9.1f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {p95 * 1000:>8.1f} {provider.connections:>12}"
+            )
+        for client in per_turn_clients:
+            await client.close()
+        await pool.aclose()
+        await provider.stop()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(self_signed_certificate(Path(directory))))
+
+
+def bench_llm_complete(args: argparse.Namespace) -> None:
+    async def fan_out(send: Any) -> float:
+        # every agent woken in the same tick sends its request; `distinct` different prompts among them
+        requests = [
+            {
+                "model": "claude-sonnet-4-5",
+                "max_tokens": 256,
+                "messages": [{"role": "user", "content": f"Summarize part {index % args.distinct} of the plan."}],
+            }
+            for index in range(args.agents)
+        ]
+        start = time.perf_counter()
+        await asyncio.gather(*(send(request) for request in requests))
+        return time.perf_counter() - start
+
+    async def run() -> None:
+        provider = MockProvider(args.latency, capacity=args.capacity, batch_latency=args.batch_latency)
+        base_url = await provider.start()
+        pool = LLMClientPool()
+        pool.set_policy("batched", CompletionPolicy(batch=True, poll_interval=args.batch_latency / 4))
+        scenarios = [
+            ("messages.create", lambda request: pool.anthropic(api_key="bench", base_url=base_url).messages.create(**request)),
+            ("complete()", lambda request: pool.complete(api_key="bench", base_url=base_url, **request)),
+            ("complete(), batched", lambda request: pool.complete(workspace_id="batched", api_key="bench", base_url=base_url, **request)),
+        ]
+        print(
+            f"\n{args.agents} agents in one tick, {args.distinct} distinct prompts, provider latency "
+            f"{args.latency * 1000:.0f}ms x {args.capacity} concurrent, batch latency {args.batch_latency:.1f}s\n"
+        )
+        print(f"  {'path':<22} {'wall(s)':>8} {'generated':>10} {'http requests':>14}")
+        for name, send in scenarios:
+            provider.reset()
+            wall = await fan_out(send)
+            print(f"  {name:<22} {wall:>8.2f} {provider.generated:>10} {provider.requests:>14}")
+        print(f"\n  {pool.stats}")
+        await pool.aclose()
+        await provider.stop()
+
+    asyncio.run(run())
+
+
+# ============================================================================
+# prompt-cache
+# ============================================================================
+
+def register_roster(size: int) -> list[str]:
+    """Register `size` agents with descriptions and capabilities, as they appear in the team roster."""
+
+    async def idle_logic(context: synqed.AgentLogicContext) -> dict:
+        return None
+
+    roles = [f"specialist{i}" for i in range(size)]
+    for index, role in enumerate(roles):
+        synqed.AgentRuntimeRegistry.register(
+            role,
+            synqed.Agent(
+                name=role,
+                description=f"Owns workstream {index}: research, drafting and review of its deliverables",
+                capabilities=[f"topic {index}", "analysis", "writing"],
+                logic=idle_logic,
+            ),
+        )
+    return roles
+
+
+def bench_prompt_cache(args: argparse.Namespace) -> None:
+    roles = register_roster(args.roster)
+
+    def single_string(context: Any, instructions: str, conversation: str) -> dict:
+        # the examples' layout: one system string, the shared plan after the conversation
+        protocol = synqed.get_interaction_protocol(exclude_agent=context.agent_name)
+        plan = f"\n\nShared Plan:\n{context.shared_plan}" if context.shared_plan else ""
+        return {"system": f"{protocol}\n\n{instructions}", "messages": [{"role": "user", "content": f"{conversation}{plan}"}]}
+
+    async def run() -> None:
+        provider = MockProvider(latency=0.0)
+        base_url = await provider.start()
+        print(
+            f"\n{args.workspaces} workspaces x {args.agents} agents x {args.turns} turns, "
+            f"{args.roster} registered agents\n"
+        )
+        print(f"  {'layout':<16} {'prompt tokens':>14} {'cached':>7} {'uncached':>9}")
+        pools = {}
+        for name, layout in (("single string", single_string), ("cached_prompt", cached_prompt)):
+            pool = pools[name] = LLMClientPool()
+            for workspace in range(args.workspaces):
+                team = roles[workspace * args.agents:(workspace + 1) * args.agents]
+                plan, conversation = "", ""
+                for turn in range(args.turns):
+                    if turn % 3 == 0:
+                        plan += f"\n- step {turn}: {FILLER}"
+                    conversation += f"\n{team[turn % len(team)]}: {FILLER * 3}"
+                    for role in team:
+                        context = argparse.Namespace(agent_name=role, shared_plan=plan)
+                        instructions = f"YOUR ROLE: {role}\n{FILLER * 5}"
+                        await pool.complete(
+                            workspace_id=f"workspace{workspace}", api_key="bench", base_url=base_url,
+                            model="claude-sonnet-4-5", max_tokens=256, **layout(context, instructions, conversation),
+                        )
+            usage = list(pool.prompt_usage.values())
+            prompt = sum(item.prompt_tokens for item in usage)
+            read = sum(item.cache_read_tokens for item in usage)
+            uncached = sum(item.input_tokens for item in usage)
+            print(f"  {name:<16} {prompt:>14} {read / prompt:>7.1%} {uncached:>9}")
+        pools["cached_prompt"].print_prompt_cache_stats()
+        for pool in pools.values():
+            await pool.aclose()
+        await provider.stop()
+
+    asyncio.run(run())
+
+
+def bench_protocol(args: argparse.Namespace) -> None:
+    async def run() -> None:
+        print(f"\n{args.turns} turns, each agent excluded from its own roster\n")
+        print(f"  {'agents':>7} {'synqed(us)':>11} {'memoized(us)':>13} {'workspace(us)':>14}")
+        for size in args.sizes:
+            synqed.AgentRuntimeRegistry.clear()
+            roles = register_roster(size)
+            with tempfile.TemporaryDirectory() as root:
+                manager = synqed.WorkspaceManager(workspaces_root=Path(root))
+                workspace = await manager.create_workspace(
+                    task_tree_node=synqed.TaskTreeNode(id="team", description="Protocol benchmark", required_agents=roles[:6], children=[]),
+                    parent_workspace_id=None,
+                )
+            for role in roles:
+                if sorted(interaction_protocol(role).splitlines()) != sorted(synqed.get_interaction_protocol(role).splitlines()):
+                    raise AssertionError(f"memoized protocol differs for {role}")
+
+            timings = []
+            for render in (
+                synqed.get_interaction_protocol,
+                interaction_protocol,
+                lambda role: interaction_protocol(role, workspace=workspace),
+            ):
+                start = time.perf_counter()
+                for turn in range(args.turns):
+                    render(roles[turn % len(roles)])
+                timings.append((time.perf_counter() - start) / args.turns)
+            print(f"  {size:>7} {timings[0] * 1e6:>11.1f} {timings[1] * 1e6:>13.2f} {timings[2] * 1e6:>14.2f}")
+
+    asyncio.run(run())
+
+
+# ============================================================================
+# streaming
+# ============================================================================
+
+def story_tokens(words: int) -> list[str]:
+    """A Writer's JSON response holding a story of `words` words, split into word-sized tokens."""
+    rng = random.Random(0)
+    vocabulary = ["the", "lighthouse", "keeper", "said", "\"wait\"", "storm", "harbor", "night", "and", "slowly"]
+    sentences = [" ".join(rng.choice(vocabulary) for _ in range(10)).capitalize() + "." for _ in range(words // 10)]
+    story = "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+    response = json.dumps({"send_to": "Editor", "content": story})
+    return re.findall(r"\S+\s*", response)
+
+
+async def run_story(tokens: list[str], streamed: bool, first_token: float, token_delay: float) -> dict[str, float]:
+    """One Writer -> Editor story; returns latencies in seconds."""
+
+    async def completion():
+        await asyncio.sleep(first_token)
+        for token in tokens:
+            yield token
+            await asyncio.sleep(token_delay)
+
+    async def writer_logic(context: synqed.AgentLogicContext) -> Any:
+        if context.latest_message is None or context.latest_message.from_agent != "USER":
+            return None
+        if streamed:
+            return await stream_response(context, completion())
+        return "".join([token async for token in completion()])
+
+    async def editor_logic(context: synqed.AgentLogicContext) -> dict:
+        return {"send_to": "USER", "content": "Approved."}
+
+    synqed.AgentRuntimeRegistry.register(
+        "Writer", synqed.Agent(name="Writer", description="Writes stories", logic=writer_logic, default_target="Editor")
+    )
+    synqed.AgentRuntimeRegistry.register(
+        "Editor", synqed.Agent(name="Editor", description="Edits stories", logic=editor_logic, default_target="USER")
+    )
+    with tempfile.TemporaryDirectory() as root:
+        workspace_manager = synqed.WorkspaceManager(workspaces_root=Path(root))
+        workspace = await workspace_manager.create_workspace(
+            task_tree_node=synqed.TaskTreeNode(id="story", description="Story", required_agents=["Writer", "Editor"], children=[]),
+            parent_workspace_id=None,
+        )
+        engine = EventDrivenExecutionEngine(
+            planner=None, workspace_manager=workspace_manager, enable_display=False, streaming=True
+        )
+        streams = message_streams(workspace.router)
+        seen: list[float] = []
+        received: list[str] = []
+
+        async def consume() -> None:
+            async for text in streams.stream(sender="Writer", recipient="Editor"):
+                seen.append(time.perf_counter())
+                received.append(text)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        await workspace.route_message("USER", "Writer", "Write a story about a lighthouse.", manager=workspace_manager)
+        start = time.perf_counter()
+        await engine.run(workspace.workspace_id)
+        await asyncio.wait_for(consumer, timeout=5)
+
+        routed = last_message(workspace.router, from_="Writer", to="Editor")
+        if "".join(received) != routed["content"]:
+            raise AssertionError("streamed text differs from the routed message")
+    return {
+        "first": seen[0] - start,
+        "last": seen[-1] - start,
+        "header": statistics.median(streams.stats.header) if streams.stats.header else streams.stats.routed[0],
+        "routed": streams.stats.routed[0],
+        "chunks": len(received),
+    }
+
+
+def bench_streaming(args: argparse.Namespace) -> None:
+    tokens = story_tokens(args.words)
+    print(
+        f"\nWriter -> Editor, {args.words}-word story ({len(tokens)} tokens), first token after "
+        f"{args.first_token * 1000:.0f}ms, then {args.token_delay * 1000:.1f}ms per token\n"
+    )
+    print(f"  {'writer logic':<18} {'first words(s)':>15} {'last words(s)':>14} {'recipient(s)':>13} {'routed(s)':>10} {'chunks':>7}")
+    for streamed in (False, True):
+        results = [asyncio.run(run_story(tokens, streamed, args.first_token, args.token_delay)) for _ in range(args.repeat)]
+        median = {key: statistics.median(result[key] for result in results) for key in results[0]}
+        name = "stream_response()" if streamed else "full completion"
+        print(
+            f"  {name:<18} {median['first']:>15.3f} {median['last']:>14.3f} "
+            f"{median['header']:>13.3f} {median['routed']:>10.3f} {median['chunks']:>7.0f}"
+        )
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline workspace execution benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parallel = subparsers.add_parser("parallel-agents", help="Broadcast fan-out inside one workspace")
+    parallel.add_argument("--peers", type=int, default=3, help="Broadcast recipients (default: 3)")
+    parallel.add_argument("--latency", type=float, default=0.3, help="Base simulated LLM latency in seconds")
+    parallel.add_argument("--jitter", type=float, default=0.3, help="Extra random latency per peer in seconds")
+    parallel.add_argument("--seed", type=int, default=0)
+    parallel.set_defaults(run=bench_parallel_agents)
+
+    history = subparsers.add_parser("history", help="Conversation history rendering per turn")
+    history.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 10000], help="Transcript sizes")
+    history.add_argument("--agents", type=int, default=4, help="Agents reading the history (default: 4)")
+    history.add_argument("--turns", type=int, default=50, help="Measured turns per size (default: 50)")
+    history.set_defaults(run=bench_history)
+
+    budget = subparsers.add_parser("history-budget", help="Token-budgeted conversation history per turn")
+    budget.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Transcript sizes")
+    budget.add_argument("--max-tokens", type=int, default=4000, help="History token budget (default: 4000)")
+    budget.add_argument("--agents", type=int, default=4, help="Agents reading the history (default: 4)")
+    budget.add_argument("--turns", type=int, default=50, help="Measured turns per size (default: 50)")
+    budget.add_argument("--filler", type=int, default=3, help="Filler sentences per message (default: 3)")
+    budget.set_defaults(run=bench_history_budget)
+
+    memory = subparsers.add_parser("transcript-memory", help="Transcript memory across many workspaces")
+    memory.add_argument("--workspaces", type=int, default=500, help="Live workspaces (default: 500)")
+    memory.add_argument("--messages", type=int, default=200, help="Messages per workspace (default: 200)")
+    memory.add_argument("--distinct", type=int, default=50, help="Distinct message texts (default: 50)")
+    memory.set_defaults(run=bench_transcript_memory)
+
+    spill = subparsers.add_parser("transcript-spill", help="Resident transcript memory with spill-to-disk")
+    spill.add_argument("--messages", type=int, default=20000, help="Messages in the workspace (default: 20000)")
+    spill.add_argument("--hot-entries", type=int, default=256, help="Contents kept in memory (default: 256)")
+    spill.add_argument("--distinct", type=int, default=1000, help="Distinct message texts (default: 1000)")
+    spill.set_defaults(run=bench_transcript_spill)
+
+    queries = subparsers.add_parser("transcript-queries", help="Indexed transcript lookups vs scans")
+    queries.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Transcript sizes")
+    queries.add_argument("--repeat", type=int, default=20, help="Calls per query (default: 20)")
+    queries.set_defaults(run=bench_transcript_queries)
+
+    recovery = subparsers.add_parser("recovery", help="Journaling overhead and crash recovery time")
+    recovery.add_argument("--workspaces", type=int, default=20, help="Workspaces (default: 20)")
+    recovery.add_argument("--messages", type=int, default=500, help="Messages routed per workspace (default: 500)")
+    recovery.add_argument("--snapshot-every", type=int, default=2000, help="Log records between snapshots (default: 2000)")
+    recovery.set_defaults(run=bench_recovery)
+
+    clients = subparsers.add_parser("llm-clients", help="Per-turn LLM clients vs a shared client pool")
+    clients.add_argument("--agents", type=int, default=8, help="Concurrent agents (default: 8)")
+    clients.add_argument("--turns", type=int, default=20, help="Turns per agent (default: 20)")
+    clients.add_argument("--latency", type=float, default=0.05, help="Simulated provider latency in seconds")
+    clients.add_argument("--connect-delay", type=float, default=0.03, help="Simulated delay per new connection in seconds")
+    clients.set_defaults(run=bench_llm_clients)
+
+    complete = subparsers.add_parser("llm-complete", help="Deduplicated and batched completions in one tick")
+    complete.add_argument("--agents", type=int, default=48, help="Agents sending a request (default: 48)")
+    complete.add_argument("--distinct", type=int, default=16, help="Distinct prompts among them (default: 16)")
+    complete.add_argument("--latency", type=float, default=0.2, help="Simulated provider latency in seconds")
+    complete.add_argument("--capacity", type=int, default=8, help="Requests the provider serves at once (default: 8)")
+    complete.add_argument("--batch-latency", type=float, default=1.0, help="Simulated batch processing time in seconds")
+    complete.set_defaults(run=bench_llm_complete)
+
+    prompts = subparsers.add_parser("prompt-cache", help="Prompt-cache hit ratio of prompt layouts")
+    prompts.add_argument("--workspaces", type=int, default=4, help="Workspaces (default: 4)")
+    prompts.add_argument("--agents", type=int, default=6, help="Agents per workspace (default: 6)")
+    prompts.add_argument("--turns", type=int, default=10, help="Turns per workspace (default: 10)")
+    prompts.add_argument("--roster", type=int, default=40, help="Registered agents (default: 40)")
+    prompts.set_defaults(run=bench_prompt_cache)
+
+    protocol = subparsers.add_parser("protocol", help="Interaction protocol rendering per turn")
+    protocol.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Registered agents")
+    protocol.add_argument("--turns", type=int, default=2000, help="Measured turns per size (default: 2000)")
+    protocol.set_defaults(run=bench_protocol)
+
+    streaming = subparsers.add_parser("streaming", help="Time to first token of a streamed agent message")
+    streaming.add_argument("--words", type=int, default=500, help="Words in the story (default: 500)")
+    streaming.add_argument("--first-token", type=float, default=0.3, help="Simulated time to first token in seconds")
+    streaming.add_argument("--token-delay", type=float, default=0.005, help="Simulated delay per token in seconds")
+    streaming.add_argument("--repeat", type=int, default=3, help="Stories per mode (default: 3)")
+    streaming.set_defaults(run=bench_streaming)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+"""
+durable workspace state and crash recovery for synqed workspace managers.
+
+everything a running hierarchy needs lives in memory: the workspaces and
+their task-tree links, each agent's inbox (`AgentMemory`: messages, which
+of them are processed, the message id counter), transcripts, per-workspace
+counters (`user_message_counter`, `subteam_requests`, `has_started`) and
+the engine's record of which agent requested each subteam. if the process
+dies mid-`engine.run(...)`, all of it is gone.
+
+`DurableWorkspaceManager` journals that state under
+`<workspaces_root>/.journal/`:
+- a write-ahead log (`wal-<generation>.ndjson`): one json record per
+  change, written and flushed as it happens (workspace created, linked or
+  destroyed; message delivered to an inbox; message processed; transcript
+  entry; counters changed).
+- a snapshot (`snapshot-<generation>.json`) of the whole state, written
+  atomically once the log holds `snapshot_every` records and has outgrown
+  the previous snapshot (so snapshot cost stays proportional to the log),
+  and on `checkpoint()`. it starts a new generation; older files are
+  removed.
+
+`recover()` loads the newest snapshot, replays its log (a torn last line is
+ignored), rebuilds the workspaces with fresh agent instances from
+`AgentRuntimeRegistry`, and, given an engine, re-schedules every workspace
+that still has unprocessed messages. the engine's `run_workspace` turns
+those into events, so an agent turn that was in flight at the crash runs
+again: delivery is at-least-once, and messages that turn had already
+routed before the crash are routed twice. a subteam that finished but
+whose `[subteam_result]` never reached its parent gets it re-sent.
+
+the hooks are instance-level wrappers around `router._add_transcript_entry`,
+`router.clear_transcript`, `memory.add_message` and
+`memory.mark_message_processed`, so the library classes are unchanged.
+
+usage:
+    manager = DurableWorkspaceManager(workspaces_root=Path("/var/synqed/run-42"))
+    engine = EventDrivenExecutionEngine(planner=planner, workspace_manager=manager)
+    manager.attach(engine)
+    ...  # create workspaces and run as usual
+
+    # after a crash, in a new process (same agent roles registered):
+    manager = DurableWorkspaceManager(workspaces_root=Path("/var/synqed/run-42"))
+    engine = EventDrivenExecutionEngine(planner=planner, workspace_manager=manager)
+    await manager.recover(engine)
+    await engine.run_global_scheduler()
+"""
+
+from __future__ import annotations
+
+import os
+import copy
+import json
+import logging
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+import synqed
+import synqed.router
+from synqed.memory import InboxMessage
+
+from compact_transcript import CompactWorkspaceManager, last_message, use_compact_transcript
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIRNAME = ".journal"
+DEFAULT_SNAPSHOT_EVERY = 2000
+
+# fields that define a workspace (recorded once, at creation)
+_META_FIELDS = ("workspace_id", "parent_id", "subtask_id", "depth", "workspace_name", "workspace_description", "created_at")
+
+
+class DurableWorkspaceManager(CompactWorkspaceManager):
+    """
+    workspace manager that journals workspace state to disk and can rebuild
+    it after a crash (see the module docstring).
+    """
+
+    def __init__(
+        self,
+        workspaces_root: Optional[Path] = None,
+        snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+        fsync: bool = False,
+    ):
+        """
+        args:
+            workspaces_root: forwarded to `WorkspaceManager`; the journal
+                lives in its `.journal` subdirectory.
+            snapshot_every: minimum log records between snapshots.
+            fsync: fsync every record (survives power loss, not just a
+                process crash; much slower).
+        """
+        super().__init__(workspaces_root=workspaces_root)
+        if snapshot_every < 1:
+            raise ValueError("snapshot_every must be >= 1")
+        self.journal_dir = self.workspaces_root / JOURNAL_DIRNAME
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.engine: Optional[Any] = None
+        self._generation = 0
+        self._wal: Optional[TextIO] = None
+        self._records = 0  # records in the current generation's log
+        self._log_bytes = 0
+        self._snapshot_bytes = 0
+        self._roles: dict[str, list[str]] = {}  # workspace id -> agent roles it was created with
+        self._state: dict[str, dict] = {}  # workspace id -> counters last written to the log
+        self._engine_state: Optional[dict] = None
+        self._replaying = False
+
+    def attach(self, engine: Any) -> None:
+        """
+        journal the engine's subteam bookkeeping along with the workspaces,
+        and a workspace's counters whenever one of its runs ends.
+        """
+        if self.engine is engine:
+            return
+        self.engine = engine
+        run_workspace = engine.run_workspace
+
+        async def journaled_run(workspace_id: str, max_cycles: Optional[int] = None) -> None:
+            try:
+                await run_workspace(workspace_id, max_cycles=max_cycles)
+            finally:
+                workspace = self.workspaces.get(workspace_id)
+                if workspace is not None:
+                    self._write(None, workspace)
+
+        engine.run_workspace = journaled_run
+
+    # ========================================================================
+    # journaled operations
+    # ========================================================================
+
+    async def create_workspace(self, task_tree_node: Any, parent_workspace_id: Optional[str] = None) -> synqed.Workspace:
+        workspace = await super().create_workspace(task_tree_node, parent_workspace_id)
+        roles = list(getattr(task_tree_node, "required_agents", []))
+        self._roles[workspace.workspace_id] = roles
+        model = _workspace_model(workspace, roles)
+        self._state[workspace.workspace_id] = model["state"]
+        self._write({"op": "create", **model})
+        self._instrument(workspace)
+        return workspace
+
+    async def destroy_workspace(self, workspace_id: str) -> None:
+        await super().destroy_workspace(workspace_id)
+        self._roles.pop(workspace_id, None)
+        self._state.pop(workspace_id, None)
+        self._write({"op": "destroy", "ws": workspace_id})
+
+    def link_subteam(self, parent_workspace_id: str, subteam_workspace_id: str) -> None:
+        super().link_subteam(parent_workspace_id, subteam_workspace_id)
+        self._write({"op": "link", "parent": parent_workspace_id, "child": subteam_workspace_id})
+
+    def _instrument(self, workspace: synqed.Workspace) -> None:
+        """wrap the router and agent memories of a workspace so their changes are journaled."""
+        workspace_id = workspace.workspace_id
+        router = workspace.router
+        add_entry, clear_transcript = router._add_transcript_entry, router.clear_transcript
+
+        def journaled_add_entry(entry: dict[str, Any]) -> None:
+            known = isinstance(entry, dict) and entry.get("message_id") in router._transcripted_message_ids
+            add_entry(entry)
+            if not known and isinstance(entry, dict) and entry.get("message_id") in router._transcripted_message_ids:
+                self._write({"op": "transcript", "ws": workspace_id, "entry": entry}, workspace)
+
+        def journaled_clear() -> None:
+            clear_transcript()
+            self._write({"op": "clear", "ws": workspace_id}, workspace)
+
+        router._add_transcript_entry = journaled_add_entry
+        router.clear_transcript = journaled_clear
+
+        for agent_name, agent in workspace.agents.items():
+            if hasattr(agent, "memory"):
+                self._instrument_memory(workspace, agent_name, agent.memory)
+
+    def _instrument_memory(self, workspace: synqed.Workspace, agent_name: str, memory: Any) -> None:
+        workspace_id = workspace.workspace_id
+        add_message, mark_processed = memory.add_message, memory.mark_message_processed
+
+        def journaled_add(from_agent: str, content: str, message_id: Optional[str] = None, target: Optional[str] = None) -> str:
+            known = message_id is not None and memory.has_message(message_id)
+            message_id = add_message(from_agent, content, message_id=message_id, target=target)
+            if not known:
+                self._write({
+                    "op": "message", "ws": workspace_id, "agent": agent_name,
+                    "message": memory.get_message_by_id(message_id).model_dump(),
+                    "counter": memory._message_counter,
+                }, workspace)
+            return message_id
+
+        def journaled_mark(message_id: str) -> None:
+            pending = memory.has_message(message_id) and not memory.is_message_processed(message_id)
+            mark_processed(message_id)
+            if pending:
+                self._write({"op": "processed", "ws": workspace_id, "agent": agent_name, "id": message_id}, workspace)
+
+        memory.add_message = journaled_add
+        memory.mark_message_processed = journaled_mark
+
+    # ========================================================================
+    # log and snapshots
+    # ========================================================================
+
+    def _write(self, record: Optional[dict], workspace: Optional[synqed.Workspace] = None) -> None:
+        """append a record, plus the counters of `workspace` and the engine if they changed."""
+        if self._replaying:
+            return
+        if self._wal is None:
+            self._start_journal()
+        lines = [record] if record is not None else []
+        if workspace is not None:
+            state = _workspace_state(workspace)
+            if state != self._state.get(workspace.workspace_id):
+                self._state[workspace.workspace_id] = state
+                lines.append({"op": "state", "ws": workspace.workspace_id, "state": state})
+        engine_state = self._current_engine_state()
+        if engine_state is not None and engine_state != self._engine_state:
+            self._engine_state = engine_state
+            lines.append({"op": "engine", "state": engine_state})
+        if not lines:
+            return
+
+        text = "".join(json.dumps(line, default=str) + "\n" for line in lines)
+        self._wal.write(text)
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._records += len(lines)
+        self._log_bytes += len(text)
+        if self._records >= self.snapshot_every and self._log_bytes >= self._snapshot_bytes:
+            self.checkpoint()
+
+    def _start_journal(self) -> None:
+        """start journaling into a directory that was not recovered from."""
+        if any(self.journal_dir.glob("snapshot-*.json")):
+            logger.warning(f"starting a new journal in {self.journal_dir}; state of the previous run is discarded")
+        self._generation = max(_generations(self.journal_dir), default=0)
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """write a snapshot of the current state and start a new log."""
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._generation += 1
+        snapshot = {
+            "generation": self._generation,
+            "workspaces": {
+                workspace_id: _workspace_model(workspace, self._roles.get(workspace_id, list(workspace.agents)), full=True)
+                for workspace_id, workspace in self.workspaces.items()
+            },
+            "engine": self._current_engine_state(),
+        }
+        path = self.journal_dir / f"snapshot-{self._generation:06d}.json"
+        temporary = path.with_suffix(".tmp")
+        text = json.dumps(snapshot, default=str)  # one call: the c encoder, not the streaming one
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+        if self._wal is not None:
+            self._wal.close()
+        self._wal = open(self.journal_dir / f"wal-{self._generation:06d}.ndjson", "a", encoding="utf-8")
+        self._records = 0
+        self._log_bytes = 0
+        self._snapshot_bytes = len(text)
+        self._state = {workspace_id: model["state"] for workspace_id, model in snapshot["workspaces"].items()}
+        self._engine_state = snapshot["engine"]
+        for old in self.journal_dir.iterdir():
+            if _generation_of(old) < self._generation:
+                old.unlink()
+
+    def close(self) -> None:
+        """close the log (state written so far stays recoverable)."""
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    def _current_engine_state(self) -> Optional[dict]:
+        if self.engine is None:
+            return None
+        return {
+            "subteam_requesters": dict(self.engine._subteam_requesters),
+            "total_workspaces_created": self.engine._total_workspaces_created,
+        }
+
+    # ========================================================================
+    # recovery
+    # ========================================================================
+
+    async def recover(self, engine: Optional[Any] = None) -> list[synqed.Workspace]:
+        """
+        rebuild the workspaces journaled under `workspaces_root`.
+
+        with an engine, its subteam bookkeeping is restored and every
+        workspace with unprocessed messages is scheduled on it; run
+        `engine.run_global_scheduler()` to resume. returns the recovered
+        workspaces, parents before children.
+        """
+        if self.workspaces:
+            raise ValueError("recover() must be called before any workspace is created")
+        state = load_journal(self.journal_dir)
+        if engine is not None:
+            self.attach(engine)
+
+        recovered = []
+        self._replaying = True
+        try:
+            for workspace_id, model in state["workspaces"].items():
+                workspace = self._rebuild_workspace(model)
+                self.workspaces[workspace_id] = workspace
+                self._roles[workspace_id] = model["roles"]
+                recovered.append(workspace)
+        finally:
+            self._replaying = False
+        for workspace in recovered:
+            self._instrument(workspace)
+        self._generation = state["generation"]
+        self.checkpoint()
+
+        if engine is not None:
+            engine_state = state.get("engine") or {}
+            engine._subteam_requesters.update(engine_state.get("subteam_requesters", {}))
+            engine._total_workspaces_created = max(
+                engine._total_workspaces_created, engine_state.get("total_workspaces_created", 0)
+            )
+            for workspace in recovered:
+                engine._attach_mcp_to_workspace(workspace)
+            await self._resume(engine, recovered)
+        logger.info(f"recovered {len(recovered)} workspaces from {self.journal_dir}")
+        return recovered
+
+    def _rebuild_workspace(self, model: dict) -> synqed.Workspace:
+        meta = model["meta"]
+        workspace_id = meta["workspace_id"]
+        directory = Path(model["directory"])
+        directory.mkdir(parents=True, exist_ok=True)
+        workspace = synqed.Workspace(directory=directory, router=synqed.MessageRouter(), agents={}, **meta)
+        workspace.children = list(model["children"])
+        use_compact_transcript(workspace)
+
+        missing = []
+        for role in model["roles"]:
+            agent = synqed.AgentRuntimeRegistry.create_instance(role, workspace_id)
+            if agent is None:
+                missing.append(role)
+                continue
+            if hasattr(agent, "memory"):
+                agent.memory.workspace_id = workspace_id
+            workspace.add_agent(agent)
+        if missing:
+            raise ValueError(
+                f"Missing agent runtimes for roles: {missing} (workspace {workspace_id}). "
+                f"Register them with AgentRuntimeRegistry.register() before recover()"
+            )
+
+        for agent_name, inbox in model["memories"].items():
+            agent = workspace.agents.get(agent_name)
+            if agent is None or not hasattr(agent, "memory"):
+                logger.warning(f"recover: no local agent {agent_name!r} in workspace {workspace_id}, inbox dropped")
+                continue
+            memory = agent.memory
+            for fields in inbox["messages"]:
+                message = InboxMessage(**fields)
+                memory.messages.append(message)
+                memory._messages_by_id[message.message_id] = message
+            memory.processed_ids.update(inbox["processed"])
+            memory._message_counter = inbox["counter"]
+
+        for entry in model["transcript"]:
+            workspace.router._add_transcript_entry(entry)
+        _apply_state(workspace, model["state"])
+        return workspace
+
+    async def _resume(self, engine: Any, workspaces: list[synqed.Workspace]) -> None:
+        """schedule workspaces with pending work; re-send subteam results that were lost."""
+        for workspace in workspaces:
+            child = workspace
+            parent = self.workspaces.get(child.parent_id) if child.parent_id else None
+            if parent is not None and _finished(child) and not _has_subteam_result(parent, child.workspace_id):
+                logger.info(f"recover: re-sending subteam_result of {child.workspace_id}")
+                await engine._send_subteam_result_to_parent(child, child.workspace_id)
+        for workspace in workspaces:
+            if any(
+                agent.memory.get_unprocessed_messages()
+                for agent in workspace.agents.values()
+                if hasattr(agent, "memory")
+            ):
+                engine.schedule_workspace(workspace.workspace_id)
+
+
+# ============================================================================
+# journal format
+# ============================================================================
+
+def load_journal(journal_dir: Path) -> dict:
+    """
+    the state recorded in a journal directory: the newest snapshot with its
+    log replayed. an empty state if there is no journal.
+    """
+    state = {"generation": 0, "workspaces": {}, "engine": None}
+    snapshots = sorted(Path(journal_dir).glob("snapshot-*.json"))
+    if not snapshots:
+        return state
+    with open(snapshots[-1], encoding="utf-8") as file:
+        state = json.load(file)
+    wal = Path(journal_dir) / f"wal-{state['generation']:06d}.ndjson"
+    if wal.exists():
+        for record in _read_log(wal):
+            _replay(state, record)
+    return state
+
+
+def _read_log(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as file:
+        lines = file.readlines()
+    for number, line in enumerate(lines):
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            if number == len(lines) - 1:
+                logger.warning(f"recover: ignoring torn last record of {path.name}")
+                return
+            raise
+
+
+def _replay(state: dict, record: dict) -> None:
+    workspaces = state["workspaces"]
+    op = record["op"]
+    if op == "engine":
+        state["engine"] = record["state"]
+        return
+    if op == "create":
+        model = {key: value for key, value in record.items() if key != "op"}
+        workspaces[model["meta"]["workspace_id"]] = model
+        parent = workspaces.get(model["meta"]["parent_id"])
+        if parent is not None and model["meta"]["workspace_id"] not in parent["children"]:
+            parent["children"].append(model["meta"]["workspace_id"])
+        return
+    if op == "link":
+        parent, child = workspaces.get(record["parent"]), workspaces.get(record["child"])
+        if parent is not None and record["child"] not in parent["children"]:
+            parent["children"].append(record["child"])
+        if child is not None:
+            child["meta"]["parent_id"] = record["parent"]
+        return
+
+    model = workspaces.get(record["ws"])
+    if model is None:
+        return  # destroyed later in the same log, or by a record replayed above
+    if op == "destroy":
+        del workspaces[record["ws"]]
+        parent = workspaces.get(model["meta"]["parent_id"])
+        if parent is not None and record["ws"] in parent["children"]:
+            parent["children"].remove(record["ws"])
+    elif op == "message":
+        inbox = model["memories"].setdefault(record["agent"], {"counter": 0, "messages": [], "processed": []})
+        inbox["messages"].append(record["message"])
+        inbox["counter"] = record["counter"]
+    elif op == "processed":
+        model["memories"][record["agent"]]["processed"].append(record["id"])
+    elif op == "transcript":
+        transcript = model["transcript"]
+        transcript.append(record["entry"])
+        if len(transcript) > 2 * synqed.router.MAX_TRANSCRIPT_SIZE:
+            del transcript[:-synqed.router.MAX_TRANSCRIPT_SIZE]
+    elif op == "clear":
+        model["transcript"] = []
+    elif op == "state":
+        model["state"] = record["state"]
+    else:
+        raise ValueError(f"unknown journal record {op!r}")
+
+
+def _workspace_model(workspace: synqed.Workspace, roles: list[str], full: bool = False) -> dict:
+    """json-ready description of a workspace; `full` includes inboxes and transcript."""
+    memories = {}
+    for agent_name, agent in workspace.agents.items():
+        memory = getattr(agent, "memory", None)
+        if memory is None:
+            continue
+        memories[agent_name] = {
+            "counter": memory._message_counter,
+            "messages": [message.model_dump() for message in memory.messages] if full else [],
+            "processed": sorted(memory.processed_ids) if full else [],
+        }
+    return {
+        "meta": {field: getattr(workspace, field) for field in _META_FIELDS},
+        "directory": str(workspace.directory),
+        "roles": roles,
+        "children": list(workspace.children),
+        "state": _workspace_state(workspace),
+        "memories": memories,
+        "transcript": [dict(entry) for entry in workspace.router.get_transcript()] if full else [],
+    }
+
+
+def _workspace_state(workspace: synqed.Workspace) -> dict:
+    """the mutable counters and flags of a workspace."""
+    return {
+        "has_started": workspace.has_started,
+        "user_message_counter": workspace.user_message_counter,
+        "router_counter": workspace.router._message_counter,
+        "subteam_requests": dict(workspace.subteam_requests),
+        "shared_plan": workspace.shared_plan,
+        "blocking_requirements": copy.deepcopy(workspace.blocking_requirements),
+        "waiting_for_user_input": workspace.waiting_for_user_input,
+    }
+
+
+def _apply_state(workspace: synqed.Workspace, state: dict) -> None:
+    workspace.has_started = state["has_started"]
+    workspace.user_message_counter = state["user_message_counter"]
+    workspace.router._message_counter = state["router_counter"]
+    workspace.subteam_requests = dict(state["subteam_requests"])
+    workspace.shared_plan = state["shared_plan"]
+    workspace.blocking_requirements = copy.deepcopy(state["blocking_requirements"])
+    workspace.waiting_for_user_input = state["waiting_for_user_input"]
+
+
+def _finished(workspace: synqed.Workspace) -> bool:
+    """whether a subteam reported its result to planner/USER."""
+    return last_message(workspace.router, from_=list(workspace.agents), to=("planner", "USER"), kind="message") is not None
+
+
+def _has_subteam_result(parent: synqed.Workspace, child_id: str) -> bool:
+    marker = json.dumps(child_id)
+    return any(
+        message.content.startswith("[subteam_result]") and marker in message.content
+        for agent in parent.agents.values()
+        if hasattr(agent, "memory")
+        for message in agent.memory.messages
+    )
+
+
+def _generations(journal_dir: Path) -> Iterator[int]:
+    if journal_dir.is_dir():
+        for path in journal_dir.iterdir():
+            yield _generation_of(path)
+
+
+def _generation_of(path: Path) -> int:
+    try:
+        return int(path.name.split("-", 1)[1].split(".", 1)[0])
+    except (IndexError, ValueError):
+        return 0
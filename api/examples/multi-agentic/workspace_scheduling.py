@@ -0,0 +1,582 @@
+"""
+event-driven global scheduling for synqed workspace hierarchies.
+
+`WorkspaceExecutionEngine.run_global_scheduler()` drains the global queue in
+batches and awaits each batch with `asyncio.gather`. a workspace scheduled
+while a batch is running (a child woken by its coordinator, a parent woken by
+a subteam_result) waits for the slowest member of the batch, and a workspace
+that is already running when it is scheduled is dropped.
+
+`EventDrivenExecutionEngine` is a drop-in replacement built around a ready
+queue and asyncio wakeups:
+- each workspace runs as its own task, started as soon as it is scheduled.
+- idle workspaces cost nothing: no task, no polling. a workspace is woken
+  when `route_message` delivers work to one of its agents.
+- a workspace scheduled while running is re-run once it finishes, if it
+  still has pending work.
+- scheduling latency (schedule -> start) is measured per dispatch.
+- admission control: a global cap on concurrently running workspaces, plus
+  optional per-depth and per-tenant caps, so a large hierarchy does not hit
+  the llm provider all at once.
+- priority classes: ready workspaces are started by class (by default their
+  depth, so root coordinators are served before leaf teams), then by fair
+  share: within a class, the workspace that has run least goes first, so one
+  chatty workspace cannot starve the others.
+- optional intra-workspace parallelism (`parallel_agents=True`): when
+  several agents of one workspace have pending events (e.g. after a
+  broadcast to "ALL" or to a list of recipients), their logic runs
+  concurrently. the engine still consumes results, routes messages and
+  updates the display in event order, and each agent has at most one turn
+  in flight, so per-agent ordering is unchanged. the trade-off: a
+  recipient's turn sees the workspace as it was when the broadcast was
+  handled, not the replies of recipients ahead of it in the queue.
+- cached conversation history (`cached_history=True`, the default): the
+  contexts handed to agents serve `get_conversation_history()` from the
+  workspace's `HistoryCache` (see conversation_history.py), which renders
+  only the transcript entries added since the agent's previous call.
+  `history_max_tokens` bounds that history for agents whose logic does not
+  pass its own `max_tokens`: older turns are dropped or summarized
+  (`history_strategy`), so prompts stop growing with the conversation.
+- pooled llm clients: every context gets `context.llm`, a handle to the
+  engine's `LLMClientPool` (see llm_clients.py), so agent logic shares one
+  sdk client and its kept-alive connections per provider instead of
+  building a client per turn.
+- streaming (`streaming=True`): each turn's start is recorded in the
+  workspace's `MessageStreams` (see streaming.py), so messages that agent
+  logic streams with `stream_response` are printed on the display as they
+  are generated, and `streams.stats` measures time to first token from the
+  start of the turn.
+
+usage:
+    engine = EventDrivenExecutionEngine(
+        planner=planner,
+        workspace_manager=workspace_manager,
+        max_agent_turns=50,
+        max_concurrent_workspaces=8,
+        max_concurrent_per_depth={1: 6},
+        max_concurrent_per_tenant=4,
+        parallel_agents=True,
+    )
+    await engine.run(root_workspace.workspace_id)
+    engine.print_scheduling_stats()
+"""
+
+from __future__ import annotations
+
+import time
+import heapq
+import asyncio
+import logging
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import synqed
+from synqed.execution_engine import Context
+from synqed.scheduler import EventScheduler
+
+from conversation_history import HISTORY_STRATEGIES, history_cache
+from llm_clients import LLMClientPool, default_pool
+from streaming import LiveDisplay, message_streams
+
+logger = logging.getLogger(__name__)
+
+_MESSAGE_TRIGGERS = ("startup", "message", "subteam_result")
+
+
+@dataclass
+class SchedulingStats:
+    """
+    global scheduler counters.
+
+    attributes:
+        scheduled: schedule requests accepted into the ready queue.
+        dispatched: workspace runs started.
+        reruns: runs started because work arrived while the workspace ran.
+        wakeups: workspaces woken by a routed message.
+        peak_running: most workspaces running at once.
+        deferred: ready workspaces held back by a concurrency cap (once
+            per scheduling, however many wakeups they wait through).
+        parallel_turns: agent turns started ahead of their event
+            (parallel_agents).
+        discarded_turns: turns started ahead whose event never ran (the
+            workspace stopped first).
+        latency_seconds: summed schedule -> start latency.
+        max_latency_seconds: worst schedule -> start latency.
+        recent_latencies: latencies of the most recent dispatches.
+    """
+    scheduled: int = 0
+    dispatched: int = 0
+    reruns: int = 0
+    wakeups: int = 0
+    peak_running: int = 0
+    deferred: int = 0
+    parallel_turns: int = 0
+    discarded_turns: int = 0
+    latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    @property
+    def avg_latency(self) -> float:
+        return self.latency_seconds / self.dispatched if self.dispatched else 0.0
+
+    def latency_percentile(self, q: float) -> float:
+        """latency percentile (0 <= q <= 1) over the recent dispatches."""
+        if not self.recent_latencies:
+            return 0.0
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record_dispatch(self, latency: float, running: int) -> None:
+        self.dispatched += 1
+        self.latency_seconds += latency
+        self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        self.recent_latencies.append(latency)
+        self.peak_running = max(self.peak_running, running)
+
+
+class EventDrivenExecutionEngine(synqed.WorkspaceExecutionEngine):
+    """
+    workspace execution engine whose global scheduler is driven by events.
+
+    accepts the same arguments as `WorkspaceExecutionEngine`, plus the
+    scheduling options below.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_workspace_runs: int = 1000,
+        max_concurrent_workspaces: Optional[int] = None,
+        max_concurrent_per_depth: Optional[dict[int, int]] = None,
+        max_concurrent_per_tenant: Optional[int] = None,
+        tenant_of: Optional[Callable[[synqed.Workspace], str]] = None,
+        priority_of: Optional[Callable[[synqed.Workspace], int]] = None,
+        parallel_agents: bool = False,
+        cached_history: bool = True,
+        history_max_tokens: Optional[int] = None,
+        history_strategy: str = "window",
+        llm_pool: Optional[LLMClientPool] = None,
+        streaming: bool = False,
+        **kwargs,
+    ):
+        """
+        initialize event-driven execution engine.
+
+        args:
+            *args, **kwargs: forwarded to `WorkspaceExecutionEngine`.
+            max_workspace_runs: safety cap on workspace runs per
+                `run_global_scheduler()` call (replaces the base class's
+                iteration cap).
+            max_concurrent_workspaces: workspaces allowed to run at once
+                (default: unlimited).
+            max_concurrent_per_depth: depth -> workspaces of that depth
+                allowed to run at once.
+            max_concurrent_per_tenant: workspaces of one tenant allowed to
+                run at once.
+            tenant_of: maps a workspace to its tenant (default: the id of
+                its root workspace, i.e. one tenant per hierarchy).
+            priority_of: maps a workspace to its priority class, lower runs
+                first (default: its depth).
+            parallel_agents: run the logic of agents with pending events in
+                the same workspace concurrently. relies on two private synqed
+                attributes (`EventScheduler._event_queue`,
+                `Agent.last_processed_message_id`); without them it is turned
+                off with a warning.
+            cached_history: serve `context.get_conversation_history()` from
+                an incrementally maintained per-workspace cache.
+            history_max_tokens: default token budget of that history
+                (requires cached_history).
+            history_strategy: "window" drops turns beyond the budget,
+                "summarize" replaces them with cached summaries.
+            llm_pool: pool behind `context.llm` (default: the process-wide
+                pool of llm_clients.py).
+            streaming: time agent turns in the workspaces' message streams
+                and print streamed messages live on the display.
+        """
+        super().__init__(*args, **kwargs)
+        caps = [max_concurrent_workspaces, max_concurrent_per_tenant, *(max_concurrent_per_depth or {}).values()]
+        if any(cap is not None and cap < 1 for cap in caps):
+            raise ValueError("concurrency caps must be >= 1")
+        if history_strategy not in HISTORY_STRATEGIES:
+            raise ValueError(f"unknown history strategy {history_strategy!r}, expected one of {HISTORY_STRATEGIES}")
+
+        self.max_workspace_runs = max_workspace_runs
+        self.max_concurrent_workspaces = max_concurrent_workspaces
+        self.max_concurrent_per_depth = dict(max_concurrent_per_depth or {})
+        self.max_concurrent_per_tenant = max_concurrent_per_tenant
+        self.tenant_of = tenant_of or self._root_workspace_id
+        self.priority_of = priority_of or (lambda workspace: workspace.depth)
+        if parallel_agents:
+            missing = _missing_parallel_agents_support()
+            if missing:
+                logger.warning(
+                    f"parallel_agents disabled: this synqed version has no {' or '.join(missing)}; "
+                    f"agent turns run sequentially"
+                )
+                parallel_agents = False
+        self.parallel_agents = parallel_agents
+        self.cached_history = cached_history
+        self.history_max_tokens = history_max_tokens
+        self.history_strategy = history_strategy
+        self.llm_pool = llm_pool if llm_pool is not None else default_pool()
+        self.streaming = streaming
+        self.live_display = LiveDisplay(self.display) if streaming and self.display else None
+        self.scheduling_stats = SchedulingStats()
+
+        # ready heap of (priority class, run time so far, fifo seq, workspace id)
+        self._ready: list[tuple[int, float, int, str]] = []
+        self._seq = 0
+        self._run_seconds: Counter = Counter()
+        self._running_by_depth: Counter = Counter()
+        self._running_by_tenant: Counter = Counter()
+        self._slots: dict[str, tuple[int, str, float]] = {}
+        self._scheduled_at: dict[str, float] = {}
+        self._deferred: set[str] = set()  # ready workspaces already counted as held back
+        self._rerun: set[str] = set()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._watched: set[str] = set()
+        self._wakeup = asyncio.Event()
+        # workspace id -> (agent name, message id) -> turn started ahead
+        self._early_turns: dict[str, dict[tuple[str, str], _EarlyTurn]] = {}
+
+    # ========================================================================
+    # scheduling
+    # ========================================================================
+
+    def schedule_workspace(self, workspace_id: str) -> None:
+        """
+        mark a workspace ready and wake the global scheduler.
+
+        a workspace that is already running is flagged for a re-run instead
+        of being dropped, so work routed to it late is not lost.
+        """
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        self.watch_workspace(workspace_id)
+
+        if workspace.is_running or workspace_id in self._running_workspaces:
+            self._rerun.add(workspace_id)
+            return
+        if workspace_id in self._queued_workspaces:
+            return
+
+        self._queued_workspaces.add(workspace_id)
+        self._scheduled_at[workspace_id] = time.monotonic()
+        self._seq += 1
+        heapq.heappush(
+            self._ready,
+            (self.priority_of(workspace), self._run_seconds[workspace_id], self._seq, workspace_id),
+        )
+        self.scheduling_stats.scheduled += 1
+        self._wakeup.set()
+
+    def watch_workspace(self, workspace_id: str) -> None:
+        """
+        wake a workspace whenever a message from outside it is routed to it.
+
+        messages sent by the workspace's own agents and SYSTEM messages are
+        ignored: the engine already schedules those explicitly.
+        """
+        if workspace_id in self._watched:
+            return
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        self._watched.add(workspace_id)
+
+        async def on_message(sender: str, recipient: str, content: str) -> None:
+            if sender == "SYSTEM" or sender in workspace.agents:
+                return
+            if workspace_id not in self._running_workspaces and workspace_id not in self._queued_workspaces:
+                self.scheduling_stats.wakeups += 1
+            self.schedule_workspace(workspace_id)
+
+        workspace.on_message(on_message)
+
+    async def run_global_scheduler(self) -> None:
+        """
+        run scheduled workspaces until none are ready or running.
+
+        each ready workspace is started as its own task as soon as the caps
+        admit it; the loop sleeps until a workspace is scheduled or finishes.
+        """
+        runs = 0
+        while True:
+            self._wakeup.clear()
+            for workspace_id in self._admissible():
+                if runs < self.max_workspace_runs:
+                    self._dispatch(workspace_id)
+                    runs += 1
+                else:
+                    self._queued_workspaces.discard(workspace_id)
+                    self._scheduled_at.pop(workspace_id, None)
+            if runs >= self.max_workspace_runs and self._ready:
+                logger.error(f"global scheduler stopped after {runs} workspace runs")
+                self._drain_ready()
+
+            if self._idle():
+                break
+            await self._wakeup.wait()
+
+    def _idle(self) -> bool:
+        """whether the global scheduler has nothing left to wait for."""
+        return not self._tasks
+
+    def _admissible(self) -> list[str]:
+        """
+        pop the ready workspaces the concurrency caps admit, best first.
+
+        workspaces held back by a per-depth or per-tenant cap stay ready and
+        do not block lower-priority workspaces that fit.
+        """
+        admitted = []
+        held = []
+        running = len(self._tasks)
+        by_depth = Counter(self._running_by_depth)
+        by_tenant = Counter(self._running_by_tenant)
+        while self._ready:
+            if self.max_concurrent_workspaces is not None and running >= self.max_concurrent_workspaces:
+                break
+            entry = heapq.heappop(self._ready)
+            workspace = self.workspace_manager.get_workspace(entry[3])
+            tenant = self.tenant_of(workspace)
+            depth_cap = self.max_concurrent_per_depth.get(workspace.depth)
+            if (depth_cap is not None and by_depth[workspace.depth] >= depth_cap) or (
+                self.max_concurrent_per_tenant is not None
+                and by_tenant[tenant] >= self.max_concurrent_per_tenant
+            ):
+                held.append(entry)
+                continue
+            admitted.append(entry[3])
+            running += 1
+            by_depth[workspace.depth] += 1
+            by_tenant[tenant] += 1
+
+        for entry in (*held, *self._ready):
+            if entry[3] not in self._deferred:
+                self._deferred.add(entry[3])
+                self.scheduling_stats.deferred += 1
+        for entry in held:
+            heapq.heappush(self._ready, entry)
+        return admitted
+
+    def _dispatch(self, workspace_id: str) -> None:
+        self._queued_workspaces.discard(workspace_id)
+        self._deferred.discard(workspace_id)
+        now = time.monotonic()
+        latency = now - self._scheduled_at.pop(workspace_id, now)
+
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        tenant = self.tenant_of(workspace)
+        self._running_by_depth[workspace.depth] += 1
+        self._running_by_tenant[tenant] += 1
+        self._slots[workspace_id] = (workspace.depth, tenant, now)
+
+        task = asyncio.create_task(self.run_workspace(workspace_id=workspace_id))
+        self._tasks[workspace_id] = task
+        task.add_done_callback(lambda t, wid=workspace_id: self._on_workspace_done(wid, t))
+        self.scheduling_stats.record_dispatch(latency, len(self._tasks))
+
+    def _on_workspace_done(self, workspace_id: str, task: asyncio.Task) -> None:
+        self._tasks.pop(workspace_id, None)
+        depth, tenant, started = self._slots.pop(workspace_id)
+        self._running_by_depth[depth] -= 1
+        self._running_by_tenant[tenant] -= 1
+        self._run_seconds[workspace_id] += time.monotonic() - started
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error executing workspace {workspace_id}: {task.exception()}")
+
+        if workspace_id in self._rerun:
+            self._rerun.discard(workspace_id)
+            if self._has_pending_work(workspace_id):
+                self.scheduling_stats.reruns += 1
+                self.schedule_workspace(workspace_id)
+        self._wakeup.set()
+
+    def _has_pending_work(self, workspace_id: str) -> bool:
+        scheduler = self._workspace_schedulers.get(workspace_id)
+        if scheduler is not None and scheduler.has_pending_events():
+            return True
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        return any(
+            agent.memory.get_unprocessed_messages()
+            for agent in workspace.agents.values()
+            if hasattr(agent, "memory")
+        )
+
+    def _drain_ready(self) -> None:
+        for *_, workspace_id in self._ready:
+            self._queued_workspaces.discard(workspace_id)
+            self._scheduled_at.pop(workspace_id, None)
+            self._deferred.discard(workspace_id)
+        self._ready.clear()
+
+    def _root_workspace_id(self, workspace: synqed.Workspace) -> str:
+        while workspace.parent_id and workspace.parent_id in self.workspace_manager.workspaces:
+            workspace = self.workspace_manager.get_workspace(workspace.parent_id)
+        return workspace.workspace_id
+
+    # ========================================================================
+    # agent turns: intra-workspace parallelism, cached history, llm clients,
+    # streaming
+    # ========================================================================
+
+    async def run_workspace(self, workspace_id: str, max_cycles: Optional[int] = None) -> None:
+        """run a workspace, starting independent agent turns early if enabled."""
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        if workspace.is_running or workspace_id in self._running_workspaces:
+            return await super().run_workspace(workspace_id, max_cycles=max_cycles)
+
+        if self.parallel_agents:
+            self._early_turns.setdefault(workspace_id, {})
+        for agent in workspace.agents.values():
+            if hasattr(agent, "process") and hasattr(agent, "memory"):
+                self._wrap_process(agent, workspace_id)
+        if self.live_display:
+            self.live_display.attach(message_streams(workspace.router))
+        try:
+            await super().run_workspace(workspace_id, max_cycles=max_cycles)
+        finally:
+            self._discard_early_turns(workspace_id)
+
+    def _wrap_process(self, agent: Any, workspace_id: str) -> None:
+        """
+        route `agent.process` through the engine so a turn started early is
+        returned when the engine reaches its event, and so the context gets
+        the cached conversation history and the llm client pool.
+        """
+        if getattr(agent.process, "engine", None) is self:
+            return
+        original = agent.process
+
+        async def process(context: Any) -> Any:
+            message_id = (getattr(context, "event_payload", None) or {}).get("message_id")
+            early = self._early_turns.get(workspace_id, {}).pop((agent.name, message_id), None)
+            self._start_early_turns(workspace_id, agent.name)
+            if early is None:
+                self._prepare_context(context)
+                return await original(context)
+            return await early.task
+
+        process.engine = self
+        process.original = original
+        agent.process = process
+
+    def _prepare_context(self, context: Any) -> None:
+        """
+        hand the context the engine's llm clients, serve its conversation
+        history from the workspace's cache and start timing the turn.
+        """
+        context.llm = self.llm_pool.bind(context)
+        if self.streaming and context.workspace is not None:
+            message_streams(context.workspace.router).turn_started(context.agent_name)
+        if self.cached_history and context.workspace is not None:
+            # an instance attribute shadows AgentLogicContext.get_conversation_history
+            context.get_conversation_history = history_cache(context.workspace.router).bind(
+                context, max_tokens=self.history_max_tokens, strategy=self.history_strategy
+            )
+
+    def _start_early_turns(self, workspace_id: str, current_agent: str) -> None:
+        """
+        start the next turn of every other agent with a pending event.
+
+        only an agent's first pending event is eligible, and only if it has
+        no early turn in flight, so each agent's turns stay in order.
+        """
+        scheduler = self._workspace_schedulers.get(workspace_id)
+        early_turns = self._early_turns.get(workspace_id)
+        if scheduler is None or early_turns is None:
+            return
+        # EventScheduler only exposes peek_next_event(), and an early turn must
+        # get the payload of the event the engine will pop, so read its queue
+        # (a deque of AgentEvents, checked in __init__)
+        queue = scheduler._event_queue
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        busy = {current_agent} | {name for name, _ in early_turns}
+        seen = {current_agent}
+
+        for event in list(queue):
+            name = event.agent_name
+            if name in seen:
+                continue
+            seen.add(name)
+            message_id = event.payload.get("message_id")
+            agent = workspace.agents.get(name)
+            if (
+                name in busy
+                or event.trigger not in _MESSAGE_TRIGGERS
+                or not message_id
+                or getattr(getattr(agent, "process", None), "engine", None) is not self
+                or agent.memory.get_message_by_id(message_id) is None
+                or agent.memory.is_message_processed(message_id)
+            ):
+                continue
+
+            # same context the engine builds when it pops the event
+            messages = agent.memory.get_messages()
+            context = Context(
+                agent_name=name,
+                workspace=workspace,
+                workspace_id=workspace_id,
+                messages=messages[-10:] if messages else [],
+                memory=agent.memory,
+                default_target=agent.default_target,
+                event_trigger=event.trigger,
+                event_payload=event.payload,
+                shared_plan=workspace.shared_plan,
+            )
+            self._prepare_context(context)
+            early_turns[(name, message_id)] = _EarlyTurn(
+                task=asyncio.ensure_future(agent.process.original(context)),
+                agent=agent,
+                last_processed_message_id=agent.last_processed_message_id,
+            )
+            self.scheduling_stats.parallel_turns += 1
+
+    def _discard_early_turns(self, workspace_id: str) -> None:
+        """drop early turns whose events did not run, restoring the agents' dedup state."""
+        for early in self._early_turns.pop(workspace_id, {}).values():
+            if early.task.done():
+                if not early.task.cancelled():
+                    early.task.exception()  # retrieved, so it is not reported as lost
+            else:
+                early.task.cancel()
+            # Agent.process skips a message equal to its last processed one,
+            # so the next run must not see the discarded turn as done
+            early.agent.last_processed_message_id = early.last_processed_message_id
+            self.scheduling_stats.discarded_turns += 1
+
+    # ========================================================================
+    # reporting
+    # ========================================================================
+
+    def print_scheduling_stats(self) -> None:
+        """print scheduler counters and schedule -> start latency."""
+        stats = self.scheduling_stats
+        print("\nScheduler:")
+        print(f"  Workspace runs: {stats.dispatched} ({stats.reruns} re-runs, {stats.wakeups} message wakeups)")
+        print(f"  Peak concurrent workspaces: {stats.peak_running} (held back by caps: {stats.deferred})")
+        print(
+            f"  Scheduling latency: avg {stats.avg_latency * 1000:.2f}ms, "
+            f"p95 {stats.latency_percentile(0.95) * 1000:.2f}ms, "
+            f"max {stats.max_latency_seconds * 1000:.2f}ms"
+        )
+        if self.parallel_agents:
+            print(f"  Parallel agent turns: {stats.parallel_turns} ({stats.discarded_turns} discarded)")
+
+
+@dataclass(eq=False)
+class _EarlyTurn:
+    """an agent turn started before the engine reached its event."""
+    task: asyncio.Future
+    agent: Any
+    last_processed_message_id: Optional[str]
+
+
+def _missing_parallel_agents_support() -> list[str]:
+    """the private synqed attributes `parallel_agents` relies on that this synqed version lacks."""
+    missing = []
+    if not isinstance(getattr(EventScheduler(), "_event_queue", None), deque):
+        missing.append("EventScheduler._event_queue")
+    if not hasattr(synqed.Agent(name="parallel-agents-probe"), "last_processed_message_id"):
+        missing.append("Agent.last_processed_message_id")
+    return missing
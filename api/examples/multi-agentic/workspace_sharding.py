@@ -0,0 +1,521 @@
+"""
+process-pool sharding of synqed workspaces across cpu cores.
+
+every workspace of an `EventDrivenExecutionEngine` shares one event loop, so
+per-message cpu work (json repair in `Agent.process`, history rendering,
+display formatting) is capped by a single core. `ShardedExecutionEngine`
+places whole team subtrees in worker processes:
+- workspaces at `shard_depth` (default 1: the teams under a root
+  coordinator) are moved to a shard the first time they are scheduled,
+  round-robin over `shards` worker processes. subteams they spawn stay on
+  the same shard.
+- each shard runs its own engine, `WorkspaceManager` and `MessageRouter`s.
+- the workspace stays in the parent's `WorkspaceManager` as a proxy whose
+  agents forward delivered messages over a pipe; the shard holds a proxy
+  of the parent the same way. `route_message` between parent and child
+  workspaces therefore works unchanged on both sides.
+- a shard holds the messages its workspaces send to the parent process
+  until the run that sent them finishes, then relays them as one batch. a
+  team lead's last message and the team's subteam_result therefore reach
+  the parent together and wake it once, as they do in-process.
+- when the run ends, shard transcripts are copied back into the proxies,
+  so `display_transcript()` and `get_completion_status()` keep working.
+
+agent logic runs in the shards, so agent prototypes must be registered
+there too: `shard_setup` is a module-level function (it is pickled by
+reference) that registers them with `AgentRuntimeRegistry` and returns the
+`PlannerLLM` used for subteam requests, or none. `on_deliverable` and
+`mcp_middleware` only apply to workspaces in the parent process.
+
+usage:
+    def register_agents():
+        synqed.AgentRuntimeRegistry.register("Writer", writer)
+        ...
+
+    if __name__ == "__main__":
+        register_agents()
+        engine = ShardedExecutionEngine(
+            planner=planner,
+            workspace_manager=workspace_manager,
+            shards=3,
+            shard_setup=register_agents,
+        )
+        await engine.run(root_workspace.workspace_id)
+        engine.close()
+"""
+
+from __future__ import annotations
+
+import uuid
+import heapq
+import asyncio
+import logging
+import threading
+import multiprocessing
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+import synqed
+
+from compact_transcript import CompactWorkspaceManager
+from workspace_scheduling import EventDrivenExecutionEngine
+
+logger = logging.getLogger(__name__)
+
+# messages that make the receiving side busy until it acknowledges them
+_COUNTED = ("create", "message", "schedule")
+# messages a shard holds back and relays in batches (see _ShardChannel.hold)
+_RELAYED = ("message", "schedule")
+
+
+class ShardedExecutionEngine(EventDrivenExecutionEngine):
+    """
+    event-driven engine that runs team workspaces in worker processes.
+
+    with `shards=0` it behaves exactly like `EventDrivenExecutionEngine`.
+    """
+
+    def __init__(
+        self,
+        *args,
+        shards: int = 0,
+        shard_setup: Optional[Callable[[], Any]] = None,
+        shard_depth: int = 1,
+        sync_timeout: float = 30.0,
+        **kwargs,
+    ):
+        """
+        initialize sharded execution engine.
+
+        args:
+            *args, **kwargs: forwarded to `EventDrivenExecutionEngine` (and,
+                when picklable, to the shard engines).
+            shards: worker processes (0 runs everything in-process).
+            shard_setup: module-level function run once in every shard; it
+                registers the agent prototypes and returns the planner for
+                subteam requests (or None).
+            shard_depth: depth of the workspaces moved to shards.
+            sync_timeout: seconds to wait for a shard's transcripts.
+        """
+        super().__init__(*args, **kwargs)
+        if shards < 0:
+            raise ValueError(f"shards must be >= 0, got {shards}")
+        if shards and shard_setup is None:
+            raise ValueError("shard_setup is required to register agents in the shards")
+
+        self.shards = shards
+        self.shard_setup = shard_setup
+        self.shard_depth = shard_depth
+        self.sync_timeout = sync_timeout
+        self._shard_engine_kwargs = {
+            key: value for key, value in kwargs.items()
+            if key not in ("planner", "workspace_manager", "mcp_middleware", "on_deliverable")
+            and not callable(value)
+        }
+
+        self._channels: list[_ShardChannel] = []
+        self._processes: list[multiprocessing.Process] = []
+        self._remote: dict[str, _ShardChannel] = {}
+        self._next_shard = 0
+        self._inflight = 0
+
+    # ========================================================================
+    # placement
+    # ========================================================================
+
+    def schedule_workspace(self, workspace_id: str) -> None:
+        """schedule a workspace, placing it on a shard first if it belongs there."""
+        if workspace_id not in self._remote and self.shards:
+            workspace = self.workspace_manager.get_workspace(workspace_id)
+            if workspace.depth == self.shard_depth and not workspace.is_running:
+                self.place_workspace(workspace_id)  # the shard schedules it on creation
+                return
+
+        channel = self._remote.get(workspace_id)
+        if channel is not None:
+            channel.send(("schedule", workspace_id))
+            return
+        super().schedule_workspace(workspace_id)
+
+    def place_workspace(self, workspace_id: str, shard: Optional[int] = None) -> None:
+        """
+        move an idle workspace to a shard (round-robin by default).
+
+        its agents' unprocessed messages move with it; from then on the
+        local workspace is a proxy that forwards messages to the shard.
+        """
+        self._start_shards()
+        workspace = self.workspace_manager.get_workspace(workspace_id)
+        if workspace.is_running:
+            raise ValueError(f"Workspace {workspace_id} is running and cannot be moved")
+        if shard is None:
+            shard = self._next_shard
+            self._next_shard = (self._next_shard + 1) % self.shards
+        channel = self._channels[shard]
+
+        if workspace_id in self._queued_workspaces:
+            self._queued_workspaces.discard(workspace_id)
+            self._ready = [entry for entry in self._ready if entry[3] != workspace_id]
+            heapq.heapify(self._ready)
+
+        parent = self.workspace_manager.workspaces.get(workspace.parent_id) if workspace.parent_id else None
+        messages = [
+            (message.from_agent, message.target or name, message.content, message.message_id)
+            for name, agent in workspace.agents.items()
+            for message in agent.memory.get_unprocessed_messages()
+        ]
+        channel.send(("create", {
+            "workspace_id": workspace_id,
+            "parent_id": workspace.parent_id,
+            "parent_agents": list(parent.agents) if parent else [],
+            "depth": workspace.depth,
+            "node": {
+                "id": workspace.subtask_id or workspace.workspace_name or workspace_id,
+                "description": workspace.workspace_description,
+                "required_agents": list(workspace.agents),
+            },
+            "messages": messages,
+        }))
+
+        _make_proxy(workspace, channel)
+        self._remote[workspace_id] = channel
+        channel.hosted.append(workspace_id)
+
+    def _start_shards(self) -> None:
+        if self._channels:
+            return
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_main,
+                args=(child_conn, self.shard_setup, self._shard_engine_kwargs, self.workspace_manager.workspaces_root),
+                name=f"synqed-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            channel = _ShardChannel(parent_conn, index)
+            channel.listen(loop, self._on_shard_message)
+            self._channels.append(channel)
+            self._processes.append(process)
+
+    # ========================================================================
+    # cross-shard traffic
+    # ========================================================================
+
+    def _on_shard_message(self, channel: _ShardChannel, message: tuple) -> None:
+        kind = message[0]
+        if kind == "batch":
+            self._inflight += 1
+            asyncio.ensure_future(self._deliver(message[1]))
+        elif kind == "idle":
+            channel.acknowledged = message[1]
+        elif kind == "transcripts":
+            if channel.pending_sync is not None and not channel.pending_sync.done():
+                channel.pending_sync.set_result(message[1])
+        elif kind == "closed":
+            channel.closed = True
+        self._wakeup.set()
+
+    async def _deliver(self, batch: list[tuple]) -> None:
+        """route a batch of relayed messages, then schedule each workspace they reach once."""
+        woken: dict[str, bool] = {}
+        try:
+            for kind, workspace_id, *fields in batch:
+                if kind == "schedule":
+                    woken.setdefault(workspace_id, False)
+                    continue
+                sender, recipient, content, message_id = fields
+                try:
+                    workspace = self.workspace_manager.get_workspace(workspace_id)
+                    await workspace.route_message(
+                        sender=sender,
+                        recipient=recipient,
+                        content=content,
+                        manager=self.workspace_manager,
+                        message_id=message_id,
+                    )
+                    woken[workspace_id] = True
+                except Exception as e:
+                    logger.error(f"Error delivering shard message {message_id} to {workspace_id}: {e}")
+            for workspace_id, delivered in woken.items():
+                # a late schedule must not re-run a workspace that has finished
+                if delivered or self._has_pending_work(workspace_id):
+                    self.schedule_workspace(workspace_id)
+        finally:
+            self._inflight -= 1
+            self._wakeup.set()
+
+    def _on_workspace_done(self, workspace_id: str, task: asyncio.Task) -> None:
+        super()._on_workspace_done(workspace_id, task)
+        # in a shard: relay what the finished run sent to the parent process,
+        # together with the runs finishing in the same loop iteration
+        for channel in set(self._remote.values()):
+            channel.flush_soon()
+
+    def _idle(self) -> bool:
+        return (
+            super()._idle()
+            and not self._inflight
+            and all(channel.closed or not channel.busy for channel in self._channels)
+        )
+
+    async def run_global_scheduler(self) -> None:
+        """run until local workspaces and all shards are idle, then sync transcripts."""
+        await super().run_global_scheduler()
+        if self._channels:
+            await self.sync_transcripts()
+
+    async def sync_transcripts(self) -> None:
+        """copy the transcripts of shard-hosted workspaces into their local proxies."""
+        loop = asyncio.get_running_loop()
+        for channel in self._channels:
+            if channel.closed:
+                continue
+            channel.pending_sync = loop.create_future()
+            channel.send(("sync",))
+            try:
+                transcripts = await asyncio.wait_for(channel.pending_sync, self.sync_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"shard {channel.index} did not return its transcripts")
+                continue
+            finally:
+                channel.pending_sync = None
+            for workspace_id, entries in transcripts.items():
+                workspace = self.workspace_manager.workspaces.get(workspace_id)
+                if workspace is None:
+                    continue
+                workspace.router.clear_transcript()
+                for entry in entries:
+                    workspace.router.add_transcript_entry(entry)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """stop the shard processes."""
+        for channel in self._channels:
+            if not channel.closed:
+                channel.send(("stop",))
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for channel in self._channels:
+            channel.conn.close()
+        self._channels.clear()
+        self._processes.clear()
+
+    def print_scheduling_stats(self) -> None:
+        super().print_scheduling_stats()
+        if self._channels:
+            hosted = ", ".join(f"shard {c.index}: {len(c.hosted)}" for c in self._channels)
+            print(f"  Shards: {len(self._channels)} processes ({hosted} workspaces)")
+
+
+# ============================================================================
+# proxies and ipc
+# ============================================================================
+
+class _ShardChannel:
+    """
+    one end of the pipe between the parent process and a shard.
+
+    counts the work messages sent and acknowledged, so the sender can tell
+    when the other side has gone idle. with `hold=True` (the shard's end),
+    relayed messages and schedules are kept until `flush()` and sent as one
+    batch, so the parent routes them all before it schedules anything.
+    """
+
+    def __init__(self, conn: Any, index: int = 0, hold: bool = False):
+        self.conn = conn
+        self.index = index
+        self.sent = 0
+        self.acknowledged = 0
+        self.closed = False
+        self.hosted: list[str] = []
+        self.pending_sync: Optional[asyncio.Future] = None
+        self._held: Optional[list[tuple]] = [] if hold else None
+        self._flush_pending = False
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self.acknowledged < self.sent
+
+    def send(self, message: tuple) -> None:
+        with self._lock:
+            if self._held is not None and message[0] in _RELAYED:
+                self._held.append(message)
+                return
+            if message[0] in _COUNTED:
+                self.sent += 1
+            self.conn.send(message)
+
+    def flush(self) -> None:
+        """send the held messages as one batch."""
+        with self._lock:
+            self._flush_pending = False
+            if self._held:
+                self.conn.send(("batch", self._held))
+                self._held = []
+
+    def flush_soon(self) -> None:
+        """flush on the next loop iteration, once however often it is asked for."""
+        if self._held is not None and not self._flush_pending:
+            self._flush_pending = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def listen(self, loop: asyncio.AbstractEventLoop, handler: Callable[[_ShardChannel, tuple], None]) -> None:
+        """forward received messages to `handler` on `loop`, from a reader thread."""
+        def pump():
+            while True:
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    message = ("closed",)
+                try:
+                    loop.call_soon_threadsafe(handler, self, message)
+                except RuntimeError:
+                    return  # loop closed
+                if message[0] == "closed":
+                    return
+
+        threading.Thread(target=pump, name=f"shard-channel-{self.index}", daemon=True).start()
+
+
+class _RemoteInbox:
+    """agent memory stand-in that forwards delivered messages over a channel."""
+
+    def __init__(self, agent_name: str, workspace_id: str, channel: _ShardChannel):
+        self.agent_name = agent_name
+        self.workspace_id = workspace_id
+        self._channel = channel
+
+    def generate_message_id(self) -> str:
+        return f"msg-{self.workspace_id}-{self.agent_name}-{uuid.uuid4().hex[:8]}"
+
+    def add_message(self, from_agent: str, content: str, message_id: Optional[str] = None, target: Optional[str] = None) -> str:
+        message_id = message_id or self.generate_message_id()
+        self._channel.send(("message", self.workspace_id, from_agent, target or self.agent_name, content, message_id))
+        return message_id
+
+    def get_messages(self) -> list:
+        return []
+
+    def get_unprocessed_messages(self) -> list:
+        return []
+
+    def get_last_n_messages(self, n: int) -> list:
+        return []
+
+
+class _RemoteAgent:
+    """stand-in for an agent that lives in another process."""
+
+    def __init__(self, name: str, workspace_id: str, channel: _ShardChannel):
+        self.name = name
+        self.memory = _RemoteInbox(name, workspace_id, channel)
+
+    def __repr__(self) -> str:
+        return f"_RemoteAgent({self.name})"
+
+
+def _make_proxy(workspace: synqed.Workspace, channel: _ShardChannel, agent_names: Optional[list[str]] = None) -> None:
+    for name in agent_names if agent_names is not None else list(workspace.agents):
+        workspace.add_agent(_RemoteAgent(name, workspace.workspace_id, channel))
+
+
+# ============================================================================
+# shard process
+# ============================================================================
+
+class _ShardWorkspaceManager(CompactWorkspaceManager):
+    """compact workspace manager that reuses the parent process's workspace ids."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.next_workspace_id: Optional[str] = None
+
+    def _generate_workspace_id(self) -> str:
+        workspace_id, self.next_workspace_id = self.next_workspace_id, None
+        return workspace_id or super()._generate_workspace_id()
+
+
+def _shard_main(conn: Any, setup: Callable[[], Any], engine_kwargs: dict, workspaces_root: Any) -> None:
+    planner = setup()
+    asyncio.run(_serve_shard(conn, planner, engine_kwargs, workspaces_root))
+
+
+async def _serve_shard(conn: Any, planner: Any, engine_kwargs: dict, workspaces_root: Any) -> None:
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+    owner = _ShardChannel(conn, hold=True)
+    owner.listen(loop, lambda channel, message: inbox.put_nowait(message))
+
+    manager = _ShardWorkspaceManager(workspaces_root=workspaces_root)
+    engine = ShardedExecutionEngine(planner=planner, workspace_manager=manager, **engine_kwargs)
+    work = asyncio.Event()
+    received = 0
+
+    async def create(spec: dict) -> None:
+        parent_id = spec["parent_id"]
+        if parent_id and parent_id not in manager.workspaces:
+            parent = synqed.Workspace(
+                workspace_id=parent_id,
+                directory=manager.workspaces_root / parent_id,
+                depth=spec["depth"] - 1,
+            )
+            _make_proxy(parent, owner, spec["parent_agents"])
+            manager.workspaces[parent_id] = parent
+            engine._remote[parent_id] = owner
+
+        manager.next_workspace_id = spec["workspace_id"]
+        workspace = await manager.create_workspace(SimpleNamespace(**spec["node"]), parent_workspace_id=parent_id)
+        for sender, recipient, content, message_id in spec["messages"]:
+            await workspace.route_message(sender, recipient, content, manager=manager, message_id=message_id)
+        engine.schedule_workspace(workspace.workspace_id)
+
+    async def consume() -> None:
+        nonlocal received
+        while True:
+            message = await inbox.get()
+            kind = message[0]
+            if kind in ("stop", "closed"):
+                return
+            try:
+                if kind == "create":
+                    await create(message[1])
+                elif kind == "message":
+                    workspace_id, sender, recipient, content, message_id = message[1:]
+                    workspace = manager.get_workspace(workspace_id)
+                    await workspace.route_message(sender, recipient, content, manager=manager, message_id=message_id)
+                    engine.schedule_workspace(workspace_id)
+                elif kind == "schedule":
+                    # messages schedule their workspace on arrival; a late
+                    # schedule must not re-run a workspace that has finished
+                    if engine._has_pending_work(message[1]):
+                        engine.schedule_workspace(message[1])
+                elif kind == "sync":
+                    owner.send(("transcripts", {
+                        workspace_id: [dict(entry) for entry in workspace.router.get_transcript()]
+                        for workspace_id, workspace in manager.workspaces.items()
+                        if workspace_id not in engine._remote
+                    }))
+            except Exception as e:
+                logger.error(f"shard failed to handle {kind}: {e}")
+            if kind in _COUNTED:
+                received += 1
+                work.set()
+
+    async def drive() -> None:
+        while True:
+            await work.wait()
+            work.clear()
+            await engine.run_global_scheduler()
+            owner.flush()
+            if not work.is_set():
+                owner.send(("idle", received))
+
+    driver = asyncio.create_task(drive())
+    await consume()
+    driver.cancel()
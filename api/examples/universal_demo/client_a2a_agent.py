@@ -94,6 +94,8 @@ class CodeReviewAgent:
     def __init__(self):
         """Initialize the code review agent."""
         self.name = "CodeReviewAgent"
+        # One client for the server's lifetime, so reviews reuse its connections
+        self._client = None
     
     async def review(self, message: str) -> str:
         """
@@ -106,11 +108,13 @@ class CodeReviewAgent:
             Code review analysis as a string
         """
         # Use Anthropic Claude for code review
-        import anthropic
-        
-        client = anthropic.AsyncAnthropic(
-            api_key=os.getenv("ANTHROPIC_API_KEY")
-        )
+        if self._client is None:
+            import anthropic
+            
+            self._client = anthropic.AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY")
+            )
+        client = self._client
         
         prompt = f"""You are a code review expert agent.
 
@@ -74,12 +74,17 @@ Setup:
 
 import asyncio
 import os
+import sys
 import subprocess
 import time
 from pathlib import Path
 from dotenv import load_dotenv
 import synqed
 
+# shared, pooled provider clients (see multi-agentic/llm_clients.py)
+sys.path.insert(0, str(Path(__file__).parent.parent / "multi-agentic"))
+from llm_clients import llm_for
+
 # Load environment
 load_dotenv()
 
@@ -91,8 +96,6 @@ async def coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     """
     Local coordinator agent - routes work to local and remote agents.
     """
-    import anthropic
-    
     latest = context.latest_message
     if not latest:
         return context.build_response("USER", "Coordinator ready!")
@@ -116,7 +119,7 @@ async def coordinator_logic(context: synqed.AgentLogicContext) -> dict:
     
     # Initial request from USER - delegate to LocalWriter
     # Use LLM to understand the request
-    client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     prompt = f"""You are a Coordinator agent. The user wants you to write a story and then have it reviewed.
 
@@ -139,13 +142,11 @@ async def local_writer_logic(context: synqed.AgentLogicContext) -> dict:
     """
     Local writer agent - creates written content.
     """
-    import anthropic
-    
     latest = context.latest_message
     if not latest:
         return context.build_response("Coordinator", "LocalWriter ready!")
     
-    client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = llm_for(context).anthropic()
     
     prompt = f"""You are a creative writer agent.
 